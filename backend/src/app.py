@@ -1,19 +1,47 @@
+import argparse
+import asyncio
+import bisect
+import cProfile
+import gzip
+import hashlib
+import heapq
+import itertools
 import json
+import marshal
+import multiprocessing
 import os
+import pstats
+import queue
+import random
 import re
+import signal
+import socket
+import sqlite3
 import sys
+import tempfile
+import threading
+import time
+import unicodedata
 import uuid
 import zipfile
-from dataclasses import dataclass
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager, suppress
+from dataclasses import dataclass, field
 from datetime import datetime
+from decimal import Decimal
 from email.message import EmailMessage
-from email.parser import BytesParser
+from email.parser import BytesHeaderParser
 from email.policy import default
+from email.utils import parsedate_to_datetime
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
-from io import BytesIO
+from io import BytesIO, StringIO
+from multiprocessing.managers import BaseManager, BaseProxy, MakeProxyType, convert_to_error, dispatch
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
-from urllib.parse import urlparse
+from typing import Any, BinaryIO, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, quote, urlparse
+from xml.sax.saxutils import escape
 import xml.etree.ElementTree as ET
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,69 +49,1888 @@ CLIENT_DIR = BASE_DIR.parent / "client"
 DATA_DIR = BASE_DIR / "data"
 DB_PATH = DATA_DIR / "db.json"
 BACKUP_DIR = DATA_DIR / "backups"
+JOURNAL_PATH = DATA_DIR / "db.journal"
+SQLITE_PATH = DATA_DIR / "db.sqlite3"
+STORAGE_BACKEND = os.environ.get("DECK_STORAGE", "json").strip().lower()
+FLUSH_INTERVAL = float(os.environ.get("DECK_FLUSH_INTERVAL", "2.0"))
+FLUSH_BATCH_SIZE = int(os.environ.get("DECK_FLUSH_BATCH", "50"))
+JOURNAL_FSYNC_BATCH = int(os.environ.get("DECK_JOURNAL_FSYNC_BATCH", "20"))
+JOURNAL_COMPACT_THRESHOLD = int(os.environ.get("DECK_JOURNAL_COMPACT", "1000"))
+MAX_UPLOAD_BYTES = int(float(os.environ.get("DECK_MAX_UPLOAD_MB", "50")) * 1024 * 1024)
+UPLOAD_SPOOL_THRESHOLD = 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+GZIP_MIN_BYTES = int(os.environ.get("DECK_GZIP_MIN_BYTES", "1024"))
+CARD_PAGE_SIZE = 50
+CARD_PAGE_MAX = 500
+REVIEW_BATCH_MAX = 1000
+IDEMPOTENCY_CACHE_SIZE = 1024
+STUDY_SESSIONS_MAX = int(os.environ.get("DECK_STUDY_SESSIONS", "1024"))
+STUDY_SESSION_TTL = float(os.environ.get("DECK_STUDY_SESSION_TTL", "3600"))
+SEARCH_LIMIT = 20
+SEARCH_LIMIT_MAX = 100
+SEARCH_COMPACT_MIN = 10000
+DB_FORMATS = ("json", "json+gzip", "columnar", "columnar+gzip")
+DB_FORMAT = os.environ.get("DECK_DB_FORMAT", "json").strip().lower()
+SNAPSHOT_INTERVAL = float(os.environ.get("DECK_SNAPSHOT_INTERVAL", "900"))
+SNAPSHOT_MAX_CHANGES = int(os.environ.get("DECK_SNAPSHOT_CHANGES", "1000"))
+SNAPSHOT_KEEP = int(os.environ.get("DECK_SNAPSHOT_KEEP", "20"))
+IMPORT_WORKERS = int(os.environ.get("DECK_IMPORT_WORKERS", "0")) or (os.cpu_count() or 1)
+IMPORT_MAX_FILES = 200
+IMPORT_EXTENSIONS = {".json", ".xlsx"}
+IMPORT_JOB_WORKERS = int(os.environ.get("DECK_IMPORT_JOBS", "2"))
+IMPORT_JOB_HISTORY = 200
+SERVER_MODES = ("threaded", "async")
+SERVER_MODE = os.environ.get("DECK_SERVER", "threaded").strip().lower()
+ASYNC_WORKERS = int(os.environ.get("DECK_ASYNC_WORKERS", "16"))
+KEEPALIVE_TIMEOUT = float(os.environ.get("DECK_KEEPALIVE_TIMEOUT", "15"))
+WORKER_PROCESSES = int(os.environ.get("DECK_WORKERS", "1"))
+WORKER_PUBLISH_INTERVAL = 1.0
+ASYNC_IO_TIMEOUT = 60.0
+ASYNC_SHUTDOWN_GRACE = 30.0
+MAX_REQUEST_HEAD = 64 * 1024
+PROFILE_SAMPLE_RATE = float(os.environ.get("DECK_PROFILE", "0"))
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".css", ".json", ".svg", ".txt"}
 
 
-def ensure_database() -> None:
+def _ensure_database_file() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     if not DB_PATH.exists():
-        DB_PATH.write_text(json.dumps({"decks": []}, ensure_ascii=False, indent=2), encoding="utf-8")
+        DB_PATH.write_bytes(encode_database({"decks": []}))
 
 
-def read_database() -> Dict[str, Any]:
-    ensure_database()
-    with DB_PATH.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
+def ensure_database() -> None:
+    get_storage().ensure()
 
 
-def backup_database() -> None:
-    ensure_database()
-    if not DB_PATH.exists():
-        return
+def _replace_file(path: Path, data: bytes) -> None:
+    """Atomically replace ``path`` with ``data`` through a unique temp file."""
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f"{path.stem}-", suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
-    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    backup_path = BACKUP_DIR / f"db-{timestamp}.json"
 
-    try:
-        backup_path.write_bytes(DB_PATH.read_bytes())
-    except OSError:  # pragma: no cover - defensive guard
+def _dump_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _check_db_format(db_format: str) -> str:
+    if db_format not in DB_FORMATS:
+        raise ValueError(f"Formato de base de datos desconocido: {db_format}")
+    return db_format
+
+
+def encode_database(data: Dict[str, Any], db_format: Optional[str] = None) -> bytes:
+    """Serialise the database in one of :data:`DB_FORMATS` (``DECK_DB_FORMAT``).
+
+    ``json`` is compact JSON. ``columnar`` writes a first line with every deck's
+    metadata, card ids and scores, followed by one line per deck holding the
+    array of its ``contenido`` values, so scores can be read without decoding
+    any content (see :func:`read_deck_scores`). The ``+gzip`` variants compress
+    either layout.
+    """
+    layout, _, compression = _check_db_format(db_format or DB_FORMAT).partition("+")
+    if layout == "columnar":
+        header = {"format": "columnar", "version": 1, "decks": []}
+        contents = []
+        for deck in data.get("decks", []):
+            header["decks"].append(_deck_score_columns(deck))
+            contents.append(_dump_json([card.get("contenido", {}) for card in deck.get("cards", [])]))
+        raw = b"\n".join([_dump_json(header), *contents]) + b"\n"
+    else:
+        raw = _dump_json(data)
+    return gzip.compress(raw, compresslevel=6, mtime=0) if compression else raw
+
+
+def _open_database_file(path: Path) -> BinaryIO:
+    fh = path.open("rb")
+    if fh.peek(2)[:2] == b"\x1f\x8b":
+        fh.close()
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    return fh
+
+
+def _read_columnar_header(fh: BinaryIO) -> Tuple[Optional[Dict[str, Any]], bytes]:
+    """Return the columnar header of an open database, or ``None`` and the bytes read."""
+    first = fh.readline()
+    if first.startswith(b'{"format":"columnar"'):
+        return json.loads(first), first
+    return None, first
+
+
+def read_deck_scores(path: Optional[Path] = None) -> List[Dict[str, Any]]:
+    """Read deck metadata with ``cardIds`` and ``aciertos`` arrays, without content.
+
+    Columnar files only decode their first line; other layouts are read in full.
+    """
+    with _open_database_file(path or DB_PATH) as fh:
+        header, first = _read_columnar_header(fh)
+        if header is not None:
+            return header["decks"]
+        rest = fh.read()
+        data = json.loads(first + rest if rest else first)
+    return [_deck_score_columns(deck) for deck in data.get("decks", [])]
+
+
+def _deck_score_columns(deck: Dict[str, Any]) -> Dict[str, Any]:
+    """Deck metadata with its cards reduced to ``cardIds`` and ``aciertos`` arrays."""
+    cards = deck.get("cards", [])
+    meta = {key: value for key, value in deck.items() if key != "cards"}
+    meta["cardIds"] = [card["id"] for card in cards]
+    meta["aciertos"] = [_normalise_score(card.get("aciertos", 0)) for card in cards]
+    return meta
+
+
+def _read_json_database(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Read db.json in any of :data:`DB_FORMATS`, whatever ``DECK_DB_FORMAT`` says."""
+    with _open_database_file(path or DB_PATH) as fh:
+        header, first = _read_columnar_header(fh)
+        if header is None:
+            rest = fh.read()
+            return json.loads(first + rest if rest else first)
+        decks = []
+        for meta in header["decks"]:
+            ids = meta.pop("cardIds")
+            scores = meta.pop("aciertos")
+            contents = json.loads(fh.readline())
+            meta["cards"] = [
+                {"id": card_id, "aciertos": score, "contenido": contenido}
+                for card_id, score, contenido in zip(ids, scores, contents)
+            ]
+            decks.append(meta)
+        return {"decks": decks}
+
+
+def _write_json_database(data: Union[Dict[str, Any], bytes]) -> None:
+    _ensure_database_file()
+    # _replace_file uses a unique temp file, so concurrent writes never share a path.
+    _replace_file(DB_PATH, data if isinstance(data, bytes) else encode_database(data))
+
+
+def convert_database(db_format: str, source: Optional[Path] = None, target: Optional[Path] = None) -> None:
+    """Rewrite a database file (db.json by default, in place) in another format."""
+    data = _read_json_database(source or DB_PATH)
+    target = target or source or DB_PATH
+    target.parent.mkdir(parents=True, exist_ok=True)
+    _replace_file(target, encode_database(data, db_format))
+
+
+def _rotated_journal_path() -> Path:
+    return JOURNAL_PATH.with_name(JOURNAL_PATH.name + ".1")
+
+
+def read_journal(path: Path) -> Iterator[Tuple[str, str, int]]:
+    """Yield ``(deck_id, card_id, aciertos)`` records from a review journal.
+
+    A torn last line (the process died mid-append) is skipped silently.
+    """
+    with path.open("rb") as fh:
+        for line in fh:
+            try:
+                deck_id, card_id, score = json.loads(line)
+            except (ValueError, TypeError):
+                continue
+            yield str(deck_id), str(card_id), _normalise_score(score)
+
+
+def apply_journal_records(data: Dict[str, Any], records: Iterable[Tuple[str, str, int]]) -> int:
+    cards: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for deck in data.get("decks", []):
+        for card in deck.get("cards", []):
+            cards[(deck["id"], card["id"])] = card
+    applied = 0
+    for deck_id, card_id, score in records:
+        card = cards.get((deck_id, card_id))
+        if card is None:
+            continue
+        card["aciertos"] = score
+        applied += 1
+    return applied
+
+
+def replay_journal() -> None:
+    """Fold any review journal left on disk back into db.json.
+
+    Records hold absolute scores rather than deltas, so replaying a journal that
+    was already partly compacted is harmless.
+    """
+    paths = [path for path in (_rotated_journal_path(), JOURNAL_PATH) if path.exists()]
+    if not paths:
         return
+    if any(path.stat().st_size for path in paths):
+        data = _read_json_database()
+        for path in paths:
+            apply_journal_records(data, read_journal(path))
+        _write_json_database(data)
+    for path in paths:
+        path.unlink()
+
+
+class ReviewJournal:
+    """Append-only log of card score changes.
+
+    Each review is one compact JSON line, so recording it costs a small append
+    instead of rewriting db.json. Writes are fsync'd every ``fsync_batch`` records
+    (and whenever :meth:`sync` is called) to bound the work lost on a crash.
+    """
+
+    def __init__(self, path: Path, fsync_batch: int = JOURNAL_FSYNC_BATCH) -> None:
+        self.path = path
+        self.fsync_batch = max(1, fsync_batch)
+        self.records = 0
+        self._unsynced = 0
+        self._fh: Optional[BinaryIO] = None
+        self._lock = threading.RLock()
+
+    def _open(self) -> BinaryIO:
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self.path.open("ab")
+        return self._fh
+
+    def append(self, deck_id: str, card_id: str, score: int) -> None:
+        self.append_many(deck_id, [(card_id, score)])
+
+    def append_many(self, deck_id: str, scores: List[Tuple[str, int]]) -> None:
+        """Append several records with a single write."""
+        if not scores:
+            return
+        data = b"".join(
+            json.dumps([deck_id, card_id, score], separators=(",", ":")).encode("utf-8") + b"\n"
+            for card_id, score in scores
+        )
+        with self._lock:
+            self._open().write(data)
+            self.records += len(scores)
+            self._unsynced += len(scores)
+            if self._unsynced >= self.fsync_batch:
+                self.sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._fh is None or not self._unsynced:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is None:
+                return
+            self.sync()
+            self._fh.close()
+            self._fh = None
+
+    def rotate(self) -> Optional[Path]:
+        """Move the current records aside so a snapshot can supersede them.
+
+        Returns the rotated file, to be deleted once the snapshot is on disk. If a
+        previous rotated file is still around (its snapshot failed), the new
+        records are appended to it instead of replacing it.
+        """
+        with self._lock:
+            self.close()
+            self.records = 0
+            if not self.path.exists():
+                return None
+            rotated = _rotated_journal_path()
+            if rotated.exists():
+                with rotated.open("ab") as dst:
+                    dst.write(self.path.read_bytes())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                self.path.unlink()
+            else:
+                self.path.replace(rotated)
+            return rotated
+
+
+STORAGE_ERRORS = (OSError, sqlite3.Error)
+
+
+class JsonStorage:
+    """Default backend: the whole database in db.json plus a review journal.
+
+    Structural changes are persisted by rewriting db.json from a snapshot; card
+    reviews go to the :class:`ReviewJournal` until the next snapshot absorbs them.
+    """
+
+    name = "json"
+    incremental = False
+
+    def __init__(self) -> None:
+        self.journal: Optional[ReviewJournal] = None
+
+    def ensure(self) -> None:
+        _check_db_format(DB_FORMAT)
+        _ensure_database_file()
+        replay_journal()
+
+    def read(self) -> Dict[str, Any]:
+        self.ensure()
+        return _read_json_database()
+
+    def write(self, data: Union[Dict[str, Any], bytes]) -> None:
+        _write_json_database(data)
+
+    def open(self) -> None:
+        self.close()
+        self.journal = ReviewJournal(JOURNAL_PATH)
+
+    def close(self) -> None:
+        if self.journal is not None:
+            self.journal.close()
+
+    def sync(self) -> None:
+        if self.journal is not None:
+            self.journal.sync()
+
+    @property
+    def backlog(self) -> int:
+        return self.journal.records if self.journal is not None else 0
+
+    def record_reviews(self, deck_id: str, scores: List[Tuple[str, int]]) -> None:
+        if self.journal is None:
+            self.open()
+        assert self.journal is not None
+        self.journal.append_many(deck_id, scores)
+
+    def snapshot(self, data: Dict[str, Any]) -> Tuple[bytes, Optional[Path]]:
+        encoded = encode_database(data)
+        rotated = self.journal.rotate() if self.journal is not None else None
+        return encoded, rotated
+
+    def commit(self, snapshot: Tuple[bytes, Optional[Path]]) -> None:
+        encoded, rotated = snapshot
+        _write_json_database(encoded)
+        if rotated is not None:
+            rotated.unlink()
+
+
+class SqliteStorage:
+    """SQLite backend with point updates for single decks and cards.
+
+    Selected with ``DECK_STORAGE=sqlite``. The first time it starts next to an
+    existing db.json, the JSON database (and any pending journal) is migrated.
+    """
+
+    name = "sqlite"
+    incremental = True
+    backlog = 0
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS decks (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            extra TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE TABLE IF NOT EXISTS cards (
+            deck_id TEXT NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+            id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            aciertos INTEGER NOT NULL DEFAULT 0,
+            contenido TEXT NOT NULL,
+            PRIMARY KEY (deck_id, id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_cards_deck ON cards(deck_id, position);
+        CREATE INDEX IF NOT EXISTS idx_cards_id ON cards(id);
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def ensure(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            migrated = conn.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+            if migrated is not None:
+                return
+            if DB_PATH.exists() and conn.execute("SELECT COUNT(*) FROM decks").fetchone()[0] == 0:
+                json_storage = JsonStorage()
+                self._write(conn, json_storage.read())
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                    (datetime.utcnow().isoformat(),),
+                )
+
+    def read(self) -> Dict[str, Any]:
+        self.ensure()
+        with self._lock:
+            conn = self._connection()
+            decks: List[Dict[str, Any]] = []
+            by_id: Dict[str, Dict[str, Any]] = {}
+            for deck_id, name, extra in conn.execute("SELECT id, name, extra FROM decks ORDER BY position"):
+                deck = {"id": deck_id, "name": name, **json.loads(extra), "cards": []}
+                decks.append(deck)
+                by_id[deck_id] = deck
+            rows = conn.execute("SELECT deck_id, id, aciertos, contenido FROM cards ORDER BY deck_id, position")
+            for deck_id, card_id, score, contenido in rows:
+                by_id[deck_id]["cards"].append(
+                    {"id": card_id, "aciertos": score, "contenido": json.loads(contenido)}
+                )
+        return {"decks": decks}
+
+    def write(self, data: Union[Dict[str, Any], bytes]) -> None:
+        payload = json.loads(data) if isinstance(data, bytes) else data
+        with self._lock:
+            self._write(self._connection(), payload)
+
+    def _write(self, conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
+        with conn:
+            conn.execute("DELETE FROM cards")
+            conn.execute("DELETE FROM decks")
+            for position, deck in enumerate(data.get("decks", [])):
+                self._insert_deck(conn, deck, position)
+
+    def _insert_deck(self, conn: sqlite3.Connection, deck: Dict[str, Any], position: int) -> None:
+        extra = {key: value for key, value in deck.items() if key not in ("id", "name", "cards")}
+        conn.execute(
+            "INSERT INTO decks (id, name, position, extra) VALUES (?, ?, ?, ?)",
+            (deck["id"], deck["name"], position, json.dumps(extra, ensure_ascii=False)),
+        )
+        conn.executemany(
+            "INSERT INTO cards (deck_id, id, position, aciertos, contenido) VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    deck["id"],
+                    card["id"],
+                    index,
+                    _normalise_score(card.get("aciertos", 0)),
+                    json.dumps(card.get("contenido", {}), ensure_ascii=False),
+                )
+                for index, card in enumerate(deck.get("cards", []))
+            ),
+        )
+
+    def open(self) -> None:
+        with self._lock:
+            self._connection()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def sync(self) -> None:
+        return None
 
-    backups = sorted(BACKUP_DIR.glob("db-*.json"))
-    max_backups = 10
-    if len(backups) > max_backups:
-        for old in backups[:-max_backups]:
+    def insert_decks(self, decks: List[Dict[str, Any]]) -> None:
+        """Append decks to the end of the listing in a single transaction.
+
+        A deck whose id is already stored is replaced and keeps its position.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                position = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM decks").fetchone()[0]
+                for deck in decks:
+                    row = conn.execute("SELECT position FROM decks WHERE id = ?", (deck["id"],)).fetchone()
+                    if row is None:
+                        self._insert_deck(conn, deck, position)
+                        position += 1
+                        continue
+                    conn.execute("DELETE FROM cards WHERE deck_id = ?", (deck["id"],))
+                    conn.execute("DELETE FROM decks WHERE id = ?", (deck["id"],))
+                    self._insert_deck(conn, deck, row[0])
+
+    def delete_deck(self, deck_id: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM cards WHERE deck_id = ?", (deck_id,))
+                conn.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+
+    def record_reviews(self, deck_id: str, scores: List[Tuple[str, int]]) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "UPDATE cards SET aciertos = ? WHERE deck_id = ? AND id = ?",
+                    ((score, deck_id, card_id) for card_id, score in scores),
+                )
+
+    def snapshot(self, data: Dict[str, Any]) -> bytes:
+        return _dump_json(data)
+
+    def commit(self, snapshot: bytes) -> None:
+        self.write(snapshot)
+
+
+Storage = Union[JsonStorage, SqliteStorage]
+
+
+def create_storage(kind: Optional[str] = None) -> Storage:
+    kind = (kind or STORAGE_BACKEND or "json").lower()
+    if kind == "json":
+        return JsonStorage()
+    if kind == "sqlite":
+        return SqliteStorage(SQLITE_PATH)
+    raise ValueError(f"Backend de almacenamiento desconocido: {kind}")
+
+
+_storage: Optional[Storage] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage()
+        return _storage
+
+
+class SnapshotArchive:
+    """Compressed, content-addressed backups of the database.
+
+    Each deck is stored once as a gzip'd JSON object under ``objects/``, named
+    after the SHA-256 of its encoding, and a snapshot is a small manifest under
+    ``snapshots/`` listing those objects. Decks that did not change between two
+    snapshots share one object, so a snapshot only costs the decks that changed.
+
+    :meth:`due` implements the policy: a snapshot is taken once ``interval``
+    seconds have passed or ``max_changes`` mutations have accumulated, whichever
+    comes first. Only the newest ``keep`` snapshots are retained; objects no
+    longer referenced are deleted together with them.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        interval: float = SNAPSHOT_INTERVAL,
+        max_changes: int = SNAPSHOT_MAX_CHANGES,
+        keep: int = SNAPSHOT_KEEP,
+    ) -> None:
+        self.root = root
+        self.interval = interval
+        self.max_changes = max(1, max_changes)
+        self.keep = max(1, keep)
+        self.objects_dir = root / "objects"
+        self.snapshots_dir = root / "snapshots"
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def due(self, changes: int) -> bool:
+        if changes <= 0:
+            return False
+        return changes >= self.max_changes or time.monotonic() - self._last >= self.interval
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.json.gz"
+
+    def has(self, digest: str) -> bool:
+        return self._object_path(digest).exists()
+
+    def _store_object(self, payload: bytes) -> str:
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _replace_file(path, gzip.compress(payload, mtime=0))
+        return digest
+
+    def _manifest_path(self, snapshot_id: str) -> Path:
+        if not re.fullmatch(r"[\w-]+", snapshot_id):
+            raise ValueError(f"Copia de seguridad no encontrada: {snapshot_id}")
+        return self.snapshots_dir / f"{snapshot_id}.json"
+
+    def take(self, decks: List[Tuple[Dict[str, Any], Union[bytes, str]]]) -> Tuple[str, List[str]]:
+        """Write a snapshot and return its id and the digest of every deck.
+
+        ``decks`` pairs each deck's ``id``/``name``/``cards`` summary with either
+        its encoded JSON or the digest of an object already in the archive.
+        """
+        with self._lock:
+            entries = []
+            for meta, payload in decks:
+                digest = payload if isinstance(payload, str) else self._store_object(payload)
+                entries.append({**meta, "object": digest})
+            self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+            now = datetime.utcnow()
+            snapshot_id = now.strftime("%Y%m%d-%H%M%S-%f")
+            while (self.snapshots_dir / f"{snapshot_id}.json").exists():
+                snapshot_id += "-1"
+            manifest = {"id": snapshot_id, "createdAt": now.isoformat() + "Z", "decks": entries}
+            _replace_file(
+                self._manifest_path(snapshot_id),
+                json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            )
+            self._last = time.monotonic()
+            self._prune()
+        return snapshot_id, [entry["object"] for entry in entries]
+
+    def take_database(self, data: Dict[str, Any]) -> str:
+        decks = [
+            (
+                {"id": deck["id"], "name": deck["name"], "cards": len(deck.get("cards", []))},
+                json.dumps(deck, ensure_ascii=False).encode("utf-8"),
+            )
+            for deck in data.get("decks", [])
+        ]
+        return self.take(decks)[0]
+
+    def _manifests(self) -> List[Path]:
+        if not self.snapshots_dir.exists():
+            return []
+        return sorted(self.snapshots_dir.glob("*.json"))
+
+    def _read_manifest(self, path: Path) -> Dict[str, Any]:
+        with path.open("r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _prune(self) -> None:
+        manifests = self._manifests()
+        if len(manifests) <= self.keep:
+            return
+        for old in manifests[: -self.keep]:
+            old.unlink(missing_ok=True)
+        referenced = {
+            entry["object"] for path in manifests[-self.keep :] for entry in self._read_manifest(path)["decks"]
+        }
+        for path in self.objects_dir.glob("*/*.json.gz"):
+            if path.name[: -len(".json.gz")] not in referenced:
+                path.unlink(missing_ok=True)
+
+    def latest(self) -> Optional[str]:
+        manifests = self._manifests()
+        return manifests[-1].stem if manifests else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Describe every snapshot, oldest first."""
+        snapshots = []
+        for path in self._manifests():
+            manifest = self._read_manifest(path)
+            snapshots.append(
+                {
+                    "id": manifest["id"],
+                    "createdAt": manifest["createdAt"],
+                    "deckCount": len(manifest["decks"]),
+                    "cardCount": sum(entry["cards"] for entry in manifest["decks"]),
+                }
+            )
+        return snapshots
+
+    def load(self, snapshot_id: str) -> Dict[str, Any]:
+        path = self._manifest_path(snapshot_id)
+        if not path.exists():
+            raise ValueError(f"Copia de seguridad no encontrada: {snapshot_id}")
+        decks = []
+        for entry in self._read_manifest(path)["decks"]:
+            with gzip.open(self._object_path(entry["object"]), "rb") as fh:
+                decks.append(json.load(fh))
+        return {"decks": decks}
+
+
+def restore_snapshot(snapshot_id: Optional[str] = None) -> str:
+    """Replace the database with a snapshot and return the id restored.
+
+    Without an id the newest snapshot is used. The current database is archived
+    first, so a restore can itself be undone. Run it with the server stopped.
+    """
+    archive = SnapshotArchive(BACKUP_DIR)
+    snapshot_id = snapshot_id or archive.latest()
+    if snapshot_id is None:
+        raise ValueError("No hay copias de seguridad")
+    data = archive.load(snapshot_id)
+    storage = get_storage()
+    archive.take_database(storage.read())
+    storage.write(data)
+    storage.close()
+    return snapshot_id
+
+
+def read_deck_stats() -> List[Dict[str, Any]]:
+    """Compute every deck's stats from the stored scores, with the server stopped.
+
+    With the ``json`` backend only card ids and scores are decoded (the first
+    line of a ``columnar`` file, see :func:`read_deck_scores`) and a pending
+    review journal is applied in memory, without rewriting db.json.
+    """
+    storage = get_storage()
+    if isinstance(storage, JsonStorage):
+        _ensure_database_file()
+        decks = read_deck_scores()
+        journals = [path for path in (_rotated_journal_path(), JOURNAL_PATH) if path.exists()]
+        if journals:
+            slots = {(deck["id"], card_id): (deck["aciertos"], i) for deck in decks for i, card_id in enumerate(deck["cardIds"])}
+            for path in journals:
+                for deck_id, card_id, score in read_journal(path):
+                    slot = slots.get((deck_id, card_id))
+                    if slot is not None:
+                        slot[0][slot[1]] = score
+    else:
+        decks = [_deck_score_columns(deck) for deck in storage.read().get("decks", [])]
+        storage.close()
+    return [
+        {"id": deck["id"], "name": deck.get("name", ""), **DeckStats.from_scores(deck["aciertos"]).as_dict()}
+        for deck in decks
+    ]
+
+
+@dataclass
+class DeckStats:
+    """Aggregates shown in the deck listing, kept up to date card by card."""
+
+    card_count: int = 0
+    pending_points: int = 0
+    reviewed_count: int = 0
+    success_count: int = 0
+    to_review_count: int = 0
+
+    @classmethod
+    def from_deck(cls, deck: Dict[str, Any]) -> "DeckStats":
+        return cls.from_scores(_normalise_score(card.get("aciertos", 0)) for card in deck.get("cards", []))
+
+    @classmethod
+    def from_scores(cls, scores: Iterable[int]) -> "DeckStats":
+        stats = cls()
+        for score in scores:
+            stats.add(score)
+        return stats
+
+    def add(self, score: int, weight: int = 1) -> None:
+        self.card_count += weight
+        if score > 0:
+            self.success_count += weight
+            self.reviewed_count += weight
+        elif score < 0:
+            self.to_review_count += weight
+            self.reviewed_count += weight
+            self.pending_points -= score * weight
+
+    def update(self, old_score: int, new_score: int) -> None:
+        self.add(old_score, -1)
+        self.add(new_score)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "cardCount": self.card_count,
+            "pendingPoints": self.pending_points,
+            "reviewedCount": self.reviewed_count,
+            "successCount": self.success_count,
+            "toReviewCount": self.to_review_count,
+        }
+
+
+CARD_STATUSES = ("toReview", "success", "new", "reviewed")
+
+
+def _score_sign(score: int) -> int:
+    return (score > 0) - (score < 0)
+
+
+class CardIndex:
+    """Lookup structures over the cards of one deck.
+
+    ``by_id`` maps card ids to positions for constant-time lookups. ``by_sign``
+    groups positions by the sign of the card's score in sorted lists, so a
+    filtered page is a bisect plus ``limit`` steps instead of a scan over the
+    whole deck.
+    """
+
+    def __init__(self, cards: List[Dict[str, Any]]) -> None:
+        self.by_id: Dict[str, int] = {}
+        self.by_sign: Dict[int, List[int]] = {-1: [], 0: [], 1: []}
+        for position, card in enumerate(cards):
+            self.by_id[card["id"]] = position
+            self.by_sign[_score_sign(_normalise_score(card.get("aciertos", 0)))].append(position)
+
+    def position(self, card_id: str) -> Optional[int]:
+        return self.by_id.get(card_id)
+
+    def move(self, position: int, old_score: int, new_score: int) -> None:
+        old_sign, new_sign = _score_sign(old_score), _score_sign(new_score)
+        if old_sign == new_sign:
+            return
+        source = self.by_sign[old_sign]
+        index = bisect.bisect_left(source, position)
+        if index < len(source) and source[index] == position:
+            del source[index]
+        bisect.insort(self.by_sign[new_sign], position)
+
+    def _groups(self, status: Optional[str]) -> Optional[List[List[int]]]:
+        if status == "toReview":
+            return [self.by_sign[-1]]
+        if status == "success":
+            return [self.by_sign[1]]
+        if status == "new":
+            return [self.by_sign[0]]
+        if status == "reviewed":
+            return [self.by_sign[-1], self.by_sign[1]]
+        return None
+
+    def count(self, status: Optional[str], total: int) -> int:
+        groups = self._groups(status)
+        if groups is None:
+            return total
+        return sum(len(group) for group in groups)
+
+    def positions(self, status: Optional[str], start: int, total: int) -> Iterator[int]:
+        """Yield positions ``>= start`` matching ``status`` in deck order."""
+        groups = self._groups(status)
+        if groups is None:
+            return iter(range(start, total))
+        return heapq.merge(*(group[bisect.bisect_left(group, start):] for group in groups))
+
+
+class _Shuffle:
+    """A random permutation of ``range(size)`` computed one index at a time.
+
+    A four-round Feistel network over the smallest even number of bits that
+    covers ``size``, walked until it lands inside the range. Costs a handful of
+    integers instead of a shuffled list of every position, and can be inverted
+    to tell where a position falls in the order.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size: int, rng: random.Random) -> None:
+        self.size = size
+        self._half = (max(2, (size - 1).bit_length()) + 1) // 2
+        self._mask = (1 << self._half) - 1
+        self._keys = [rng.getrandbits(64) for _ in range(self.ROUNDS)]
+
+    def _mix(self, value: int, key: int) -> int:
+        value = ((value ^ key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        return (value ^ (value >> 29)) & self._mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half, value & self._mask
+        for key in self._keys:
+            left, right = right, left ^ self._mix(right, key)
+        return (left << self._half) | right
+
+    def _decrypt(self, value: int) -> int:
+        left, right = value >> self._half, value & self._mask
+        for key in reversed(self._keys):
+            left, right = right ^ self._mix(left, key), left
+        return (left << self._half) | right
+
+    def __getitem__(self, index: int) -> int:
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+    def index(self, position: int) -> int:
+        value = self._decrypt(position)
+        while value >= self.size:
+            value = self._decrypt(value)
+        return value
+
+
+class DeckScheduler:
+    """Chooses the next card to study in one deck for one study session.
+
+    Follows the same rules as the study session in the client: every card once
+    in random order, then rounds over the cards with a negative score until none
+    are left. Negative cards live in a heap keyed by ``(round, score,
+    last_seen)`` so every negative card is shown once per round, weakest first,
+    and a card answered wrong again is not shown again before the others. Heap
+    entries are invalidated lazily.
+
+    Scores and the negative positions are read from the deck's cards and
+    :class:`CardIndex`, which every session shares. A session only keeps its
+    round state: the first pass is a :class:`_Shuffle` plus the number of cards
+    already shown, and the heap is built from the negative cards when the pass
+    ends, so its size follows the cards to review rather than the deck.
+    """
+
+    def __init__(self, cards: List[Dict[str, Any]], index: CardIndex, rng: Optional[random.Random] = None) -> None:
+        self._cards = cards
+        self._index = index
+        self._rng = rng or random.Random()
+        self.last_used = 0.0
+        self.restart()
+
+    @property
+    def unseen_count(self) -> int:
+        return len(self._cards) - self.step if self._in_pass else 0
+
+    def restart(self) -> None:
+        self._order = _Shuffle(len(self._cards), self._rng)
+        # Rounds as the client shows them: 1 is the pass over every card.
+        self.round = 1
+        self.step = 0
+        self.round_size = len(self._cards)
+        self._in_pass = True
+        self._round = 0
+        self._clock = len(self._cards)
+        self._due: Dict[int, int] = {}
+        self._last_seen: Dict[int, int] = {}
+        self._heap: Optional[List[Tuple[int, int, int, int]]] = None
+
+    def _score(self, position: int) -> int:
+        return _normalise_score(self._cards[position].get("aciertos", 0))
+
+    def _seen_at(self, position: int) -> int:
+        # Until a card is shown in a round, its turn in the first pass stands in.
+        seen = self._last_seen.get(position)
+        return seen if seen is not None else self._order.index(position) + 1
+
+    def _collect_negatives(self) -> None:
+        self._heap = [(0, self._score(position), self._seen_at(position), position) for position in self._index.by_sign[-1]]
+        heapq.heapify(self._heap)
+
+    def _push(self, position: int) -> None:
+        assert self._heap is not None
+        score = self._score(position)
+        if score >= 0:
+            return
+        heapq.heappush(self._heap, (self._due.get(position, 0), score, self._seen_at(position), position))
+        if len(self._heap) > 4 * len(self._index.by_sign[-1]) + 64:
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+
+    def _is_current(self, entry: Tuple[int, int, int, int]) -> bool:
+        due, score, seen, position = entry
+        return (
+            score < 0
+            and due == self._due.get(position, 0)
+            and score == self._score(position)
+            and seen == self._seen_at(position)
+        )
+
+    def update_score(self, position: int, score: int) -> None:
+        if self._heap is None or score >= 0:
+            return
+        # A card that turns negative joins the current round instead of jumping ahead of it.
+        self._due[position] = max(self._due.get(position, 0), self._round)
+        self._push(position)
+
+    def next(self) -> Optional[int]:
+        if self._in_pass and self.step < len(self._cards):
+            position = self._order[self.step]
+            self.step += 1
+            return position
+        if self._heap is None:
+            self._collect_negatives()
+        assert self._heap is not None
+        while self._heap:
+            due, _, _, position = entry = heapq.heappop(self._heap)
+            if not self._is_current(entry):
+                continue
+            if self._in_pass or due > self._round:
+                self._in_pass = False
+                self._round = max(self._round, due)
+                self.round += 1
+                self.step = 0
+                self.round_size = len(self._index.by_sign[-1])
+            self._due[position] = due + 1
+            self.step += 1
+            self.round_size = max(self.round_size, self.step)
+            self._clock += 1
+            self._last_seen[position] = self._clock
+            self._push(position)
+            return position
+        return None
+
+
+_SEARCH_TOKEN_RE = re.compile(r"\w+")
+# Combining diacritical marks left behind by NFKD ("ü" -> "u" + U+0308).
+_COMBINING_RE = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+
+
+def fold_text(text: str) -> str:
+    """Lower-case ``text`` and strip accents and umlauts ("Schön" -> "schon")."""
+    folded = text.casefold()
+    if folded.isascii():
+        return folded
+    return _COMBINING_RE.sub("", unicodedata.normalize("NFKD", folded))
+
+
+def search_terms(text: str) -> List[str]:
+    return _SEARCH_TOKEN_RE.findall(fold_text(text))
+
+
+def _card_text(card: Dict[str, Any]) -> str:
+    values = []
+    for value in card.get("contenido", {}).values():
+        if isinstance(value, str):
+            values.append(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values.append(str(value))
+    return " ".join(values)
+
+
+def deck_search_terms(cards: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Map every term in the cards' contenido values to the positions holding it."""
+    terms: Dict[str, List[int]] = {}
+    for position, card in enumerate(cards):
+        for term in set(search_terms(_card_text(card))):
+            terms.setdefault(term, []).append(position)
+    return terms
+
+
+class SearchIndex:
+    """Inverted index from folded terms to the cards whose contenido contains them.
+
+    Cards are numbered consecutively deck by deck, so every deck owns a
+    contiguous range of document numbers and posting lists stay sorted as decks
+    are appended. Removing a deck only forgets its range; the postings are
+    rebuilt once forgotten documents outnumber live ones. The sorted vocabulary
+    used for prefix lookups is rebuilt lazily after new terms appear.
+
+    Tokenising is the expensive part, so callers may compute
+    :func:`deck_search_terms` beforehand, outside any lock.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._postings: Dict[str, array] = {}
+        self._vocabulary: Optional[List[str]] = []
+        self._decks: Dict[str, Dict[str, Any]] = {}
+        self._slots: Dict[str, int] = {}
+        self._starts: List[int] = []
+        self._owners: List[Optional[str]] = []
+        self._next = 0
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return self._next - self._dead
+
+    def reset(self, decks: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._rebuild(decks)
+
+    def add(self, deck: Dict[str, Any], terms: Optional[Dict[str, List[int]]] = None) -> None:
+        """Index ``deck``, replacing any deck indexed under the same id."""
+        if terms is None:
+            terms = deck_search_terms(deck.get("cards", []))
+        with self._lock:
+            self._forget(deck["id"])
+            self._add(deck, terms)
+            self._maybe_compact()
+
+    def remove(self, deck_id: str) -> None:
+        with self._lock:
+            self._forget(deck_id)
+            self._maybe_compact()
+
+    def _rebuild(self, decks: Iterable[Dict[str, Any]]) -> None:
+        self._postings = {}
+        self._vocabulary = None
+        self._decks = {}
+        self._slots = {}
+        self._starts = []
+        self._owners = []
+        self._next = 0
+        self._dead = 0
+        for deck in decks:
+            self._add(deck, deck_search_terms(deck.get("cards", [])))
+
+    def _add(self, deck: Dict[str, Any], terms: Dict[str, List[int]]) -> None:
+        start = self._next
+        self._decks[deck["id"]] = deck
+        self._slots[deck["id"]] = len(self._owners)
+        self._starts.append(start)
+        self._owners.append(deck["id"])
+        self._next += len(deck.get("cards", []))
+        for term, positions in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = array("I")
+                self._vocabulary = None
+            postings.extend([start + position for position in positions])
+
+    def _forget(self, deck_id: str) -> None:
+        slot = self._slots.pop(deck_id, None)
+        if slot is None:
+            return
+        del self._decks[deck_id]
+        self._owners[slot] = None
+        stop = self._starts[slot + 1] if slot + 1 < len(self._starts) else self._next
+        self._dead += stop - self._starts[slot]
+
+    def _maybe_compact(self) -> None:
+        if self._dead > max(SEARCH_COMPACT_MIN, len(self)):
+            self._rebuild(list(self._decks.values()))
+
+    def _locate(self, document: int) -> Optional[Tuple[str, int]]:
+        slot = bisect.bisect_right(self._starts, document) - 1
+        owner = self._owners[slot]
+        if owner is None:
+            return None
+        return owner, document - self._starts[slot]
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        vocabulary = self._vocabulary
+        return vocabulary[bisect.bisect_left(vocabulary, prefix) : bisect.bisect_left(vocabulary, upper)]
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> Tuple[List[Tuple[str, int]], bool]:
+        """Return up to ``limit`` ``(deck id, card position)`` matches and whether there are more.
+
+        Every term of ``query`` must appear in the card. The last term also
+        matches longer words unless the query ends in whitespace, so results
+        follow the user while they type. Matches driven by a prefix come
+        grouped by completed word in alphabetical order ("dank" before
+        "danke"), otherwise in deck order.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return [], False
+        prefix = None if query[-1].isspace() else terms.pop()
+        with self._lock:
+            exact: List[array] = []
+            for term in dict.fromkeys(terms):
+                postings = self._postings.get(term)
+                if postings is None:
+                    return [], False
+                exact.append(postings)
+            exact.sort(key=len)
+
+            # Drive the scan with the most selective term; the others are
+            # membership checks (bisect for exact terms, re-reading the card
+            # for the prefix, which would otherwise need every completion).
+            completions: List[str] = []
+            if prefix is not None:
+                completions = self._prefix_terms(prefix)
+                if not completions:
+                    return [], False
+                budget = len(exact[0]) if exact else None
+                cost = 0
+                for term in completions:
+                    cost += len(self._postings[term])
+                    if budget is not None and cost >= budget:
+                        break
+                prefix_drives = budget is None or cost < budget
+            else:
+                prefix_drives = False
+
+            if prefix_drives:
+                candidates: Iterable[int] = self._iter_completions(completions)
+                checks = exact
+            else:
+                candidates = exact[0]
+                checks = exact[1:]
+
+            matches: List[Tuple[str, int]] = []
+            for document in candidates:
+                if not all(_sorted_contains(postings, document) for postings in checks):
+                    continue
+                located = self._locate(document)
+                if located is None:
+                    continue
+                if prefix is not None and not prefix_drives:
+                    card = self._decks[located[0]]["cards"][located[1]]
+                    if not any(term.startswith(prefix) for term in search_terms(_card_text(card))):
+                        continue
+                if len(matches) == limit:
+                    return matches, True
+                matches.append(located)
+            return matches, False
+
+    def _iter_completions(self, completions: List[str]) -> Iterator[int]:
+        seen = set()
+        for term in completions:
+            for document in self._postings[term]:
+                if document not in seen:
+                    seen.add(document)
+                    yield document
+
+
+def _sorted_contains(values: array, value: int) -> bool:
+    index = bisect.bisect_left(values, value)
+    return index < len(values) and values[index] == value
+
+
+class DeckStore:
+    """Process-wide in-memory copy of the database with write-behind persistence.
+
+    The database is read once by :meth:`load`; afterwards every request is served
+    from memory and persistence is delegated to a storage backend.
+
+    With the JSON backend, mutations only mark the store as dirty and a background
+    thread writes the whole database back every ``flush_interval`` seconds, or as
+    soon as ``batch_size`` mutations have accumulated. :meth:`close` always
+    flushes. Card reviews do not dirty the store: they are appended to a
+    :class:`ReviewJournal` and only compacted into db.json once the journal holds
+    ``compact_threshold`` records, or together with the next full write.
+
+    Backends with point updates (SQLite) persist each mutation right away as a
+    small transaction instead.
+
+    Locking: ``_lock`` guards the deck list and id map and is only held briefly.
+    Each deck additionally has its own lock that serialises read-modify-write
+    cycles on its cards, so reviews on different decks do not contend. Snapshots
+    take ``_lock`` and then every deck lock, in that order, so no review can slip
+    between the snapshot and the journal rotation.
+
+    Every deck also has cached :class:`DeckStats` that reviews update in O(1), so
+    listing decks never walks their cards; :meth:`verify_stats` recomputes them
+    from scratch. Decks are found through ``_by_id`` and cards through each
+    deck's :class:`CardIndex`, so lookups never scan.
+
+    Mutations stamp the deck with a new revision from a process-wide counter and
+    drop its cached JSON encoding, which :meth:`encoded_deck` and
+    :meth:`encoded_summaries` otherwise reuse together with a strong ETag. The
+    same revisions let :meth:`backup` hand only the decks that changed since the
+    previous snapshot to the :class:`SnapshotArchive`.
+
+    Card contents are also kept in a :class:`SearchIndex`, updated whenever decks
+    are added, removed or replaced, which serves :meth:`search`.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[Storage] = None,
+        flush_interval: float = FLUSH_INTERVAL,
+        batch_size: int = FLUSH_BATCH_SIZE,
+        compact_threshold: int = JOURNAL_COMPACT_THRESHOLD,
+        archive: Optional[SnapshotArchive] = None,
+    ) -> None:
+        self.storage = storage if storage is not None else get_storage()
+        self.archive = archive if archive is not None else SnapshotArchive(BACKUP_DIR)
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.compact_threshold = max(1, compact_threshold)
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._decks: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._deck_locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, DeckStats] = {}
+        self._indexes: Dict[str, CardIndex] = {}
+        self._search = SearchIndex()
+        self._sessions_lock = threading.Lock()
+        self._sessions: "OrderedDict[Tuple[str, str], DeckScheduler]" = OrderedDict()
+        self._schedulers: Dict[str, Dict[str, DeckScheduler]] = {}
+        self._idempotency_lock = threading.Lock()
+        self._idempotency: "OrderedDict[Tuple[str, Optional[str]], Dict[str, Any]]" = OrderedDict()
+        self._epoch = uuid.uuid4().hex[:8]
+        self._counter = itertools.count(1)
+        self._generation = 0
+        self._revisions: Dict[str, int] = {}
+        self._encoded: Dict[str, Tuple[int, bytes]] = {}
+        self._encoded_listing: Optional[Tuple[int, bytes]] = None
+        self._archived: Dict[str, Tuple[int, str]] = {}
+        self._archived_generation = 0
+        self._pending = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Lifecycle -------------------------------------------------------
+    def load(self) -> None:
+        with get_metrics().time_phase("storage_read"):
+            decks = self.storage.read().get("decks", [])
+        with self._lock:
+            self._decks = decks
+            self._by_id = {deck["id"]: deck for deck in decks}
+            self._deck_locks = {deck["id"]: threading.Lock() for deck in decks}
+            self._stats = {deck["id"]: DeckStats.from_deck(deck) for deck in decks}
+            self._indexes = {deck["id"]: CardIndex(deck.get("cards", [])) for deck in decks}
+            self._search.reset(decks)
+            self._drop_sessions(None)
+            self._revisions = {}
+            self._encoded = {}
+            self._touch(None)
+            self._archived = {}
+            # Without any snapshot yet, the loaded data itself is worth archiving.
+            self._archived_generation = self._generation if self.archive.latest() else 0
+            self._pending = 0
+            self.storage.open()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._flush_loop, name="deck-store-flush", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(force=True)
+        self.backup(force=True)
+        with self._lock:
+            self.storage.close()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
             try:
-                old.unlink()
-            except OSError:
+                with self._lock:
+                    self.storage.sync()
+                self.flush()
+            except STORAGE_ERRORS as exc:  # pragma: no cover - keep the writer alive
+                sys.stderr.write(f"No se pudo guardar la base de datos: {exc}\n")
+            try:
+                self.backup()
+            except OSError as exc:  # pragma: no cover - retried on the next tick
+                sys.stderr.write(f"No se pudo crear la copia de seguridad: {exc}\n")
+            with self._sessions_lock:
+                self._expire_sessions(time.monotonic())
+
+    # --- Persistence -----------------------------------------------------
+    def mark_dirty(self) -> None:
+        with self._lock:
+            self._pending += 1
+            pending = self._pending
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def flush(self, force: bool = False) -> bool:
+        """Write the in-memory state to the backend if anything requires it.
+
+        Journalled reviews alone only trigger a write once the journal reaches
+        ``compact_threshold`` records, unless ``force`` is set.
+        """
+        with self._flush_lock:
+            with self._lock:
+                backlog = self.storage.backlog
+                compact = backlog >= self.compact_threshold or (force and backlog > 0)
+                if not self._pending and not compact:
+                    return False
+                # Serialise while holding every lock so the snapshot is consistent,
+                # but do the slow file I/O without blocking request threads.
+                with ExitStack() as stack:
+                    for deck_id in sorted(self._deck_locks):
+                        stack.enter_context(self._deck_locks[deck_id])
+                    with get_metrics().time_phase("storage_serialize"):
+                        snapshot = self.storage.snapshot({"decks": self._decks})
+                pending = self._pending
+                self._pending = 0
+            try:
+                with get_metrics().time_phase("storage_write"):
+                    self.storage.commit(snapshot)  # type: ignore[arg-type]
+            except STORAGE_ERRORS:
+                with self._lock:
+                    self._pending += pending
+                raise
+        return True
+
+    def backup(self, force: bool = False) -> Optional[str]:
+        """Snapshot the decks into the archive when its policy says so.
+
+        ``force`` takes a snapshot whenever anything changed since the last one.
+        Decks whose revision is unchanged are referenced by their previous
+        object instead of being encoded again. Returns the snapshot id, if any.
+        """
+        archive = self.archive
+        with self._lock:
+            generation = self._generation
+            changes = generation - self._archived_generation
+            if not (archive.due(changes) or (force and changes > 0)):
+                return None
+            decks: List[Tuple[Dict[str, Any], Union[bytes, str]]] = []
+            revisions: List[Tuple[str, int]] = []
+            stale: List[Tuple[int, Dict[str, Any]]] = []
+            # Only collect references under the locks; encoding a large deck here
+            # would hold up every review until the whole snapshot is done.
+            with ExitStack() as stack:
+                for deck_id in sorted(self._deck_locks):
+                    stack.enter_context(self._deck_locks[deck_id])
+                for deck in self._decks:
+                    deck_id = deck["id"]
+                    revision = self._revisions.get(deck_id, 0)
+                    meta = {"id": deck_id, "name": deck["name"], "cards": len(deck.get("cards", []))}
+                    archived = self._archived.get(deck_id)
+                    encoded = self._encoded.get(deck_id)
+                    if archived is not None and archived[0] == revision and archive.has(archived[1]):
+                        decks.append((meta, archived[1]))
+                    elif encoded is not None and encoded[0] == revision:
+                        decks.append((meta, encoded[1]))
+                    else:
+                        stale.append((len(decks), deck))
+                        decks.append((meta, b""))
+                    revisions.append((deck_id, revision))
+        for slot, deck in stale:
+            deck_id, revision = revisions[slot]
+            body = json.dumps(deck, ensure_ascii=False).encode("utf-8")
+            with self._lock:
+                deck_lock = self._deck_locks.get(deck_id) if self._by_id.get(deck_id) is deck else None
+            if deck_lock is not None:
+                with deck_lock:
+                    current = self._revisions.get(deck_id, 0)
+                    if current != revision:
+                        # Reviewed while it was being encoded: encode it again so
+                        # the copy is consistent, now under its lock.
+                        body = json.dumps(deck, ensure_ascii=False).encode("utf-8")
+                        revisions[slot] = (deck_id, current)
+                    self._encoded[deck_id] = (current, body)
+            decks[slot] = (decks[slot][0], body)
+        with get_metrics().time_phase("backup"):
+            snapshot_id, digests = archive.take(decks)
+        with self._lock:
+            self._archived = {deck_id: (revision, digest) for (deck_id, revision), digest in zip(revisions, digests)}
+            self._archived_generation = max(self._archived_generation, generation)
+        return snapshot_id
+
+    # --- Queries ---------------------------------------------------------
+    def list_decks(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._decks)
+
+    def get_deck(self, deck_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._by_id.get(deck_id)
+
+    def get_card(self, deck_id: str, card_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of one card, found through the deck's :class:`CardIndex`."""
+        with self._lock:
+            deck = self._by_id.get(deck_id)
+            deck_lock = self._deck_locks.get(deck_id)
+            index = self._indexes.get(deck_id)
+        if deck is None or deck_lock is None or index is None:
+            return None
+        with deck_lock:
+            position = index.position(card_id)
+            return dict(deck["cards"][position]) if position is not None else None
+
+    def summary(self, deck_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            deck = self._by_id.get(deck_id)
+            deck_lock = self._deck_locks.get(deck_id)
+            stats = self._stats.get(deck_id)
+        if deck is None or deck_lock is None or stats is None:
+            return None
+        with deck_lock:
+            return {"id": deck["id"], "name": deck["name"], **stats.as_dict()}
+
+    def export_header(self, deck_id: str) -> Optional[Dict[str, Any]]:
+        """Name, card count and ``contenido`` keys (in first-seen order) of a deck.
+
+        Together with :meth:`export_cards` this lets an export stream a deck
+        without any caller holding, or receiving through a proxy, all of it.
+        """
+        with self._lock:
+            deck = self._by_id.get(deck_id)
+        if deck is None:
+            return None
+        # Reviews only change scores, so the keys can be read without the deck lock.
+        cards = deck.get("cards", [])
+        columns = list(dict.fromkeys(key for card in cards for key in card.get("contenido", {})))
+        return {"name": deck.get("name", ""), "count": len(cards), "columns": columns}
+
+    def export_cards(self, deck_id: str, start: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Copies of up to ``limit`` cards from position ``start``; ``None`` if the deck is gone."""
+        deck, deck_lock = self._locked_deck(deck_id)
+        if deck is None or deck_lock is None:
+            return None
+        with deck_lock:
+            return [
+                {"aciertos": card.get("aciertos", 0), "contenido": dict(card.get("contenido", {}))}
+                for card in deck.get("cards", [])[start : start + limit]
+            ]
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            decks = list(self._decks)
+        summaries = []
+        for deck in decks:
+            summary = self.summary(deck["id"])
+            if summary is not None:
+                summaries.append(summary)
+        return summaries
+
+    def _etag(self, revision: int) -> str:
+        return f'"{self._epoch}-{revision}"'
+
+    def _touch(self, deck_id: Optional[str]) -> None:
+        # Callers mutate first and touch afterwards, so a revision read before
+        # encoding can only ever label data that is at least that new.
+        revision = next(self._counter)
+        if deck_id is not None:
+            self._revisions[deck_id] = revision
+            self._encoded.pop(deck_id, None)
+        self._generation = revision
+        self._encoded_listing = None
+
+    def encoded_deck(self, deck_id: str) -> Optional[Tuple[str, bytes]]:
+        """Return ``(etag, body)`` for a deck, encoding it only if it changed."""
+        with self._lock:
+            deck = self._by_id.get(deck_id)
+            deck_lock = self._deck_locks.get(deck_id)
+        if deck is None or deck_lock is None:
+            return None
+        with deck_lock:
+            revision = self._revisions.get(deck_id, 0)
+            cached = self._encoded.get(deck_id)
+            if cached is None or cached[0] != revision:
+                cached = (revision, json.dumps(deck, ensure_ascii=False).encode("utf-8"))
+                self._encoded[deck_id] = cached
+        return self._etag(revision), cached[1]
+
+    def encoded_summaries(self) -> Tuple[str, bytes]:
+        """Return ``(etag, body)`` for the deck listing, encoding it only if anything changed."""
+        generation = self._generation
+        cached = self._encoded_listing
+        if cached is None or cached[0] != generation:
+            body = json.dumps({"decks": self.summaries()}, ensure_ascii=False).encode("utf-8")
+            cached = (generation, body)
+            self._encoded_listing = cached
+        return self._etag(generation), cached[1]
+
+    def page_cards(
+        self,
+        deck_id: str,
+        status: Optional[str] = None,
+        cursor: int = 0,
+        limit: int = CARD_PAGE_SIZE,
+        fields: Optional[List[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return one page of a deck's cards, optionally filtered and projected.
+
+        ``cursor`` is the deck position to resume from; the returned
+        ``nextCursor`` is ``None`` on the last page.
+        """
+        with self._lock:
+            deck = self._by_id.get(deck_id)
+            deck_lock = self._deck_locks.get(deck_id)
+            index = self._indexes.get(deck_id)
+        if deck is None or deck_lock is None or index is None:
+            return None
+        with deck_lock:
+            cards = deck.get("cards", [])
+            page: List[Dict[str, Any]] = []
+            next_cursor: Optional[str] = None
+            for position in index.positions(status, cursor, len(cards)):
+                if len(page) == limit:
+                    next_cursor = str(position)
+                    break
+                card = cards[position]
+                contenido = card.get("contenido", {})
+                if fields is not None:
+                    contenido = {key: contenido[key] for key in fields if key in contenido}
+                page.append({"id": card["id"], "aciertos": card.get("aciertos", 0), "contenido": contenido})
+            return {
+                "deckId": deck_id,
+                "total": index.count(status, len(cards)),
+                "cards": page,
+                "nextCursor": next_cursor,
+            }
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> Dict[str, Any]:
+        """Find cards whose contenido matches ``query`` across every deck."""
+        matches, has_more = self._search.search(query, limit)
+        results: List[Dict[str, Any]] = []
+        for deck_id, position in matches:
+            with self._lock:
+                deck = self._by_id.get(deck_id)
+                deck_lock = self._deck_locks.get(deck_id)
+            if deck is None or deck_lock is None:
                 continue
+            with deck_lock:
+                cards = deck.get("cards", [])
+                if position >= len(cards):
+                    continue
+                card = cards[position]
+                results.append(
+                    {
+                        "deckId": deck_id,
+                        "deckName": deck.get("name", ""),
+                        "card": {"id": card["id"], "aciertos": card.get("aciertos", 0), "contenido": card.get("contenido", {})},
+                    }
+                )
+        return {"query": query, "results": results, "hasMore": has_more}
 
+    def next_card(self, deck_id: str, session: str = "", restart: bool = False) -> Optional[Dict[str, Any]]:
+        """Pick the next card to study in ``session``; ``None`` if the deck does not exist.
 
-def write_database(data: Dict[str, Any]) -> None:
-    ensure_database()
-    tmp_path = DB_PATH.with_suffix(".tmp")
-    with tmp_path.open("w", encoding="utf-8") as fh:
-        json.dump(data, fh, ensure_ascii=False, indent=2)
-    if DB_PATH.exists():
-        backup_database()
-    tmp_path.replace(DB_PATH)
+        Each study session gets its own :class:`DeckScheduler`, created on first
+        use and kept in step with every review of the deck.
+        """
+        with self._lock:
+            deck = self._by_id.get(deck_id)
+            deck_lock = self._deck_locks.get(deck_id)
+            index = self._indexes.get(deck_id)
+        if deck is None or deck_lock is None or index is None:
+            return None
+        with deck_lock:
+            now = time.monotonic()
+            with self._sessions_lock:
+                scheduler = self._sessions.get((deck_id, session))
+                if scheduler is None:
+                    scheduler = DeckScheduler(deck.get("cards", []), index)
+                    self._sessions[(deck_id, session)] = scheduler
+                    self._schedulers.setdefault(deck_id, {})[session] = scheduler
+                else:
+                    self._sessions.move_to_end((deck_id, session))
+                    if restart:
+                        scheduler.restart()
+                scheduler.last_used = now
+                self._expire_sessions(now)
+            position = scheduler.next()
+            card = dict(deck["cards"][position]) if position is not None else None
+            return {
+                "card": card,
+                "done": card is None,
+                "round": scheduler.round,
+                "step": scheduler.step,
+                "roundSize": scheduler.round_size,
+                "unseenCount": scheduler.unseen_count,
+                "toReviewCount": self._stats[deck_id].to_review_count,
+            }
 
+    def _expire_sessions(self, now: float) -> None:
+        """Forget idle and least recently used study sessions; the caller holds ``_sessions_lock``.
 
-def list_decks() -> List[Dict[str, Any]]:
-    db = read_database()
-    return db.get("decks", [])
+        Sessions idle for more than ``STUDY_SESSION_TTL`` seconds go first, then the
+        oldest ones until at most ``STUDY_SESSIONS_MAX`` are left.
+        """
+        while self._sessions:
+            (deck_id, session), scheduler = next(iter(self._sessions.items()))
+            if len(self._sessions) <= STUDY_SESSIONS_MAX and now - scheduler.last_used <= STUDY_SESSION_TTL:
+                break
+            del self._sessions[(deck_id, session)]
+            sessions = self._schedulers.get(deck_id, {})
+            sessions.pop(session, None)
+            if not sessions:
+                self._schedulers.pop(deck_id, None)
 
+    def _drop_sessions(self, deck_id: Optional[str]) -> None:
+        """Forget the study sessions of ``deck_id``, or of every deck when ``None``."""
+        with self._sessions_lock:
+            if deck_id is None:
+                self._sessions.clear()
+                self._schedulers = {}
+                return
+            for session in self._schedulers.pop(deck_id, {}):
+                self._sessions.pop((deck_id, session), None)
 
-def save_decks(decks: List[Dict[str, Any]]) -> None:
-    write_database({"decks": decks})
+    def verify_stats(self, rebuild: bool = True) -> List[str]:
+        """Recompute every deck's stats and return the ids whose cache was wrong.
 
+        With ``rebuild`` the stale entries are replaced by the fresh values.
+        """
+        with self._lock:
+            decks = list(self._decks)
+        mismatched = []
+        for deck in decks:
+            deck_lock = self._deck_locks.get(deck["id"])
+            if deck_lock is None:
+                continue
+            with deck_lock:
+                fresh = DeckStats.from_deck(deck)
+                if self._stats.get(deck["id"]) != fresh:
+                    mismatched.append(deck["id"])
+                    if rebuild:
+                        self._stats[deck["id"]] = fresh
+        return mismatched
 
-def find_deck(deck_id: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
-    decks = list_decks()
-    for deck in decks:
-        if deck["id"] == deck_id:
-            return deck, decks
-    return None, decks
+    # --- Mutations -------------------------------------------------------
+    def add_deck(self, deck: Dict[str, Any]) -> None:
+        self.add_decks([deck])
+
+    def add_decks(self, decks: List[Dict[str, Any]]) -> None:
+        """Add several decks with a single persistence write.
+
+        A deck whose id is already in the store replaces it in place, and within
+        ``decks`` the last deck with a given id wins, so ids stay unique.
+        """
+        if not decks:
+            return
+        decks = list({deck["id"]: deck for deck in decks}.values())
+        terms = [deck_search_terms(deck.get("cards", [])) for deck in decks]
+        with self._lock:
+            replaced = {deck["id"]: deck for deck in decks if deck["id"] in self._by_id}
+            with ExitStack() as stack:
+                for deck_id in sorted(replaced):
+                    stack.enter_context(self._deck_locks[deck_id])
+                if replaced:
+                    self._decks = [replaced.get(deck["id"], deck) for deck in self._decks]
+                for deck, deck_terms in zip(decks, terms):
+                    if deck["id"] in replaced:
+                        self._drop_sessions(deck["id"])
+                    else:
+                        self._decks.append(deck)
+                        self._deck_locks[deck["id"]] = threading.Lock()
+                    self._by_id[deck["id"]] = deck
+                    self._stats[deck["id"]] = DeckStats.from_deck(deck)
+                    self._indexes[deck["id"]] = CardIndex(deck.get("cards", []))
+                    self._search.add(deck, deck_terms)
+                    self._touch(deck["id"])
+                if self.storage.incremental:
+                    with get_metrics().time_phase("storage_write"):
+                        self.storage.insert_decks(decks)  # type: ignore[union-attr]
+                    return
+        self.mark_dirty()
+
+    def remove_deck(self, deck_id: str) -> bool:
+        with self._lock:
+            deck = self._by_id.get(deck_id)
+            if deck is None:
+                return False
+            with self._deck_locks[deck_id]:
+                del self._by_id[deck_id]
+                del self._deck_locks[deck_id]
+                self._stats.pop(deck_id, None)
+                self._indexes.pop(deck_id, None)
+                self._search.remove(deck_id)
+                self._drop_sessions(deck_id)
+                self._revisions.pop(deck_id, None)
+                self._encoded.pop(deck_id, None)
+                self._touch(None)
+                self._decks = [d for d in self._decks if d["id"] != deck_id]
+                if self.storage.incremental:
+                    with get_metrics().time_phase("storage_write"):
+                        self.storage.delete_deck(deck_id)  # type: ignore[union-attr]
+                    return True
+        self.mark_dirty()
+        return True
+
+    def replace_decks(self, decks: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._decks = list(decks)
+            self._by_id = {deck["id"]: deck for deck in self._decks}
+            self._deck_locks = {deck["id"]: self._deck_locks.get(deck["id"]) or threading.Lock() for deck in self._decks}
+            self._stats = {deck["id"]: DeckStats.from_deck(deck) for deck in self._decks}
+            self._indexes = {deck["id"]: CardIndex(deck.get("cards", [])) for deck in self._decks}
+            self._search.reset(self._decks)
+            self._drop_sessions(None)
+            self._encoded = {}
+            for deck in self._decks:
+                self._touch(deck["id"])
+            if self.storage.incremental:
+                with get_metrics().time_phase("storage_write"):
+                    self.storage.write({"decks": self._decks})
+                return
+        self.mark_dirty()
+
+    def _apply_deltas(self, deck_id: str, deck: Dict[str, Any], deltas: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """Apply ``(position, delta)`` pairs to a deck; the caller holds its lock.
+
+        Every cache is updated in step and the new scores are persisted with a
+        single storage call. Returns copies of the touched cards, in order of
+        first appearance.
+        """
+        stats = self._stats[deck_id]
+        index = self._indexes[deck_id]
+        with self._sessions_lock:
+            schedulers = list(self._schedulers.get(deck_id, {}).values())
+        touched: Dict[int, Dict[str, Any]] = {}
+        for position, delta in deltas:
+            card = deck["cards"][position]
+            old_score = _normalise_score(card.get("aciertos", 0))
+            card["aciertos"] = old_score + int(delta)
+            stats.update(old_score, card["aciertos"])
+            index.move(position, old_score, card["aciertos"])
+            for scheduler in schedulers:
+                scheduler.update_score(position, card["aciertos"])
+            touched[position] = card
+        self._touch(deck_id)
+        with get_metrics().time_phase("storage_journal"):
+            self.storage.record_reviews(deck_id, [(card["id"], card["aciertos"]) for card in touched.values()])
+        return [dict(card) for card in touched.values()]
+
+    def _locked_deck(self, deck_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[threading.Lock]]:
+        with self._lock:
+            return self._by_id.get(deck_id), self._deck_locks.get(deck_id)
+
+    def apply_review(self, deck_id: str, card_id: str, delta: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Add ``delta`` to a card's score and persist it.
+
+        Returns whether the deck exists and a copy of the updated card, which is
+        ``None`` when the card does not. Only these cross the process boundary
+        behind a :class:`StoreProxy`.
+        """
+        deck, deck_lock = self._locked_deck(deck_id)
+        if deck is None or deck_lock is None:
+            return False, None
+        with deck_lock:
+            if self._by_id.get(deck_id) is not deck:
+                # Deleted or replaced while we were waiting for the lock.
+                return False, None
+            position = self._indexes[deck_id].position(card_id)
+            if position is None:
+                return True, None
+            (updated,) = self._apply_deltas(deck_id, deck, [(position, delta)])
+        if self.storage.backlog >= self.compact_threshold:
+            self._wake.set()
+        return True, updated
+
+    def apply_reviews(
+        self,
+        deck_id: str,
+        reviews: List[Tuple[str, int]],
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Apply a batch of ``(card_id, delta)`` reviews atomically.
+
+        Either every review is applied, with one persistence write, or none is:
+        an unknown card raises :class:`KeyError` before anything changes.
+        Returns ``(result, replayed)``; ``result`` is ``None`` for an unknown
+        deck. A batch retried with the same ``idempotency_key`` is not applied
+        again: the first result is returned with ``replayed`` set.
+        """
+        deck, deck_lock = self._locked_deck(deck_id)
+        if deck is None or deck_lock is None:
+            return None, False
+        cache_key = (deck_id, idempotency_key)
+        with deck_lock:
+            if self._by_id.get(deck_id) is not deck:
+                return None, False
+            if idempotency_key is not None:
+                # Shared by every deck, so it needs its own lock on top of the deck's.
+                with self._idempotency_lock:
+                    cached = self._idempotency.get(cache_key)
+                    if cached is not None:
+                        self._idempotency.move_to_end(cache_key)
+                if cached is not None:
+                    return cached, True
+            positions = self._indexes[deck_id].by_id
+            missing = [card_id for card_id, _ in reviews if card_id not in positions]
+            if missing:
+                raise KeyError(missing[0])
+            cards = self._apply_deltas(deck_id, deck, [(positions[card_id], delta) for card_id, delta in reviews])
+            summary = {"id": deck["id"], "name": deck["name"], **self._stats[deck_id].as_dict()}
+            result = {"applied": len(reviews), "cards": cards, "deck": summary}
+            if idempotency_key is not None:
+                with self._idempotency_lock:
+                    self._idempotency[cache_key] = result
+                    while len(self._idempotency) > IDEMPOTENCY_CACHE_SIZE:
+                        self._idempotency.popitem(last=False)
+        if self.storage.backlog >= self.compact_threshold:
+            self._wake.set()
+        return result, False
+
+
+_store: Optional[DeckStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> DeckStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            store = DeckStore()
+            store.load()
+            _store = store
+        return _store
 
 
 def _normalise_score(value: Any) -> int:
@@ -93,39 +1940,35 @@ def _normalise_score(value: Any) -> int:
         return 0
 
 
-def calculate_pending_points(deck: Dict[str, Any]) -> int:
-    cards = deck.get("cards", [])
-    total = 0
-    for card in cards:
-        score = _normalise_score(card.get("aciertos", 0))
-        if score < 0:
-            total += -score
-    return total
+SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+# Clark-notation tags take ElementTree's C fast path in find()/findall(),
+# unlike "main:c" prefixed paths, which go through ElementPath on every call.
+_CELL_TAG = f"{{{SPREADSHEET_NS}}}c"
+_VALUE_TAG = f"{{{SPREADSHEET_NS}}}v"
+_INLINE_STRING_TAG = f"{{{SPREADSHEET_NS}}}is"
+_TEXT_TAG = f"{{{SPREADSHEET_NS}}}t"
+_INTEGER_RE = re.compile(r"-?\d+")
+_DECIMAL_RE = re.compile(r"-?\d+\.\d+")
+_COLUMN_DIGITS = "0123456789"
+_column_cache: Dict[str, int] = {}
+# Exports carry each card's score under this reserved key or column, and
+# imports read it back. The "@" keeps it apart from user fields such as a
+# plain "aciertos" column, which stays card content.
+SCORE_FIELD = "@aciertos"
 
 
-def calculate_card_progress(deck: Dict[str, Any]) -> Dict[str, int]:
-    cards = deck.get("cards", [])
-    reviewed = 0
-    success = 0
-    to_review = 0
-    for card in cards:
-        score = _normalise_score(card.get("aciertos", 0))
-        if score > 0:
-            success += 1
-            reviewed += 1
-        elif score < 0:
-            to_review += 1
-            reviewed += 1
-    return {
-        "reviewedCount": reviewed,
-        "successCount": success,
-        "toReviewCount": to_review,
-    }
+def _is_score(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
 
 
-SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
-REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
-DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+def _imported_score(value: Any) -> int:
+    if value in ("", None):
+        return 0
+    if not _is_score(value):
+        raise ValueError(f"«{SCORE_FIELD}» está reservado para la puntuación y debe ser un número entero")
+    return value
 
 
 def parse_json_cards(raw: bytes) -> List[Dict[str, Any]]:
@@ -141,10 +1984,11 @@ def parse_json_cards(raw: bytes) -> List[Dict[str, Any]]:
     for entry in payload:
         if not isinstance(entry, dict):
             raise ValueError("Cada tarjeta en el JSON debe ser un objeto con pares clave/valor")
+        score = _imported_score(entry.pop(SCORE_FIELD, None))
         cards.append(
             {
                 "id": str(uuid.uuid4()),
-                "aciertos": 0,
+                "aciertos": score,
                 "contenido": entry,
             }
         )
@@ -155,35 +1999,50 @@ def parse_json_cards(raw: bytes) -> List[Dict[str, Any]]:
 
 def _load_shared_strings(zf: zipfile.ZipFile) -> List[str]:
     try:
-        data = zf.read("xl/sharedStrings.xml")
+        source = zf.open("xl/sharedStrings.xml")
     except KeyError:
         return []
-    tree = ET.fromstring(data)
-    ns = {"main": SPREADSHEET_NS}
+    si_tag = f"{{{SPREADSHEET_NS}}}si"
+    t_tag = f"{{{SPREADSHEET_NS}}}t"
     strings: List[str] = []
-    for entry in tree.findall("main:si", ns):
-        parts = [node.text or "" for node in entry.findall(".//main:t", ns)]
-        strings.append("".join(parts))
+    with source:
+        try:
+            for _, elem in ET.iterparse(source, events=("end",)):
+                if elem.tag != si_tag:
+                    continue
+                strings.append("".join(node.text or "" for node in elem.iter(t_tag)))
+                elem.clear()
+        except ET.ParseError as exc:
+            raise ValueError("El archivo Excel (.xlsx) es inválido o está dañado") from exc
     return strings
 
 
-def _column_index(cell_ref: str) -> int:
-    letters = [ch for ch in cell_ref if ch.isalpha()]
-    if not letters:
-        return 0
+def _decode_column(letters: Iterable[str]) -> int:
     index = 0
     for ch in letters:
         index = index * 26 + (ord(ch.upper()) - ord("A") + 1)
-    return index - 1
+    return index - 1 if index else 0
+
+
+def _column_index(cell_ref: str) -> int:
+    letters = cell_ref.rstrip(_COLUMN_DIGITS)
+    index = _column_cache.get(letters)
+    if index is not None:
+        return index
+    if not letters.isalpha():
+        # Not a plain "AB12" reference: decode it like any other, but do not cache it.
+        return _decode_column(ch for ch in cell_ref if ch.isalpha())
+    index = _decode_column(letters)
+    if len(_column_cache) < 16384:
+        _column_cache[letters] = index
+    return index
 
 
 def _parse_cell_value(cell: ET.Element, shared_strings: List[str]) -> Any:
-    ns = {"main": SPREADSHEET_NS}
-    cell_type = cell.attrib.get("t")
+    cell_type = cell.get("t")
     if cell_type == "inlineStr":
-        parts = [node.text or "" for node in cell.findall("main:is//main:t", ns)]
-        return "".join(parts)
-    value_node = cell.find("main:v", ns)
+        return "".join(node.text or "" for inline in cell.findall(_INLINE_STRING_TAG) for node in inline.iter(_TEXT_TAG))
+    value_node = cell.find(_VALUE_TAG)
     if cell_type == "s":
         if value_node is None:
             return ""
@@ -195,21 +2054,23 @@ def _parse_cell_value(cell: ET.Element, shared_strings: List[str]) -> Any:
             return shared_strings[idx]
         return ""
     if cell_type == "b":
-        return "TRUE" if value_node is not None and value_node.text == "1" else "FALSE"
+        return value_node is not None and value_node.text == "1"
     if value_node is None:
         return ""
-    text = value_node.text or ""
+    text = value_node.text
+    if not text:
+        return ""
     stripped = text.strip()
     if stripped == "":
         return ""
-    if re.fullmatch(r"-?\d+", stripped):
+    if _INTEGER_RE.fullmatch(stripped):
         if stripped.startswith("0") and len(stripped) > 1:
             return stripped
         try:
             return int(stripped)
         except ValueError:
             return stripped
-    if re.fullmatch(r"-?\d+\.\d+", stripped):
+    if _DECIMAL_RE.fullmatch(stripped):
         try:
             return float(stripped)
         except ValueError:
@@ -226,117 +2087,251 @@ def _normalise_sheet_target(target: str) -> str:
     return cleaned
 
 
-def parse_xlsx_cards(raw: bytes) -> List[Dict[str, Any]]:
+def _open_workbook(source: Union[bytes, BinaryIO, Path]) -> zipfile.ZipFile:
     try:
-        zf = zipfile.ZipFile(BytesIO(raw))
+        return zipfile.ZipFile(BytesIO(source) if isinstance(source, bytes) else source)
     except zipfile.BadZipFile as exc:
         raise ValueError("El archivo Excel (.xlsx) es inválido o está dañado") from exc
 
-    with zf:
-        try:
-            workbook_data = zf.read("xl/workbook.xml")
-        except KeyError as exc:
-            raise ValueError("El archivo Excel no contiene un libro de trabajo válido") from exc
 
+def _workbook_sheets(zf: zipfile.ZipFile) -> List[Tuple[str, Optional[str]]]:
+    """Return ``(name, path)`` for every worksheet in workbook order.
+
+    ``path`` is ``None`` when the workbook relationships do not resolve it.
+    """
+    try:
+        workbook_data = zf.read("xl/workbook.xml")
+    except KeyError as exc:
+        raise ValueError("El archivo Excel no contiene un libro de trabajo válido") from exc
+
+    try:
         workbook = ET.fromstring(workbook_data)
-        ns = {"main": SPREADSHEET_NS, "r": DOC_REL_NS}
-        sheet = workbook.find("main:sheets/main:sheet", ns)
-        if sheet is None:
-            raise ValueError("El archivo Excel no contiene hojas de cálculo")
-        rel_id = sheet.attrib.get(f"{{{DOC_REL_NS}}}id")
-        if not rel_id:
-            raise ValueError("No se pudo determinar la hoja principal del Excel")
+    except ET.ParseError as exc:
+        raise ValueError("El archivo Excel (.xlsx) es inválido o está dañado") from exc
+    ns = {"main": SPREADSHEET_NS, "r": DOC_REL_NS}
+    sheets = workbook.findall("main:sheets/main:sheet", ns)
+    if not sheets:
+        raise ValueError("El archivo Excel no contiene hojas de cálculo")
 
-        try:
-            rels_data = zf.read("xl/_rels/workbook.xml.rels")
-        except KeyError as exc:
-            raise ValueError("El archivo Excel no contiene relaciones de libro válidas") from exc
+    try:
+        rels_data = zf.read("xl/_rels/workbook.xml.rels")
+    except KeyError as exc:
+        raise ValueError("El archivo Excel no contiene relaciones de libro válidas") from exc
 
+    try:
         rels = ET.fromstring(rels_data)
-        rels_ns = {"rel": REL_NS}
-        sheet_target: Optional[str] = None
-        for rel in rels.findall("rel:Relationship", rels_ns):
-            if rel.attrib.get("Id") == rel_id:
-                sheet_target = rel.attrib.get("Target")
-                break
-        if not sheet_target:
-            raise ValueError("No se pudo encontrar la hoja de cálculo referenciada en el Excel")
+    except ET.ParseError as exc:
+        raise ValueError("El archivo Excel (.xlsx) es inválido o está dañado") from exc
+    targets = {
+        rel.attrib.get("Id"): rel.attrib.get("Target") for rel in rels.findall("rel:Relationship", {"rel": REL_NS})
+    }
+    result: List[Tuple[str, Optional[str]]] = []
+    for sheet in sheets:
+        target = targets.get(sheet.attrib.get(f"{{{DOC_REL_NS}}}id"))
+        result.append((sheet.attrib.get("name", ""), _normalise_sheet_target(target) if target else None))
+    return result
+
+
+def _first_sheet_path(zf: zipfile.ZipFile) -> str:
+    name, path = _workbook_sheets(zf)[0]
+    if not path:
+        raise ValueError("No se pudo encontrar la hoja de cálculo referenciada en el Excel")
+    return path
+
+
+def _iter_sheet_rows(zf: zipfile.ZipFile, sheet_path: str) -> Iterator[ET.Element]:
+    """Yield the ``<row>`` elements of a worksheet one at a time.
 
-        sheet_path = _normalise_sheet_target(sheet_target)
+    Each row is detached from ``<sheetData>`` once the caller is done with it, so
+    memory stays flat regardless of the number of rows.
+    """
+    try:
+        source = zf.open(sheet_path)
+    except KeyError as exc:
+        raise ValueError("No se pudo leer la hoja de cálculo principal del Excel") from exc
+
+    sheet_data_tag = f"{{{SPREADSHEET_NS}}}sheetData"
+    row_tag = f"{{{SPREADSHEET_NS}}}row"
+    sheet_data: Optional[ET.Element] = None
+    with source:
         try:
-            sheet_data = zf.read(sheet_path)
-        except KeyError as exc:
-            raise ValueError("No se pudo leer la hoja de cálculo principal del Excel") from exc
-
-        sheet_tree = ET.fromstring(sheet_data)
-        sheet_ns = {"main": SPREADSHEET_NS}
-        rows = sheet_tree.findall("main:sheetData/main:row", sheet_ns)
-        if not rows:
-            raise ValueError("El archivo Excel no contiene filas de datos")
-
-        shared_strings = _load_shared_strings(zf)
-        header_map: Dict[int, str] = {}
-        header_counts: Dict[str, int] = {}
-
-        def allocate_header_name(base: str, col_index: int) -> str:
-            name_base = base.strip() if isinstance(base, str) else ""
-            if not name_base:
-                name_base = f"Columna {col_index + 1}"
-            count = header_counts.get(name_base, 0)
-            header_counts[name_base] = count + 1
-            if count == 0:
-                return name_base
-            return f"{name_base} ({count + 1})"
-
-        def register_header(col_index: int, base_name: Any) -> None:
-            header_map[col_index] = allocate_header_name(str(base_name) if base_name is not None else "", col_index)
-
-        def ensure_header(col_index: int) -> str:
-            if col_index not in header_map:
-                header_map[col_index] = allocate_header_name("", col_index)
-            return header_map[col_index]
-
-        cards: List[Dict[str, Any]] = []
-
-        for idx, row in enumerate(rows):
-            cells: Dict[int, Any] = {}
-            for cell in row.findall("main:c", sheet_ns):
-                ref = cell.attrib.get("r", "")
-                column = _column_index(ref)
-                cells[column] = _parse_cell_value(cell, shared_strings)
-
-            if idx == 0:
-                if not cells:
-                    raise ValueError("La primera fila del Excel debe contener encabezados")
-                for col in sorted(cells):
-                    register_header(col, cells[col])
-                continue
+            for event, elem in ET.iterparse(source, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == sheet_data_tag:
+                        sheet_data = elem
+                    continue
+                if elem.tag != row_tag or sheet_data is None:
+                    continue
+                yield elem
+                sheet_data.remove(elem)
+        except ET.ParseError as exc:
+            raise ValueError("El archivo Excel (.xlsx) es inválido o está dañado") from exc
+
+
+def iter_xlsx_cards(
+    source: Union[bytes, BinaryIO], columns: Optional[Collection[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """Stream the cards of the first worksheet, one row at a time.
+
+    ``source`` may be the raw workbook or a seekable binary file. ``columns``
+    keeps only the given headers. Validation errors are raised as
+    :class:`ValueError` while iterating.
+    """
+    zf = _open_workbook(source)
+    with zf:
+        sheet_path = _first_sheet_path(zf)
+        if sheet_path not in zf.NameToInfo:
+            raise ValueError("No se pudo leer la hoja de cálculo principal del Excel")
+        yield from _iter_sheet_cards(zf, sheet_path, _load_shared_strings(zf), columns)
+
+
+def _iter_sheet_cards(
+    zf: zipfile.ZipFile,
+    sheet_path: str,
+    shared_strings: List[str],
+    columns: Optional[Collection[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Stream the cards of one worksheet given the workbook's shared strings."""
+    header_map: Dict[int, str] = {}
+    header_counts: Dict[str, int] = {}
 
+    def allocate_header_name(base: str, col_index: int) -> str:
+        name_base = base.strip() if isinstance(base, str) else ""
+        if not name_base:
+            name_base = f"Columna {col_index + 1}"
+        count = header_counts.get(name_base, 0)
+        header_counts[name_base] = count + 1
+        if count == 0:
+            return name_base
+        return f"{name_base} ({count + 1})"
+
+    def register_header(col_index: int, base_name: Any) -> None:
+        header_map[col_index] = allocate_header_name(str(base_name) if base_name is not None else "", col_index)
+
+    def ensure_header(col_index: int) -> str:
+        if col_index not in header_map:
+            header_map[col_index] = allocate_header_name("", col_index)
+        return header_map[col_index]
+
+    seen_rows = False
+    produced = False
+
+    for row in _iter_sheet_rows(zf, sheet_path):
+        cells: Dict[int, Any] = {}
+        for cell in row.findall(_CELL_TAG):
+            cells[_column_index(cell.get("r", ""))] = _parse_cell_value(cell, shared_strings)
+
+        if not seen_rows:
+            seen_rows = True
             if not cells:
+                raise ValueError("La primera fila del Excel debe contener encabezados")
+            for col in sorted(cells):
+                register_header(col, cells[col])
+            if columns is not None and not set(columns) & set(header_map.values()):
+                raise ValueError(f"La hoja no contiene ninguna de las columnas indicadas: {', '.join(columns)}")
+            continue
+
+        if not cells:
+            continue
+
+        card_content: Dict[str, Any] = {}
+        score = 0
+        for col_index in sorted(cells):
+            header = ensure_header(col_index)
+            value = cells[col_index]
+            if header == SCORE_FIELD:
+                score = _imported_score(value)
                 continue
+            if value in ("", None) or (columns is not None and header not in columns):
+                continue
+            card_content[header] = value
+
+        if not card_content:
+            continue
+
+        produced = True
+        yield {
+            "id": str(uuid.uuid4()),
+            "aciertos": score,
+            "contenido": card_content,
+        }
+
+    if not seen_rows:
+        raise ValueError("El archivo Excel no contiene filas de datos")
+    if not produced:
+        raise ValueError("El archivo Excel no contiene tarjetas después de la fila de encabezados")
+
+
+def parse_xlsx_cards(raw: Union[bytes, BinaryIO]) -> List[Dict[str, Any]]:
+    return list(iter_xlsx_cards(raw))
+
+
+def _parse_sheet_files(
+    path: str, sheet_paths: List[str], columns: Optional[List[str]]
+) -> List[Tuple[Optional[List[Dict[str, Any]]], Optional[str]]]:
+    """Process pool entry point: parse some worksheets of a workbook on disk.
+
+    Returns ``(cards, None)`` or ``(None, error)`` per sheet. The shared strings
+    are loaded once for all of them and dropped when the task returns, so no
+    worker holds on to a workbook after its import.
+    """
+    results: List[Tuple[Optional[List[Dict[str, Any]]], Optional[str]]] = []
+    with _open_workbook(Path(path)) as zf:
+        strings = _load_shared_strings(zf)
+        for sheet_path in sheet_paths:
+            try:
+                results.append((list(_iter_sheet_cards(zf, sheet_path, strings, columns)), None))
+            except ValueError as exc:
+                results.append((None, str(exc)))
+    return results
 
-            card_content: Dict[str, Any] = {}
-            for col_index in sorted(cells):
-                header = ensure_header(col_index)
-                value = cells[col_index]
-                if value in ("", None):
-                    continue
-                card_content[header] = value
 
-            if not card_content:
-                continue
+def parse_xlsx_sheets(
+    path: Path, sheets: Optional[List[str]] = None, columns: Optional[List[str]] = None
+) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Parse several worksheets of one workbook into ``(sheet name, cards)`` pairs.
 
-            cards.append(
-                {
-                    "id": str(uuid.uuid4()),
-                    "aciertos": 0,
-                    "contenido": card_content,
-                }
-            )
+    The workbook structure is read here and the selected sheets are dealt out
+    to at most ``IMPORT_WORKERS`` tasks of the import process pool, each of
+    which loads the shared strings once.
+    ``sheets=None`` selects every sheet and silently skips those without cards;
+    an explicitly selected sheet that fails raises :class:`ValueError`.
+    """
+    with _open_workbook(path) as zf:
+        available = [(name, sheet_path) for name, sheet_path in _workbook_sheets(zf) if sheet_path in zf.NameToInfo]
+        if sheets is None:
+            selected = available
+        else:
+            by_name = dict(available)
+            missing = [name for name in sheets if name not in by_name]
+            if missing:
+                raise ValueError(f"Hojas no encontradas en el Excel: {', '.join(missing)}")
+            selected = [(name, by_name[name]) for name in dict.fromkeys(sheets)]
 
-        if not cards:
-            raise ValueError("El archivo Excel no contiene tarjetas después de la fila de encabezados")
-        return cards
+    pool = get_import_pool()
+    tasks = max(1, min(len(selected), IMPORT_WORKERS))
+    chunks = [[sheet_path for _, sheet_path in selected[start::tasks]] for start in range(tasks)]
+    futures = [pool.submit(_parse_sheet_files, str(path), chunk, columns) for chunk in chunks if chunk]
+    outcomes: List[Tuple[Optional[List[Dict[str, Any]]], Optional[str]]] = [(None, None)] * len(selected)
+    for start, future in enumerate(futures):
+        try:
+            parsed = future.result()
+        except ValueError as exc:
+            parsed = [(None, str(exc))] * len(chunks[start])
+        outcomes[start::tasks] = parsed
+    results: List[Tuple[str, List[Dict[str, Any]]]] = []
+    first_error: Optional[str] = None
+    for (name, _), (cards, error) in zip(selected, outcomes):
+        if cards is not None:
+            results.append((name, cards))
+            continue
+        message = f"Hoja «{name}»: {error}"
+        if sheets is not None:
+            raise ValueError(message)
+        first_error = first_error or message
+    if not results:
+        raise ValueError(first_error or "El archivo Excel no contiene hojas de cálculo")
+    return results
 
 
 @dataclass
@@ -346,11 +2341,13 @@ class TextField:
 
 
 class FileField:
+    """An uploaded file; its contents live in ``file`` (spooled to disk when large)."""
+
     def __init__(
         self,
         name: str,
         filename: str,
-        data: bytes,
+        file: BinaryIO,
         content_type: str,
         headers: Optional[Dict[str, str]] = None,
     ) -> None:
@@ -358,8 +2355,19 @@ class FileField:
         self.filename = filename
         self.type = content_type
         self.headers = headers or {}
-        self.value = data
-        self.file = BytesIO(data)
+        self.file = file
+
+    @property
+    def value(self) -> bytes:
+        position = self.file.tell()
+        self.file.seek(0)
+        try:
+            return self.file.read()
+        finally:
+            self.file.seek(position)
+
+    def close(self) -> None:
+        self.file.close()
 
 
 MultipartField = Union[TextField, FileField]
@@ -390,72 +2398,206 @@ class MultipartForm:
             raise KeyError(name)
         return fields[0]
 
+    def getlist(self, name: str) -> List[MultipartField]:
+        return list(self._fields.get(name, []))
 
-def _parse_multipart_form_data(body: bytes, content_type: str) -> MultipartForm:
-    header_bytes = f"Content-Type: {content_type}\r\n\r\n".encode("utf-8")
-    try:
-        message: EmailMessage = BytesParser(policy=default).parsebytes(header_bytes + body)
-    except Exception as exc:  # pragma: no cover - defensive
-        raise ValueError("No se pudo interpretar el formulario enviado") from exc
+    def detach(self, name: str) -> MultipartField:
+        """Remove and return the first ``name`` field; :meth:`close` will not close it."""
+        fields = self._fields.get(name)
+        if not fields:
+            raise KeyError(name)
+        return fields.pop(0)
+
+    def close(self) -> None:
+        for fields in self._fields.values():
+            for field in fields:
+                if isinstance(field, FileField):
+                    field.close()
+
+
+class _MultipartReader:
+    """Incremental reader over a ``multipart/form-data`` body.
+
+    Reads at most ``length`` bytes from ``stream`` in fixed-size chunks and never
+    holds more than one chunk plus a delimiter in memory.
+    """
+
+    max_header_bytes = 16 * 1024
+
+    def __init__(self, stream: BinaryIO, boundary: bytes, length: int) -> None:
+        self.stream = stream
+        self.remaining = length
+        # Prefixing CRLF lets the first boundary match the same delimiter as the rest.
+        self.buffer = b"\r\n"
+        self.delimiter = b"\r\n--" + boundary
 
-    if not message.is_multipart():
+    def _fill(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        chunk = self.stream.read(min(UPLOAD_CHUNK_SIZE, self.remaining))
+        if not chunk:
+            self.remaining = 0
+            return False
+        self.remaining -= len(chunk)
+        self.buffer += chunk
+        return True
+
+    def _truncated(self) -> ValueError:
+        return ValueError("El formulario enviado está incompleto")
+
+    def copy_until_delimiter(self, sink: Optional[BinaryIO]) -> None:
+        """Copy bytes up to the next delimiter into ``sink`` (``None`` discards them)."""
+        keep = len(self.delimiter) - 1
+        while True:
+            index = self.buffer.find(self.delimiter)
+            if index >= 0:
+                if sink is not None:
+                    sink.write(self.buffer[:index])
+                self.buffer = self.buffer[index + len(self.delimiter):]
+                return
+            if len(self.buffer) > keep:
+                if sink is not None:
+                    sink.write(self.buffer[:-keep])
+                self.buffer = self.buffer[-keep:]
+            if not self._fill():
+                raise self._truncated()
+
+    def at_final_boundary(self) -> bool:
+        while len(self.buffer) < 2:
+            if not self._fill():
+                raise self._truncated()
+        if self.buffer.startswith(b"--"):
+            return True
+        # Skip optional transport padding and the CRLF that ends the boundary line.
+        while b"\r\n" not in self.buffer:
+            if not self._fill():
+                raise self._truncated()
+        self.buffer = self.buffer[self.buffer.index(b"\r\n") + 2:]
+        return False
+
+    def read_headers(self) -> bytes:
+        while b"\r\n\r\n" not in self.buffer:
+            if len(self.buffer) > self.max_header_bytes:
+                raise ValueError("Las cabeceras del formulario son demasiado grandes")
+            if not self._fill():
+                raise self._truncated()
+        index = self.buffer.index(b"\r\n\r\n")
+        headers = self.buffer[: index + 4]
+        self.buffer = self.buffer[index + 4:]
+        return headers
+
+
+def _multipart_boundary(content_type: str) -> bytes:
+    message = EmailMessage()
+    message["Content-Type"] = content_type
+    boundary = message.get_param("boundary")
+    if not isinstance(boundary, str) or not boundary:
         raise ValueError("El cuerpo debe ser multipart/form-data válido")
+    return boundary.encode("latin-1")
 
-    form = MultipartForm()
-    for part in message.iter_parts():
-        if part.get_content_disposition() != "form-data":
-            continue
-        name = part.get_param("name", header="content-disposition")
-        if not name:
-            continue
-        filename = part.get_filename()
-        payload = part.get_payload(decode=True) or b""
-        headers = {key: value for key, value in part.items()}
-        if filename:
-            form.add_field(
-                name,
-                FileField(
-                    name=name,
-                    filename=filename,
-                    data=payload,
-                    content_type=part.get_content_type(),
-                    headers=headers,
-                ),
-            )
-            continue
 
-        charset = part.get_content_charset() or "utf-8"
-        try:
-            text = payload.decode(charset, errors="replace")
-        except LookupError:
-            text = payload.decode("utf-8", errors="replace")
-        form.add_field(name, TextField(name=name, value=text))
+def _parse_multipart_form_data(stream: BinaryIO, content_type: str, length: int) -> MultipartForm:
+    """Parse a multipart body of ``length`` bytes straight from ``stream``.
+
+    File parts are written to :class:`tempfile.SpooledTemporaryFile` objects that
+    move to disk above ``UPLOAD_SPOOL_THRESHOLD``; text fields stay in memory.
+    """
+    reader = _MultipartReader(stream, _multipart_boundary(content_type), length)
+    header_parser = BytesHeaderParser(policy=default)
+    form = MultipartForm()
+    try:
+        reader.copy_until_delimiter(None)
+        while not reader.at_final_boundary():
+            part = header_parser.parsebytes(reader.read_headers())
+            name = part.get_param("name", header="content-disposition")
+            if part.get_content_disposition() != "form-data" or not name:
+                reader.copy_until_delimiter(None)
+                continue
+            filename = part.get_filename()
+            headers = {key: str(value) for key, value in part.items()}
+            if filename:
+                spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD)
+                form.add_field(
+                    name,
+                    FileField(
+                        name=name,
+                        filename=filename,
+                        file=spool,  # type: ignore[arg-type]
+                        content_type=part.get_content_type(),
+                        headers=headers,
+                    ),
+                )
+                reader.copy_until_delimiter(spool)  # type: ignore[arg-type]
+                spool.seek(0)
+                continue
 
+            buffer = BytesIO()
+            reader.copy_until_delimiter(buffer)
+            payload = buffer.getvalue()
+            charset = part.get_content_charset() or "utf-8"
+            try:
+                text = payload.decode(charset, errors="replace")
+            except LookupError:
+                text = payload.decode("utf-8", errors="replace")
+            form.add_field(name, TextField(name=name, value=text))
+    except BaseException:
+        form.close()
+        raise
     return form
 
 
-def parse_cards_from_file(file_item: FileField) -> List[Dict[str, Any]]:
+def _select_json_columns(cards: List[Dict[str, Any]], columns: Optional[Collection[str]]) -> List[Dict[str, Any]]:
+    if columns is None:
+        return cards
+    selected = []
+    for card in cards:
+        content = {key: value for key, value in card["contenido"].items() if key in columns}
+        if content:
+            card["contenido"] = content
+            selected.append(card)
+    if not selected:
+        raise ValueError(f"El archivo no contiene ninguna de las columnas indicadas: {', '.join(columns)}")
+    return selected
+
+
+def iter_cards_from_file(
+    file_item: FileField, columns: Optional[Collection[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield the cards of an uploaded JSON or Excel file.
+
+    Workbooks are streamed row by row; when the extension is unknown the file
+    is tried as JSON first and then as Excel. ``columns`` keeps only those keys.
+    """
+    filename = getattr(file_item, "filename", "") or ""
+    extension = Path(filename).suffix.lower()
+
+    if extension == ".xlsx":
+        # Workbooks are read straight from the (possibly on-disk) upload.
+        file_item.file.seek(0)
+        yield from iter_xlsx_cards(file_item.file, columns)
+        return
+
     try:
+        file_item.file.seek(0)
         raw = file_item.file.read()
     except Exception as exc:  # pragma: no cover - defensive
         raise ValueError(f"No se pudo leer el archivo: {exc}")
 
-    filename = getattr(file_item, "filename", "") or ""
-    extension = Path(filename).suffix.lower()
-
     if extension == ".json":
-        return parse_json_cards(raw)
-    if extension == ".xlsx":
-        return parse_xlsx_cards(raw)
+        yield from _select_json_columns(parse_json_cards(raw), columns)
+        return
 
     json_error: Optional[Exception] = None
     try:
-        return parse_json_cards(raw)
+        cards = parse_json_cards(raw)
     except ValueError as exc:
         json_error = exc
+    else:
+        yield from _select_json_columns(cards, columns)
+        return
 
     try:
-        return parse_xlsx_cards(raw)
+        yield from iter_xlsx_cards(raw, columns)
     except ValueError as exc:
         if json_error:
             raise ValueError(
@@ -464,24 +2606,1043 @@ def parse_cards_from_file(file_item: FileField) -> List[Dict[str, Any]]:
         raise
 
 
+def parse_cards_from_file(file_item: FileField, columns: Optional[Collection[str]] = None) -> List[Dict[str, Any]]:
+    return list(iter_cards_from_file(file_item, columns))
+
+
+def build_sheet_decks(
+    file_item: FileField, name: str, sheets: Optional[List[str]], columns: Optional[List[str]]
+) -> List[Dict[str, Any]]:
+    """Create one deck per selected worksheet of an uploaded workbook.
+
+    Decks are named after their sheet, prefixed with ``name`` when given.
+    """
+    with tempfile.TemporaryDirectory(prefix="deck-import-") as workdir:
+        path = Path(workdir) / "workbook.xlsx"
+        file_item.file.seek(0)
+        _copy_limited(file_item.file, path, MAX_UPLOAD_BYTES)
+        parsed = parse_xlsx_sheets(path, sheets, columns)
+    return [
+        {"id": str(uuid.uuid4()), "name": f"{name} - {sheet}" if name else sheet, "cards": cards}
+        for sheet, cards in parsed
+    ]
+
+
+def build_decks_from_upload(
+    file_item: FileField,
+    name: str,
+    columns: Optional[List[str]] = None,
+    sheets: Optional[List[str]] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Turn an upload into decks: one deck, or one per worksheet when ``sheets`` is given.
+
+    ``sheets=["*"]`` selects every worksheet. ``progress`` receives the number of
+    cards parsed so far.
+    """
+    with get_metrics().time_phase("parse"):
+        if sheets is not None:
+            decks = build_sheet_decks(file_item, name, None if sheets == ["*"] else sheets, columns)
+            if progress is not None:
+                progress(sum(len(deck["cards"]) for deck in decks))
+            return decks
+        cards = []
+        for card in iter_cards_from_file(file_item, columns):
+            cards.append(card)
+            if progress is not None:
+                progress(len(cards))
+        return [{"id": str(uuid.uuid4()), "name": name, "cards": cards}]
+
+
+def _split_field(value: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated form field; ``None`` when it is absent or blank."""
+    if value is None:
+        return None
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    return items or None
+
+
+EXPORT_FORMATS = ("json", "xlsx")
+EXPORT_BATCH_ROWS = 500
+_XML_INVALID_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    "</Types>"
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{REL_NS}">'
+    f'<Relationship Id="rId1" Type="{DOC_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{REL_NS}">'
+    f'<Relationship Id="rId1" Type="{DOC_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    "</Relationships>"
+)
+
+
+def iter_export_cards(store: DeckStore, deck_id: str, count: int) -> Iterator[Dict[str, Any]]:
+    """Yield the first ``count`` cards of a deck, fetched ``EXPORT_BATCH_ROWS`` at a time.
+
+    Raises :class:`LookupError` if the deck is removed part-way through.
+    """
+    for start in range(0, count, EXPORT_BATCH_ROWS):
+        batch = store.export_cards(deck_id, start, EXPORT_BATCH_ROWS)
+        if batch is None:
+            raise LookupError(deck_id)
+        yield from batch
+
+
+def iter_json_export(cards: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode cards one by one as a JSON array that :func:`parse_json_cards` reads back.
+
+    Each element is the card's ``contenido`` plus its score under ``SCORE_FIELD``.
+    """
+    yield b"["
+    for position, card in enumerate(cards):
+        entry = {**card.get("contenido", {}), SCORE_FIELD: _normalise_score(card.get("aciertos", 0))}
+        yield (b",\n" if position else b"\n") + json.dumps(entry, ensure_ascii=False).encode("utf-8")
+    yield b"\n]\n"
+
+
+def _xlsx_cell(ref: str, value: Any) -> str:
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, int):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, float) and value == value and value not in (float("inf"), float("-inf")):
+        # repr() switches to exponents ("1e-05"), which the importer reads as text;
+        # the same digits in positional notation read back as the same float.
+        text = format(Decimal(repr(value)), "f")
+        return f'<c r="{ref}"><v>{text if "." in text else text + ".0"}</v></c>'
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False)
+    text = escape(_XML_INVALID_CHARS.sub("", value))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _column_letters(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def write_xlsx_export(name: str, columns: List[str], cards: Iterable[Dict[str, Any]], fileobj: BinaryIO) -> None:
+    """Write cards as a one-sheet workbook into a (possibly unseekable) stream.
+
+    The header row holds ``columns`` (the deck's ``contenido`` keys) plus a
+    ``SCORE_FIELD`` column; rows are compressed and written in batches, so memory
+    stays flat whatever the size of the deck.
+    """
+    headers = [column for column in columns if column != SCORE_FIELD]
+    headers.append(SCORE_FIELD)
+    letters = [_column_letters(index) for index in range(len(headers))]
+    sheet_name = escape(re.sub(r"[\[\]:*?/\\]", " ", name).strip()[:31] or "Mazo", {'"': "&quot;"})
+
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        zf.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{SPREADSHEET_NS}" xmlns:r="{DOC_REL_NS}">'
+            f'<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        zf.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            header_cells = "".join(_xlsx_cell(f"{letter}1", name) for letter, name in zip(letters, headers))
+            sheet.write(
+                (
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<worksheet xmlns="{SPREADSHEET_NS}"><sheetData><row r="1">{header_cells}</row>'
+                ).encode("utf-8")
+            )
+            batch: List[str] = []
+            for number, card in enumerate(cards, start=2):
+                content = card.get("contenido", {})
+                values = [content.get(name) for name in headers[:-1]]
+                values.append(_normalise_score(card.get("aciertos", 0)))
+                cells = "".join(
+                    _xlsx_cell(f"{letter}{number}", value)
+                    for letter, value in zip(letters, values)
+                    if value not in ("", None)
+                )
+                batch.append(f'<row r="{number}">{cells}</row>')
+                if len(batch) >= EXPORT_BATCH_ROWS:
+                    sheet.write("".join(batch).encode("utf-8"))
+                    batch = []
+            batch.append("</sheetData></worksheet>")
+            sheet.write("".join(batch).encode("utf-8"))
+
+
+def _parse_import_file(filename: str, path: str) -> Tuple[List[Dict[str, Any]], float]:
+    """Process pool entry point: parse one file written to disk by the importer.
+
+    Returns the cards and the seconds spent parsing, since metrics recorded in
+    the worker process would never reach the server's registry.
+    """
+    started = time.perf_counter()
+    with open(path, "rb") as fh:
+        cards = parse_cards_from_file(FileField("file", filename, fh, "application/octet-stream"))
+    return cards, time.perf_counter() - started
+
+
+_import_pool: Optional[ProcessPoolExecutor] = None
+_import_pool_lock = threading.Lock()
+
+
+def get_import_pool() -> ProcessPoolExecutor:
+    global _import_pool
+    with _import_pool_lock:
+        if _import_pool is None:
+            # Forking would copy whatever store locks other threads hold at the time.
+            _import_pool = ProcessPoolExecutor(IMPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _import_pool
+
+
+def shutdown_import_pool() -> None:
+    global _import_pool
+    with _import_pool_lock:
+        if _import_pool is not None:
+            _import_pool.shutdown(cancel_futures=True)
+            _import_pool = None
+
+
+def _copy_limited(source: BinaryIO, path: Path, limit: int) -> int:
+    """Copy ``source`` to ``path``, failing once more than ``limit`` bytes were read."""
+    copied = 0
+    with path.open("wb") as dst:
+        while True:
+            chunk = source.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return copied
+            copied += len(chunk)
+            if copied > limit:
+                raise ValueError("El contenido supera el tamaño máximo permitido")
+            dst.write(chunk)
+
+
+def collect_import_files(fields: List[MultipartField], workdir: Path) -> List[Tuple[str, Path]]:
+    """Write every uploaded file to ``workdir`` and return ``(filename, path)`` pairs.
+
+    ZIP archives are expanded into their ``.json`` and ``.xlsx`` members; their
+    uncompressed size is bounded by ``MAX_UPLOAD_BYTES`` as well.
+    """
+    files: List[Tuple[str, Path]] = []
+
+    def add(filename: str, source: BinaryIO, limit: int) -> int:
+        if len(files) >= IMPORT_MAX_FILES:
+            raise ValueError(f"No se pueden importar más de {IMPORT_MAX_FILES} archivos a la vez")
+        path = workdir / f"{len(files)}{Path(filename).suffix.lower()}"
+        copied = _copy_limited(source, path, limit)
+        files.append((filename, path))
+        return copied
+
+    for field in fields:
+        if not isinstance(field, FileField) or not field.filename:
+            continue
+        filename = Path(field.filename).name
+        field.file.seek(0)
+        if Path(filename).suffix.lower() != ".zip":
+            add(filename, field.file, MAX_UPLOAD_BYTES)
+            continue
+        try:
+            archive = zipfile.ZipFile(field.file)
+        except zipfile.BadZipFile as exc:
+            raise ValueError(f"{filename} no es un ZIP válido") from exc
+        with archive:
+            remaining = MAX_UPLOAD_BYTES
+            for member in archive.infolist():
+                member_name = Path(member.filename).name
+                if (
+                    member.is_dir()
+                    or member.filename.startswith("__MACOSX/")
+                    or member_name.startswith(".")
+                    or Path(member_name).suffix.lower() not in IMPORT_EXTENSIONS
+                ):
+                    continue
+                with archive.open(member) as source:
+                    remaining -= add(member_name, source, remaining)
+    return files
+
+
+def iter_import_results(
+    files: List[Tuple[str, Path]]
+) -> Iterator[Tuple[int, Optional[List[Dict[str, Any]]], Optional[str]]]:
+    """Parse files in the import pool, yielding ``(index, cards, error)`` as each finishes."""
+    pool = get_import_pool()
+    futures: Dict[Future, int] = {
+        pool.submit(_parse_import_file, filename, str(path)): index for index, (filename, path) in enumerate(files)
+    }
+    for future in as_completed(futures):
+        try:
+            cards, elapsed = future.result()
+        except ValueError as exc:
+            yield futures[future], None, str(exc)
+        except Exception as exc:  # pragma: no cover - e.g. a worker was killed
+            yield futures[future], None, f"No se pudo procesar el archivo: {exc}"
+        else:
+            get_metrics().observe_phase("parse", elapsed)
+            yield futures[future], cards, None
+
+
+@dataclass
+class ImportJob:
+    """Progress and outcome of a deck import running in the background."""
+
+    id: str
+    name: str
+    filename: str
+    status: str = "queued"
+    rows_parsed: int = 0
+    cards_created: int = 0
+    deck: Optional[Dict[str, Any]] = None
+    decks: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: str = ""
+    finished_at: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "file": self.filename,
+            "status": self.status,
+            "rowsParsed": self.rows_parsed,
+            "cardsCreated": self.cards_created,
+            "deck": self.deck,
+            "decks": self.decks,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+class ImportJobQueue:
+    """Runs ``POST /api/decks?async=1`` imports on a small thread pool.
+
+    Jobs go through ``queued``, ``running`` and then ``done`` or ``failed``. The
+    parser is consumed card by card so ``rowsParsed`` advances while a workbook
+    is being read. Only the newest ``history`` finished jobs are remembered.
+
+    With a ``board`` (the :class:`StoreCoordinator` of a pre-fork server) every
+    change of state, and the progress at most every ``WORKER_PUBLISH_INTERVAL``
+    seconds, is also published there, and jobs this process does not know are
+    looked up on it: the job may be polled through any worker process.
+    """
+
+    def __init__(
+        self, workers: int = IMPORT_JOB_WORKERS, history: int = IMPORT_JOB_HISTORY, board: Optional[Any] = None
+    ) -> None:
+        self.history = max(1, history)
+        self.board = board
+        self._executor = ThreadPoolExecutor(max(1, workers), thread_name_prefix="deck-import")
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        name: str,
+        file_field: FileField,
+        columns: Optional[List[str]] = None,
+        sheets: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Queue an import; the job takes ownership of ``file_field`` and closes it.
+
+        ``columns`` and ``sheets`` are passed on to :func:`build_decks_from_upload`.
+        """
+        job = ImportJob(
+            id=uuid.uuid4().hex,
+            name=name,
+            filename=file_field.filename,
+            created_at=datetime.utcnow().isoformat() + "Z",
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+            snapshot = job.as_dict()
+        if self.board is not None:
+            self.board.publish_job(snapshot)
+        try:
+            self._executor.submit(self._run, job, file_field, columns, sheets)
+        except RuntimeError:
+            file_field.close()
+            raise
+        return snapshot
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[: max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.as_dict()
+        return self.board.get_job(job_id) if self.board is not None else None
+
+    def _publish(self, job: ImportJob) -> None:
+        if self.board is not None:
+            with self._lock:
+                snapshot = job.as_dict()
+            self.board.publish_job(snapshot)
+
+    def _finish(self, job: ImportJob, status: str, **fields: Any) -> None:
+        with self._lock:
+            for key, value in fields.items():
+                setattr(job, key, value)
+            job.status = status
+            job.finished_at = datetime.utcnow().isoformat() + "Z"
+            self._evict()
+        self._publish(job)
+
+    def _run(
+        self, job: ImportJob, file_field: FileField, columns: Optional[List[str]], sheets: Optional[List[str]]
+    ) -> None:
+        job.status = "running"
+        self._publish(job)
+        published = time.monotonic()
+
+        def progress(rows: int) -> None:
+            nonlocal published
+            job.rows_parsed = rows
+            if self.board is not None and time.monotonic() - published >= WORKER_PUBLISH_INTERVAL:
+                self._publish(job)
+                published = time.monotonic()
+
+        try:
+            decks = build_decks_from_upload(file_field, job.name, columns, sheets, progress)
+            store = get_store()
+            store.add_decks(decks)
+            summaries = [store.summary(deck["id"]) for deck in decks]
+            self._finish(
+                job,
+                "done",
+                cards_created=sum(len(deck["cards"]) for deck in decks),
+                deck=summaries[0],
+                decks=summaries,
+            )
+        except ValueError as exc:
+            self._finish(job, "failed", error=str(exc))
+        except Exception as exc:  # pragma: no cover - reported through the job
+            self._finish(job, "failed", error=f"No se pudo importar el mazo: {exc}")
+        finally:
+            file_field.close()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_import_jobs: Optional[ImportJobQueue] = None
+_import_jobs_lock = threading.Lock()
+
+
+def get_import_jobs() -> ImportJobQueue:
+    global _import_jobs
+    with _import_jobs_lock:
+        if _import_jobs is None:
+            _import_jobs = ImportJobQueue(board=_coordinator)
+        return _import_jobs
+
+
+def shutdown_import_jobs() -> None:
+    global _import_jobs
+    with _import_jobs_lock:
+        if _import_jobs is not None:
+            _import_jobs.shutdown()
+            _import_jobs = None
+
+
+class StaticAssetCache:
+    """Gzip-compressed copies of the client files, computed once and reused.
+
+    Entries are keyed by path and revalidated against the file's size and mtime,
+    so editing a file during development still takes effect.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._entries: Dict[Path, Tuple[int, int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def preload(self) -> int:
+        count = 0
+        for path in self.root.rglob("*"):
+            if path.is_file() and self.get(path) is not None:
+                count += 1
+        return count
+
+    def get(self, path: Path) -> Optional[bytes]:
+        entry = self.entry(path)
+        return entry[2] if entry is not None else None
+
+    def entry(self, path: Path) -> Optional[Tuple[int, int, bytes]]:
+        """Return ``(mtime_ns, size, compressed)`` for ``path``, compressing it if needed."""
+        if path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        entry = (stat.st_mtime_ns, stat.st_size, gzip.compress(data, compresslevel=9, mtime=0))
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+
+_static_assets: Optional[StaticAssetCache] = None
+
+
+def get_static_assets() -> StaticAssetCache:
+    global _static_assets
+    if _static_assets is None or _static_assets.root != CLIENT_DIR:
+        _static_assets = StaticAssetCache(CLIENT_DIR)
+    return _static_assets
+
+
+def _accepts_gzip(header: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows gzip.
+
+    An explicit ``gzip`` entry takes precedence over ``*``; a q-value of 0 means
+    the coding is refused.
+    """
+    if not header:
+        return False
+    qvalues: Dict[str, float] = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        coding = coding.lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        qvalues.setdefault(coding, q)
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
+
+
+def _gzip_etag(etag: str) -> str:
+    # Strong validators must differ between representations.
+    return f'{etag[:-1]}-gzip"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == etag for candidate in candidates
+    )
+
+
+class Histogram:
+    """Observation counts per bucket, plus their sum, for one label set."""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+_METRIC_HELP = {
+    "deck_http_requests_total": ("counter", "Peticiones HTTP atendidas."),
+    "deck_http_request_duration_seconds": ("histogram", "Tiempo de respuesta de las peticiones HTTP."),
+    "deck_http_request_bytes_total": ("counter", "Bytes recibidos en el cuerpo de las peticiones."),
+    "deck_http_response_bytes_total": ("counter", "Bytes enviados en las respuestas, cabeceras incluidas."),
+    "deck_phase_duration_seconds": ("histogram", "Duración de las fases internas: almacenamiento, copias y análisis de archivos."),
+    "deck_profiled_requests_total": ("counter", "Peticiones perfiladas con cProfile."),
+}
+
+LabelSet = Tuple[Tuple[str, str], ...]
+MetricsSnapshot = Tuple[Dict[str, Dict[LabelSet, float]], Dict[str, Dict[LabelSet, Tuple[List[int], float]]]]
+
+
+def _format_labels(labels: LabelSet, extra: str = "") -> str:
+    parts = [
+        '%s="%s"' % (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    ]
+    if extra:
+        parts.append(extra)
+    return "{%s}" % ",".join(parts) if parts else ""
+
+
+class Metrics:
+    """Process-wide counters and histograms, rendered in the Prometheus text format.
+
+    Requests are recorded by :class:`DeckHandler`; the store and the importers
+    time their slow phases with :meth:`time_phase`.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = METRICS_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def observe_phase(self, phase: str, seconds: float) -> None:
+        self.observe("deck_phase_duration_seconds", seconds, phase=phase)
+
+    @contextmanager
+    def time_phase(self, phase: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_phase(phase, time.perf_counter() - started)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """A picklable copy of every series, for :meth:`merge` in another process."""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {labels: (list(histogram.counts), histogram.sum) for labels, histogram in series.items()}
+                for name, series in self._histograms.items()
+            }
+        return counters, histograms
+
+    def merge(self, snapshot: MetricsSnapshot) -> None:
+        """Add the series of a :meth:`snapshot` to these ones."""
+        counters, histograms = snapshot
+        with self._lock:
+            for name, values in counters.items():
+                series = self._counters.setdefault(name, {})
+                for labels, value in values.items():
+                    series[labels] = series.get(labels, 0) + value
+            for name, states in histograms.items():
+                series = self._histograms.setdefault(name, {})
+                for labels, (counts, total) in states.items():
+                    histogram = series.get(labels)
+                    if histogram is None:
+                        histogram = series[labels] = Histogram(self.buckets)
+                    histogram.counts = [mine + theirs for mine, theirs in zip(histogram.counts, counts)]
+                    histogram.sum += total
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(set(self._counters) | set(self._histograms)):
+                kind, help_text = _METRIC_HELP.get(name, ("counter" if name in self._counters else "histogram", ""))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+                for labels, histogram in sorted(self._histograms.get(name, {}).items()):
+                    cumulative = 0
+                    bounds = ["%g" % bound for bound in self.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        bucket_labels = _format_labels(labels, 'le="%s"' % bound)
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def render_metrics() -> str:
+    """This server's metrics; under :class:`PreforkDeckServer`, those of every process."""
+    if _coordinator is None:
+        return get_metrics().render()
+    _coordinator.publish_metrics(os.getpid(), get_metrics().snapshot())
+    return _coordinator.render_metrics()
+
+
+class RequestProfiler:
+    """Aggregates cProfile data over a random sample of requests.
+
+    ``rate`` is the fraction of requests profiled (``DECK_PROFILE``); zero
+    disables profiling. Interpreters that allow a single active profiler
+    (Python 3.12+) skip samples that would overlap.
+    """
+
+    def __init__(self, rate: float = PROFILE_SAMPLE_RATE) -> None:
+        self.rate = rate
+        self.sampled = 0
+        self._lock = threading.Lock()
+        self._stats: Optional[pstats.Stats] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def start(self) -> Optional[cProfile.Profile]:
+        if not self.enabled or random.random() >= self.rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+        return profile
+
+    def stop(self, profile: cProfile.Profile) -> None:
+        profile.disable()
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.sampled += 1
+
+    def report(self, limit: int = 40) -> str:
+        """The ``limit`` most expensive functions by cumulative time, as text."""
+        stream = StringIO()
+        with self._lock:
+            stream.write(f"{self.sampled} peticiones perfiladas\n")
+            if self._stats is not None:
+                self._stats.stream = stream  # type: ignore[attr-defined]
+                self._stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """Aggregated stats in the binary format read by ``pstats.Stats(path)``."""
+        with self._lock:
+            return marshal.dumps(self._stats.stats if self._stats is not None else {})  # type: ignore[attr-defined]
+
+
+_profiler: Optional[RequestProfiler] = None
+
+
+def get_profiler() -> RequestProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = RequestProfiler()
+    return _profiler
+
+
+_ROUTE_LABELS = {
+    "/api/decks": "/api/decks",
+    "/api/decks/import": "/api/decks/import",
+    "/api/search": "/api/search",
+    "/api/metrics": "/api/metrics",
+    "/api/metrics/profile": "/api/metrics/profile",
+}
+_ROUTE_PATTERNS = [
+    (re.compile(r"/api/decks/[\w-]+/cards/[\w-]+"), "/api/decks/{id}/cards/{cardId}"),
+    (re.compile(r"/api/decks/[\w-]+/(cards|next|export|reviews)"), None),
+    (re.compile(r"/api/decks/[\w-]+"), "/api/decks/{id}"),
+    (re.compile(r"/api/jobs/[\w-]+"), "/api/jobs/{id}"),
+]
+
+
+def route_label(path: str) -> str:
+    """Collapse a request path into its route, so ids do not explode the label set."""
+    path = urlparse(path).path
+    label = _ROUTE_LABELS.get(path)
+    if label is not None:
+        return label
+    if not path.startswith("/api/"):
+        return "static"
+    for pattern, template in _ROUTE_PATTERNS:
+        match = pattern.fullmatch(path)
+        if match:
+            return template or f"/api/decks/{{id}}/{match.group(1)}"
+    return "other"
+
+
+class CountingWriter:
+    """Wraps a handler's ``wfile`` and counts the bytes written through it."""
+
+    def __init__(self, raw: BinaryIO) -> None:
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data: bytes) -> int:
+        self.count += len(data)
+        return self.raw.write(data)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.raw, name)
+
+
+class ChunkedWriter:
+    """Write-only file object that sends a response body in HTTP/1.1 chunks.
+
+    Small writes are coalesced into ``chunk_size`` chunks. With ``chunked``
+    unset the bytes are written as they are, for HTTP/1.0 clients that read
+    until the connection closes.
+    """
+
+    def __init__(self, wfile: BinaryIO, chunked: bool = True, chunk_size: int = UPLOAD_CHUNK_SIZE) -> None:
+        self.wfile = wfile
+        self.chunked = chunked
+        self.chunk_size = chunk_size
+        self.bytes_written = 0
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._buffer.append(bytes(data))
+            self._buffered += len(data)
+            if self._buffered >= self.chunk_size:
+                self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if not self._buffered:
+            return
+        data = b"".join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self.bytes_written += len(data)
+        if self.chunked:
+            data = b"%x\r\n%s\r\n" % (len(data), data)
+        self.wfile.write(data)
+
+    def close(self) -> None:
+        """Flush and write the terminating chunk."""
+        self.flush()
+        if self.chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+
 class DeckHandler(SimpleHTTPRequestHandler):
     server_version = "DeckStudy/1.0"
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.response_status: Optional[int] = None
         super().__init__(*args, directory=str(CLIENT_DIR), **kwargs)
 
+    # --- Instrumentation -------------------------------------------------
+    def setup(self) -> None:
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)  # type: ignore[assignment]
+
+    def send_response(self, code: int, message: Optional[str] = None) -> None:
+        self.response_status = code
+        super().send_response(code, message)
+
+    def handle_one_request(self) -> None:
+        """Handle a request, recording its latency and sizes in :func:`get_metrics`."""
+        self.response_status = None
+        written = self.wfile.count  # type: ignore[attr-defined]
+        profiler = get_profiler()
+        profile = profiler.start()
+        started = time.perf_counter()
+        try:
+            super().handle_one_request()
+        finally:
+            elapsed = time.perf_counter() - started
+            if profile is not None:
+                profiler.stop(profile)
+                get_metrics().inc("deck_profiled_requests_total")
+            if self.response_status is not None:
+                self.record_request(elapsed, self.wfile.count - written)  # type: ignore[attr-defined]
+
+    def record_request(self, elapsed: float, response_bytes: int) -> None:
+        metrics = get_metrics()
+        method = getattr(self, "command", None) or "-"
+        route = route_label(getattr(self, "path", ""))
+        metrics.inc("deck_http_requests_total", method=method, route=route, status=str(self.response_status))
+        metrics.observe("deck_http_request_duration_seconds", elapsed, method=method, route=route)
+        metrics.inc("deck_http_response_bytes_total", response_bytes, route=route)
+        headers = getattr(self, "headers", None)
+        try:
+            request_bytes = int(headers.get("Content-Length") or 0) if headers is not None else 0
+        except ValueError:
+            request_bytes = 0
+        if request_bytes > 0:
+            metrics.inc("deck_http_request_bytes_total", request_bytes, route=route)
+
     # --- Helpers ---------------------------------------------------------
-    def send_json(self, payload: Any, status: int = 200) -> None:
+    def send_json(self, payload: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> None:
         encoded = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_encoded_json(encoded, status=status, headers=headers)
+
+    def send_encoded_json(
+        self,
+        encoded: bytes,
+        status: int = 200,
+        etag: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        compress = len(encoded) >= GZIP_MIN_BYTES and _accepts_gzip(self.headers.get("Accept-Encoding"))
+        if etag is not None:
+            if_none_match = self.headers.get("If-None-Match")
+            if _etag_matches(if_none_match, etag) or _etag_matches(if_none_match, _gzip_etag(etag)):
+                self.send_response(304)
+                self.send_header("ETag", _gzip_etag(etag) if compress else etag)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Vary", "Accept-Encoding")
+                self.end_headers()
+                return
+            if compress:
+                etag = _gzip_etag(etag)
+        if compress:
+            encoded = gzip.compress(encoded, compresslevel=6)
         self.send_response(status)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(encoded)))
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        if compress or len(encoded) >= GZIP_MIN_BYTES:
+            self.send_header("Vary", "Accept-Encoding")
+        if etag is not None:
+            # no-cache makes browsers revalidate with If-None-Match on every fetch.
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def send_compressed_static(self) -> bool:
+        """Serve a precompressed client file if the browser accepts gzip.
+
+        Returns ``False`` when the regular SimpleHTTPRequestHandler path should
+        handle the request instead.
+        """
+        if not _accepts_gzip(self.headers.get("Accept-Encoding")):
+            return False
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            if not urlparse(self.path).path.endswith("/"):
+                return False
+            path = path / "index.html"
+        entry = get_static_assets().entry(path)
+        if entry is None:
+            return False
+        mtime_ns, size, compressed = entry
+        etag = _gzip_etag(f'"{mtime_ns:x}-{size:x}"')
+        last_modified = self.date_time_string(mtime_ns // 1_000_000_000)
+        if self._static_not_modified(etag, mtime_ns // 1_000_000_000):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return True
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(str(path)))
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(compressed)))
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.wfile.write(compressed)
+        return True
+
+    def _static_not_modified(self, etag: str, mtime: int) -> bool:
+        # If-None-Match takes precedence over If-Modified-Since, as in SimpleHTTPRequestHandler.
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etag)
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if not if_modified_since:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return mtime <= since.timestamp()
+
+    def send_text(self, body: Union[str, bytes], content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        encoded = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.send_header("Cache-Control", "no-store")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
         self.wfile.write(encoded)
 
     def send_error_json(self, status: int, message: str) -> None:
         self.send_json({"error": message}, status=status)
 
+    def read_multipart_form(self) -> Optional[MultipartForm]:
+        """Parse the request body as multipart/form-data, replying with an error on failure.
+
+        The declared Content-Length is checked against ``MAX_UPLOAD_BYTES`` before
+        any of the body is read.
+        """
+        content_type = self.headers.get("Content-Type", "")
+        if not content_type.startswith("multipart/form-data"):
+            self.send_error_json(400, "Se requiere multipart/form-data para subir un mazo")
+            return None
+
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.close_connection = True
+            self.send_error_json(411, "Se requiere la cabecera Content-Length")
+            return None
+        if length > MAX_UPLOAD_BYTES:
+            self.close_connection = True
+            limit_mb = MAX_UPLOAD_BYTES / (1024 * 1024)
+            self.send_error_json(413, f"El archivo supera el tamaño máximo permitido ({limit_mb:g} MB)")
+            return None
+
+        try:
+            return _parse_multipart_form_data(self.rfile, content_type, length)
+        except ValueError as exc:
+            self.close_connection = True
+            self.send_error_json(400, str(exc))
+            return None
+
     def read_body(self) -> bytes:
         length = int(self.headers.get("Content-Length", "0"))
         if length == 0:
@@ -502,6 +3663,8 @@ class DeckHandler(SimpleHTTPRequestHandler):
                 if not index_path.exists():
                     self.send_error(404, "Archivo index.html no encontrado")
                     return
+            if self.send_compressed_static():
+                return
             super().do_GET()
 
     def do_POST(self) -> None:  # noqa: N802
@@ -526,95 +3689,367 @@ class DeckHandler(SimpleHTTPRequestHandler):
     def handle_api_get(self) -> None:
         parsed = urlparse(self.path)
         path = parsed.path
+        store = get_store()
         if path == "/api/decks":
-            decks = list_decks()
-            summary = [
-                {
-                    "id": deck["id"],
-                    "name": deck["name"],
-                    "cardCount": len(deck.get("cards", [])),
-                    "pendingPoints": calculate_pending_points(deck),
-                    **calculate_card_progress(deck),
-                }
-                for deck in decks
-            ]
-            self.send_json({"decks": summary})
+            etag, body = store.encoded_summaries()
+            self.send_encoded_json(body, etag=etag)
+            return
+
+        next_match = re.fullmatch(r"/api/decks/([\w-]+)/next", path)
+        if next_match:
+            params = parse_qs(parsed.query)
+            session = params.get("session", [""])[0]
+            if not re.fullmatch(r"[\w-]{0,64}", session):
+                self.send_error_json(400, "Sesión de estudio no válida")
+                return
+            restart = params.get("restart", ["0"])[0] in ("1", "true")
+            result = store.next_card(next_match.group(1), session=session, restart=restart)
+            if result is None:
+                self.send_error_json(404, "Mazo no encontrado")
+                return
+            self.send_json(result)
+            return
+
+        if path == "/api/search":
+            self.handle_search(parse_qs(parsed.query))
+            return
+
+        if path == "/api/metrics":
+            self.send_text(render_metrics(), "text/plain; version=0.0.4; charset=utf-8")
+            return
+
+        if path == "/api/metrics/profile":
+            self.handle_profile(parse_qs(parsed.query))
+            return
+
+        export_match = re.fullmatch(r"/api/decks/([\w-]+)/export", path)
+        if export_match:
+            self.handle_export(export_match.group(1), parse_qs(parsed.query))
+            return
+
+        cards_match = re.fullmatch(r"/api/decks/([\w-]+)/cards", path)
+        if cards_match:
+            self.handle_card_page(cards_match.group(1), parse_qs(parsed.query))
+            return
+
+        card_match = re.fullmatch(r"/api/decks/([\w-]+)/cards/([\w-]+)", path)
+        if card_match:
+            card = store.get_card(card_match.group(1), card_match.group(2))
+            if card is None:
+                self.send_error_json(404, "Tarjeta no encontrada")
+                return
+            self.send_json(card)
+            return
+
+        job_match = re.fullmatch(r"/api/jobs/([\w-]+)", path)
+        if job_match:
+            job = get_import_jobs().get(job_match.group(1))
+            if job is None:
+                self.send_error_json(404, "Trabajo no encontrado")
+                return
+            self.send_json(job, headers={"Cache-Control": "no-store"})
             return
 
         deck_match = re.fullmatch(r"/api/decks/([\w-]+)", path)
         if deck_match:
             deck_id = deck_match.group(1)
-            deck, _ = find_deck(deck_id)
-            if deck is None:
+            encoded = store.encoded_deck(deck_id)
+            if encoded is None:
                 self.send_error_json(404, "Mazo no encontrado")
                 return
-            self.send_json(deck)
+            etag, body = encoded
+            self.send_encoded_json(body, etag=etag)
             return
 
         self.send_error_json(404, "Ruta no encontrada")
 
-    def handle_api_post(self) -> None:
-        if self.path != "/api/decks":
-            self.send_error_json(404, "Ruta no encontrada")
+    def handle_profile(self, query: Dict[str, List[str]]) -> None:
+        profiler = get_profiler()
+        if not profiler.enabled:
+            self.send_error_json(404, "El perfilado está desactivado; actívalo con DECK_PROFILE")
             return
+        if query.get("format", ["text"])[0] == "pstats":
+            self.send_text(
+                profiler.dump(),
+                "application/octet-stream",
+                {"Content-Disposition": 'attachment; filename="deck.pstats"'},
+            )
+            return
+        self.send_text(profiler.report(), "text/plain; charset=utf-8")
 
-        content_type = self.headers.get("Content-Type", "")
-        if not content_type.startswith("multipart/form-data"):
-            self.send_error_json(400, "Se requiere multipart/form-data para subir un mazo")
+    def handle_search(self, query: Dict[str, List[str]]) -> None:
+        text = query.get("q", [""])[0]
+        if not text.strip():
+            self.send_error_json(400, "El parámetro q es obligatorio")
+            return
+        try:
+            limit = int(query.get("limit", [str(SEARCH_LIMIT)])[0])
+        except ValueError:
+            self.send_error_json(400, "El parámetro limit debe ser un número entero")
             return
+        if not 1 <= limit <= SEARCH_LIMIT_MAX:
+            self.send_error_json(400, f"El parámetro limit debe estar entre 1 y {SEARCH_LIMIT_MAX}")
+            return
+        self.send_json(get_store().search(text, limit))
 
-        body = self.read_body()
+    def handle_card_page(self, deck_id: str, query: Dict[str, List[str]]) -> None:
+        status = query.get("status", [None])[0]
+        if status is not None and status not in CARD_STATUSES:
+            self.send_error_json(400, f"El filtro status debe ser uno de: {', '.join(CARD_STATUSES)}")
+            return
         try:
-            form = _parse_multipart_form_data(body, content_type)
-        except ValueError as exc:
-            self.send_error_json(400, str(exc))
+            cursor = int(query.get("cursor", ["0"])[0] or 0)
+            limit = int(query.get("limit", [str(CARD_PAGE_SIZE)])[0])
+        except ValueError:
+            self.send_error_json(400, "Los parámetros cursor y limit deben ser números enteros")
+            return
+        if cursor < 0:
+            self.send_error_json(400, "El parámetro cursor no es válido")
             return
+        if not 1 <= limit <= CARD_PAGE_MAX:
+            self.send_error_json(400, f"El parámetro limit debe estar entre 1 y {CARD_PAGE_MAX}")
+            return
+        fields_param = query.get("fields")
+        fields = None
+        if fields_param:
+            fields = [name.strip() for value in fields_param for name in value.split(",") if name.strip()]
 
-        name_field = form.getfirst("name")
-        file_field = form["file"] if "file" in form else None
+        page = get_store().page_cards(deck_id, status=status, cursor=cursor, limit=limit, fields=fields)
+        if page is None:
+            self.send_error_json(404, "Mazo no encontrado")
+            return
+        self.send_json(page)
 
-        if not name_field or file_field is None or getattr(file_field, "filename", "") == "":
-            self.send_error_json(400, "Debe proporcionar un nombre y un archivo JSON o Excel (.xlsx) con las tarjetas")
+    def handle_api_post(self) -> None:
+        parsed = urlparse(self.path)
+        reviews_match = re.fullmatch(r"/api/decks/([\w-]+)/reviews", parsed.path)
+        if reviews_match:
+            self.handle_review_batch(reviews_match.group(1))
+            return
+        if parsed.path == "/api/decks/import":
+            self.handle_bulk_import()
+            return
+        if parsed.path != "/api/decks":
+            self.send_error_json(404, "Ruta no encontrada")
             return
 
-        try:
-            cards = parse_cards_from_file(file_field)
-        except ValueError as exc:
-            self.send_error_json(400, str(exc))
+        form = self.read_multipart_form()
+        if form is None:
             return
 
-        decks = list_decks()
-        deck = {
-            "id": str(uuid.uuid4()),
-            "name": name_field.strip(),
-            "cards": cards,
-        }
-        decks.append(deck)
-        save_decks(decks)
-        progress = calculate_card_progress(deck)
+        try:
+            name = (form.getfirst("name") or "").strip()
+            file_field = form["file"] if "file" in form else None
+            # "sheets" switches to one deck per worksheet ("*" for all of them).
+            sheets = _split_field(form.getfirst("sheets"))
+            columns = _split_field(form.getfirst("columns"))
+
+            if (not name and sheets is None) or not isinstance(file_field, FileField) or file_field.filename == "":
+                self.send_error_json(400, "Debe proporcionar un nombre y un archivo JSON o Excel (.xlsx) con las tarjetas")
+                return
+
+            if self.wants_async(parsed.query):
+                job = get_import_jobs().submit(name, form.detach("file"), columns, sheets)  # type: ignore[arg-type]
+                self.send_json(
+                    {"message": "Importación en curso", "job": job},
+                    status=202,
+                    headers={"Location": f"/api/jobs/{job['id']}"},
+                )
+                return
+
+            try:
+                decks = build_decks_from_upload(file_field, name, columns, sheets)
+            except ValueError as exc:
+                self.send_error_json(400, str(exc))
+                return
+        finally:
+            form.close()
+
+        store = get_store()
+        store.add_decks(decks)
+        if sheets is not None:
+            self.send_json({
+                "message": "Mazos creados",
+                "decks": [store.summary(deck["id"]) for deck in decks],
+            }, status=201)
+            return
         self.send_json({
             "message": "Mazo creado",
-            "deck": {
-                "id": deck["id"],
-                "name": deck["name"],
-                "cardCount": len(cards),
-                "pendingPoints": calculate_pending_points(deck),
-                **progress,
-            },
+            "deck": store.summary(decks[0]["id"]),
         }, status=201)
 
+    def start_stream(self, content_type: str, headers: Optional[Dict[str, str]] = None) -> ChunkedWriter:
+        """Send the headers of a streamed 200 response and return its body writer.
+
+        The handler otherwise answers in HTTP/1.0; chunked encoding needs an
+        HTTP/1.1 status line, so it is only used when the client sent 1.1. The
+        connection is closed afterwards either way.
+        """
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            self.protocol_version = "HTTP/1.1"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        return ChunkedWriter(self.wfile, chunked=chunked)
+
+    def handle_export(self, deck_id: str, query: Dict[str, List[str]]) -> None:
+        export_format = query.get("format", ["json"])[0]
+        if export_format not in EXPORT_FORMATS:
+            self.send_error_json(400, f"El formato debe ser uno de: {', '.join(EXPORT_FORMATS)}")
+            return
+        store = get_store()
+        header = store.export_header(deck_id)
+        if header is None:
+            self.send_error_json(404, "Mazo no encontrado")
+            return
+
+        filename = f"{header['name'] or 'mazo'}.{export_format}"
+        ascii_name = re.sub(r'[^A-Za-z0-9._ -]', "_", filename)
+        disposition = f'attachment; filename="{ascii_name}"; filename*=UTF-8\'\'{quote(filename)}'
+        content_type = (
+            "application/json; charset=utf-8"
+            if export_format == "json"
+            else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+        writer = self.start_stream(content_type, {"Content-Disposition": disposition, "Cache-Control": "no-store"})
+        # Cards come from the store in batches, so a worker process never
+        # receives the whole deck at once.
+        cards = iter_export_cards(store, deck_id, header["count"])
+        try:
+            if export_format == "json":
+                for chunk in iter_json_export(cards):
+                    writer.write(chunk)
+            else:
+                write_xlsx_export(header["name"], header["columns"], cards, writer)  # type: ignore[arg-type]
+        except (OSError, LookupError):
+            # The client went away, or the deck was deleted mid-export: leaving
+            # out the final chunk tells the client the download is incomplete.
+            return
+        writer.close()
+
+    def wants_async(self, query: str) -> bool:
+        if parse_qs(query).get("async", ["0"])[0] in ("1", "true"):
+            return True
+        return "respond-async" in self.headers.get("Prefer", "")
+
+    def handle_bulk_import(self) -> None:
+        """Create one deck per uploaded file, streaming progress as NDJSON.
+
+        Files are parsed in the import process pool; a line is written as each
+        one finishes and a final line lists the created decks, which are added
+        to the store with a single write. Files that fail are reported and skipped.
+        """
+        form = self.read_multipart_form()
+        if form is None:
+            return
+        with tempfile.TemporaryDirectory(prefix="deck-import-") as workdir:
+            try:
+                files = collect_import_files(form.getlist("file"), Path(workdir))
+            except ValueError as exc:
+                self.send_error_json(400, str(exc))
+                return
+            finally:
+                form.close()
+            if not files:
+                self.send_error_json(400, "Debe proporcionar al menos un archivo JSON, Excel (.xlsx) o ZIP")
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            # No Content-Length: the end of the stream is the end of the response.
+            self.close_connection = True
+
+            decks: List[Optional[Dict[str, Any]]] = [None] * len(files)
+            errors = 0
+            for index, cards, error in iter_import_results(files):
+                filename = files[index][0]
+                if cards is None:
+                    errors += 1
+                    self.write_ndjson({"index": index, "file": filename, "error": error})
+                    continue
+                decks[index] = {"id": str(uuid.uuid4()), "name": Path(filename).stem, "cards": cards}
+                self.write_ndjson({"index": index, "file": filename, "cardCount": len(cards)})
+
+        created = [deck for deck in decks if deck is not None]
+        store = get_store()
+        store.add_decks(created)
+        self.write_ndjson({"done": True, "decks": [store.summary(deck["id"]) for deck in created], "errors": errors})
+
+    def write_ndjson(self, payload: Dict[str, Any]) -> None:
+        try:
+            self.wfile.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+        except OSError:
+            # The client went away; keep going so the import still completes.
+            pass
+
+    def handle_review_batch(self, deck_id: str) -> None:
+        try:
+            body = json.loads(self.read_body().decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self.send_error_json(400, "El cuerpo debe ser JSON válido")
+            return
+        entries = body.get("reviews") if isinstance(body, dict) else None
+        if not isinstance(entries, list) or not entries:
+            self.send_error_json(400, "El campo reviews debe ser una lista no vacía")
+            return
+        if len(entries) > REVIEW_BATCH_MAX:
+            self.send_error_json(400, f"No se pueden enviar más de {REVIEW_BATCH_MAX} repasos a la vez")
+            return
+
+        reviews: List[Tuple[Any, str, int]] = []
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get("cardId"), str):
+                self.send_error_json(400, "Cada repaso debe tener un cardId")
+                return
+            if entry.get("delta") not in (-1, 1):
+                self.send_error_json(400, "El campo delta debe ser -1 o 1")
+                return
+            ts = entry.get("ts")
+            if ts is not None and (isinstance(ts, bool) or not isinstance(ts, (int, float))):
+                self.send_error_json(400, "El campo ts debe ser numérico")
+                return
+            reviews.append((ts, entry["cardId"], int(entry["delta"])))
+        if all(ts is not None for ts, _, _ in reviews):
+            # Offline clients may flush out of order; replay in answer order.
+            reviews.sort(key=lambda review: review[0])
+
+        key = self.headers.get("Idempotency-Key") or body.get("idempotencyKey")
+        if key is not None and not isinstance(key, str):
+            self.send_error_json(400, "La clave de idempotencia debe ser texto")
+            return
+
+        try:
+            result, replayed = get_store().apply_reviews(
+                deck_id, [(card_id, delta) for _, card_id, delta in reviews], idempotency_key=key
+            )
+        except KeyError as exc:
+            self.send_error_json(404, f"Tarjeta no encontrada: {exc.args[0]}")
+            return
+        if result is None:
+            self.send_error_json(404, "Mazo no encontrado")
+            return
+        self.send_json({**result, "replayed": replayed})
+
     def handle_api_delete(self) -> None:
         match = re.fullmatch(r"/api/decks/([\w-]+)", self.path)
         if not match:
             self.send_error_json(404, "Ruta no encontrada")
             return
         deck_id = match.group(1)
-        deck, decks = find_deck(deck_id)
-        if deck is None:
+        if not get_store().remove_deck(deck_id):
             self.send_error_json(404, "Mazo no encontrado")
             return
-        decks = [d for d in decks if d["id"] != deck_id]
-        save_decks(decks)
         self.send_json({"message": "Mazo eliminado"})
 
     def handle_api_patch(self) -> None:
@@ -633,40 +4068,666 @@ class DeckHandler(SimpleHTTPRequestHandler):
             self.send_error_json(400, "El campo delta debe ser -1 o 1")
             return
 
-        deck, decks = find_deck(deck_id)
-        if deck is None:
+        store = get_store()
+        found, card = store.apply_review(deck_id, card_id, int(delta))
+        if not found:
             self.send_error_json(404, "Mazo no encontrado")
             return
-
-        card = next((c for c in deck["cards"] if c["id"] == card_id), None)
         if card is None:
             self.send_error_json(404, "Tarjeta no encontrada")
             return
 
-        card["aciertos"] += int(delta)
-        save_decks(decks)
-        updated_deck = {
-            "id": deck["id"],
-            "name": deck["name"],
-            "cardCount": len(deck.get("cards", [])),
-            "pendingPoints": calculate_pending_points(deck),
-            **calculate_card_progress(deck),
-        }
-        self.send_json({"card": card, "deck": updated_deck})
+        self.send_json({"card": card, "deck": store.summary(deck_id)})
+
+
+class DeckHTTPServer(ThreadingHTTPServer):
+    # The socketserver default backlog of 5 resets connections as soon as a few
+    # students click at the same time.
+    request_queue_size = 128
+
+
+class _BridgeReader:
+    """Blocking ``rfile`` for a handler thread over a request read by the event loop.
+
+    The request head was already read by the loop; the body, ``body_length``
+    bytes at most, is pulled from the connection on demand.
+    """
+
+    def __init__(self, head: bytes, reader: asyncio.StreamReader, body_length: int, loop: asyncio.AbstractEventLoop) -> None:
+        self._head = BytesIO(head)
+        self._reader = reader
+        self._loop = loop
+        self.remaining = body_length
+
+    def readline(self, limit: int = -1) -> bytes:
+        return self._head.readline(limit)
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        if size <= 0:
+            return b""
+        try:
+            data = _run_on_loop(self._reader.readexactly(size), self._loop)
+        except asyncio.IncompleteReadError as exc:
+            data = exc.partial
+        self.remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        pass
+
+
+class _BridgeWriter:
+    """Blocking ``wfile`` for a handler thread that sends through the event loop.
+
+    Writes are coalesced and sent when ``UPLOAD_CHUNK_SIZE`` bytes pile up or on
+    :meth:`flush`, so a typical response costs a single hop to the loop.
+    """
+
+    closed = False
+
+    def __init__(self, writer: asyncio.StreamWriter, loop: asyncio.AbstractEventLoop) -> None:
+        self._writer = writer
+        self._loop = loop
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    def write(self, data: bytes) -> int:
+        self._buffer.append(bytes(data))
+        self._buffered += len(data)
+        if self._buffered >= UPLOAD_CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if not self._buffered:
+            return
+        data = b"".join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        _run_on_loop(self._send(data), self._loop)
+
+    async def _send(self, data: bytes) -> None:
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def close(self) -> None:
+        self.flush()
+
+
+def _run_on_loop(coro: Any, loop: asyncio.AbstractEventLoop) -> Any:
+    """Run ``coro`` on ``loop`` from another thread and wait for its result."""
+    try:
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+    except RuntimeError as exc:  # the loop is closed
+        coro.close()
+        raise ConnectionError(str(exc)) from exc
+    try:
+        return future.result(ASYNC_IO_TIMEOUT)
+    except TimeoutError as exc:
+        future.cancel()
+        raise ConnectionError("La conexión no respondió a tiempo") from exc
+
+
+def _content_length(head: bytes) -> int:
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            try:
+                return max(0, int(value.strip()))
+            except ValueError:
+                return 0
+    return 0
+
+
+class AsyncRequestMixin:
+    """Lets a :class:`DeckHandler` serve one request handed over by :class:`AsyncDeckServer`.
+
+    ``request`` is the ``(rfile, wfile)`` pair bridging to the event loop. The
+    handler answers in HTTP/1.1, so the connection stays open unless the client
+    or the response asks to close it.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        self.rfile, raw = self.request  # type: ignore[attr-defined]
+        self.wfile = CountingWriter(raw)
+        self.connection_header_sent = False
+
+    def handle(self) -> None:
+        self.close_connection = True
+        self.handle_one_request()  # type: ignore[attr-defined]
+
+    def finish(self) -> None:
+        self.wfile.flush()
+
+    def handle_expect_100(self) -> bool:
+        result = super().handle_expect_100()  # type: ignore[misc]
+        self.wfile.flush()
+        return result
+
+    def send_header(self, keyword: str, value: str) -> None:
+        if keyword.lower() == "connection":
+            self.connection_header_sent = True
+        super().send_header(keyword, value)  # type: ignore[misc]
+
+    def end_headers(self) -> None:
+        # The server closes the connection when the handler asked for it or
+        # left part of the body unread; tell the client before it reuses it.
+        final = self.response_status is not None  # type: ignore[attr-defined]
+        if final and (self.close_connection or self.rfile.remaining) and not self.connection_header_sent:
+            self.send_header("Connection", "close")
+        super().end_headers()  # type: ignore[misc]
+
+
+class AsyncDeckServer:
+    """HTTP/1.1 server on asyncio that runs each request's handler on a thread pool.
+
+    The event loop owns the connections: it waits for request heads, keeps
+    idle connections open for ``keepalive_timeout`` seconds and serves
+    pipelined requests in order, so a waiting client costs a coroutine rather
+    than a thread. Handlers, and with them every storage call, run on at most
+    ``workers`` threads and reach the socket through :class:`_BridgeReader`
+    and :class:`_BridgeWriter`; further requests wait for a free thread.
+
+    Mirrors the ``socketserver`` API used by :func:`run_server`: construct,
+    ``serve_forever()``, then ``shutdown()`` from another thread (or SIGTERM /
+    SIGINT when serving from the main thread) and ``server_close()``. An
+    already listening ``sock`` may be passed instead of binding a new one.
+    """
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        handler_class: type,
+        workers: int = ASYNC_WORKERS,
+        keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+        sock: Optional[socket.socket] = None,
+    ) -> None:
+        self.handler_class = type(f"Async{handler_class.__name__}", (AsyncRequestMixin, handler_class), {})
+        self.keepalive_timeout = keepalive_timeout
+        if sock is None:
+            sock = socket.create_server(server_address, backlog=DeckHTTPServer.request_queue_size)
+        self.socket = sock
+        self.server_address = self.socket.getsockname()[:2]
+        self._executor = ThreadPoolExecutor(max(1, workers), thread_name_prefix="deck-async")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._connections: Dict["asyncio.Task[None]", bool] = {}
+        self._running = threading.Event()
+        self._stopped = threading.Event()
+        self._stopped.set()
+
+    def __enter__(self) -> "AsyncDeckServer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.server_close()
+
+    def serve_forever(self) -> None:
+        self._stopped.clear()
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._stopped.set()
+
+    def shutdown(self) -> None:
+        """Stop :meth:`serve_forever`, letting requests in progress finish."""
+        while not self._running.wait(0.05):
+            if self._stopped.is_set():
+                return
+        loop, stop = self._loop, self._stop
+        if loop is not None and stop is not None:
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(stop.set)
+        self._stopped.wait()
+
+    def server_close(self) -> None:
+        self.socket.close()
+        self._executor.shutdown(wait=True)
+
+    async def _serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._stop = asyncio.Event()
+        signals = []
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                with suppress(NotImplementedError, RuntimeError):
+                    loop.add_signal_handler(signum, self._stop.set)
+                    signals.append(signum)
+        server = await asyncio.start_server(self._serve_connection, sock=self.socket, limit=MAX_REQUEST_HEAD)
+        self._running.set()
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            # Idle connections go now; busy ones finish their current request.
+            for task, busy in list(self._connections.items()):
+                if not busy:
+                    task.cancel()
+            if self._connections:
+                await asyncio.wait(list(self._connections), timeout=ASYNC_SHUTDOWN_GRACE)
+            for signum in signals:
+                loop.remove_signal_handler(signum)
+            self._running.clear()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[task] = False
+        peer = writer.get_extra_info("peername") or ("", 0)
+        try:
+            while not self._stop.is_set():  # type: ignore[union-attr]
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+                except asyncio.LimitOverrunError:
+                    writer.write(
+                        b"HTTP/1.1 431 Request Header Fields Too Large\r\n"
+                        b"Content-Length: 0\r\nConnection: close\r\n\r\n"
+                    )
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                rfile = _BridgeReader(head, reader, _content_length(head), loop)
+                wfile = _BridgeWriter(writer, loop)
+                self._connections[task] = True
+                handler = await loop.run_in_executor(self._executor, self._handle, rfile, wfile, peer)
+                self._connections[task] = False
+                # A body the handler did not read would be taken for the next request.
+                if handler is None or handler.close_connection or rfile.remaining:
+                    break
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+            with suppress(ConnectionError, asyncio.CancelledError):
+                await writer.wait_closed()
+
+    def _handle(self, rfile: _BridgeReader, wfile: _BridgeWriter, peer: Tuple[str, int]) -> Optional[Any]:
+        try:
+            return self.handler_class((rfile, wfile), peer, self)
+        except ConnectionError:
+            return None
+        except Exception as exc:  # pragma: no cover - keep the connection loop alive
+            sys.stderr.write(f"Error al atender la petición de {peer[0]}: {exc!r}\n")
+            return None
+
+
+def _raise_keyboard_interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+class StoreCoordinator:
+    """State the worker processes of a :class:`PreforkDeckServer` share.
+
+    Lives in the process that owns the store. Workers publish their metrics
+    registry and the progress of their background imports here, so
+    ``/api/metrics`` and ``/api/jobs/{id}`` give the same answer whichever
+    worker takes the request.
+    """
+
+    def __init__(self, history: int = IMPORT_JOB_HISTORY) -> None:
+        self.history = max(1, history)
+        self._lock = threading.Lock()
+        self._metrics: Dict[int, MetricsSnapshot] = {}
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def publish_metrics(self, worker: int, snapshot: MetricsSnapshot) -> None:
+        # Snapshots are cumulative, so the last one of a worker that exited
+        # keeps counting the requests it served.
+        with self._lock:
+            self._metrics[worker] = snapshot
+
+    def render_metrics(self) -> str:
+        """The owner's metrics (storage phases) plus those of every worker."""
+        merged = Metrics()
+        merged.merge(get_metrics().snapshot())
+        with self._lock:
+            snapshots = list(self._metrics.values())
+        for snapshot in snapshots:
+            merged.merge(snapshot)
+        return merged.render()
+
+    def publish_job(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = job
+            finished = [job_id for job_id, entry in self._jobs.items() if entry["finishedAt"] is not None]
+            for job_id in finished[: max(0, len(self._jobs) - self.history)]:
+                del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+# Proxy to the owner's coordinator, set in pre-fork worker processes only.
+_coordinator: Optional[StoreCoordinator] = None
+
+
+class PooledProxy(BaseProxy):
+    """A manager proxy whose calls share connections between threads.
+
+    :class:`BaseProxy` opens, and authenticates, one connection per thread,
+    which in the threaded server means one per request. Here a call borrows an
+    idle connection from the proxy's pool and returns it afterwards, so a
+    worker keeps as many connections as it has concurrent store calls.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._idle: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+
+    def _open(self) -> Any:
+        conn = self._Client(self._token.address, authkey=self._authkey)
+        dispatch(conn, None, "accept_connection", (f"{multiprocessing.current_process().name}|pool",))
+        return conn
+
+    def _callmethod(self, methodname: str, args: Tuple[Any, ...] = (), kwds: Optional[Dict[str, Any]] = None) -> Any:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            conn.send((self._id, methodname, args, kwds or {}))
+            kind, result = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+        self._idle.put(conn)
+        if kind == "#RETURN":
+            return result
+        raise convert_to_error(kind, result)
+
+
+def _pooled_proxy_type(name: str, exposed: Tuple[str, ...]) -> type:
+    # MakeProxyType supplies one method per exposed name; PooledProxy, first in
+    # the MRO, supplies the _callmethod they go through.
+    return type(name, (PooledProxy, MakeProxyType(f"{name}Methods", exposed)), {})
+
+
+# Only calls whose arguments and results are small: whole decks stay in the owner.
+StoreProxy = _pooled_proxy_type(
+    "StoreProxy",
+    (
+        "add_decks",
+        "apply_review",
+        "apply_reviews",
+        "encoded_deck",
+        "encoded_summaries",
+        "export_cards",
+        "export_header",
+        "get_card",
+        "next_card",
+        "page_cards",
+        "remove_deck",
+        "search",
+        "summary",
+    ),
+)
+CoordinatorProxy = _pooled_proxy_type(
+    "CoordinatorProxy", ("get_job", "publish_job", "publish_metrics", "render_metrics")
+)
+
+
+class StoreManager(BaseManager):
+    """Hands the owner's :class:`DeckStore` and :class:`StoreCoordinator` to worker processes.
+
+    Workers ``connect()`` and get proxies whose method calls run in the owner,
+    so each one goes through the same locks, journal and write-behind flush
+    as in a single process. The proxies only expose methods with small
+    results and share their connections between the worker's threads.
+    """
+
+
+StoreManager.register("store", proxytype=StoreProxy)
+StoreManager.register("coordinator", proxytype=CoordinatorProxy)
+
+
+def _publish_worker_metrics(stop: threading.Event) -> None:
+    while not stop.wait(WORKER_PUBLISH_INTERVAL):
+        try:
+            _coordinator.publish_metrics(os.getpid(), get_metrics().snapshot())  # type: ignore[union-attr]
+        except (OSError, EOFError):
+            return
+
+
+def _run_worker(
+    sock: socket.socket, address: str, authkey: bytes, handler_class: type, server_mode: str, import_workers: int
+) -> None:
+    """Entry point of a :class:`PreforkDeckServer` worker process."""
+    global _store, _coordinator, IMPORT_WORKERS
+    IMPORT_WORKERS = import_workers
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    manager = StoreManager(address=address, authkey=authkey)
+    manager.connect()
+    _store = manager.store()  # type: ignore[attr-defined]
+    _coordinator = manager.coordinator()  # type: ignore[attr-defined]
+    get_static_assets().preload()
+    server_address = sock.getsockname()[:2]
+    server: Any
+    if server_mode == "async":
+        server = AsyncDeckServer(server_address, handler_class, sock=sock)
+    else:
+        server = DeckHTTPServer(server_address, handler_class, bind_and_activate=False)
+        server.socket.close()
+        server.socket = sock
+    stop = threading.Event()
+    threading.Thread(target=_publish_worker_metrics, args=(stop,), name="deck-metrics", daemon=True).start()
+    try:
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        shutdown_import_jobs()
+        shutdown_import_pool()
+
+
+class PreforkDeckServer:
+    """Serves HTTP from ``workers`` processes that share one listening socket.
+
+    This process owns the store: it loads, flushes and backs it up exactly as
+    in the single-process modes, and serves it, together with a
+    :class:`StoreCoordinator`, through a :class:`StoreManager` on a private
+    Unix socket. Each worker runs a ``server_mode`` server on the shared
+    socket and reaches the store through proxies, so request parsing,
+    encoding and imports spread over the cores while every read and write is
+    still applied by the owner. Workers are spawned rather than forked, for
+    the same reason as the import pool, and one that dies is replaced.
+
+    Mirrors the ``socketserver`` API used by :func:`run_server`.
+    """
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        handler_class: type,
+        workers: int = WORKER_PROCESSES,
+        server_mode: str = SERVER_MODE,
+    ) -> None:
+        self.handler_class = handler_class
+        self.workers = max(1, workers)
+        self.server_mode = server_mode
+        # Each worker has its own import pool; together they stay within IMPORT_WORKERS.
+        self.import_workers = max(1, IMPORT_WORKERS // self.workers)
+        self.socket = socket.create_server(server_address, backlog=DeckHTTPServer.request_queue_size)
+        # Every worker polls this socket; those that lose the race for a
+        # connection must get EAGAIN instead of blocking in accept().
+        self.socket.setblocking(False)
+        self.server_address = self.socket.getsockname()[:2]
+        self.coordinator = StoreCoordinator()
+        self.processes: List[Any] = []
+        self._authkey = os.urandom(32)
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="deck-")
+        manager_class = type("OwnerStoreManager", (StoreManager,), {})
+        manager_class.register("store", callable=get_store, proxytype=StoreProxy)
+        manager_class.register("coordinator", callable=lambda: self.coordinator, proxytype=CoordinatorProxy)
+        address = os.path.join(self._tmpdir.name, "store.sock")
+        self._manager = manager_class(address=address, authkey=self._authkey).get_server()
+        # Normally created by Server.serve_forever(), which cannot be stopped
+        # without exiting the process; connections are served until it is set.
+        self._manager.stop_event = threading.Event()
+        self._closing = False
+        self._accepter = threading.Thread(target=self._accept_workers, name="deck-coordinator", daemon=True)
+        self._accepter.start()
+        self._shutdown = threading.Event()
+        self._stopped = threading.Event()
+        self._stopped.set()
+
+    def __enter__(self) -> "PreforkDeckServer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.server_close()
+
+    def _accept_workers(self) -> None:
+        while True:
+            try:
+                connection = self._manager.listener.accept()
+            except OSError:
+                if self._closing:
+                    return
+                continue
+            if self._closing:
+                connection.close()
+                return
+            threading.Thread(target=self._manager.handle_request, args=(connection,), daemon=True).start()
+
+    def _spawn(self, index: int) -> Any:
+        process = multiprocessing.get_context("spawn").Process(
+            target=_run_worker,
+            args=(
+                self.socket,
+                self._manager.address,
+                self._authkey,
+                self.handler_class,
+                self.server_mode,
+                self.import_workers,
+            ),
+            name=f"deck-worker-{index}",
+        )
+        process.start()
+        return process
+
+    def serve_forever(self) -> None:
+        self._stopped.clear()
+        try:
+            self.processes = [self._spawn(index) for index in range(self.workers)]
+            while not self._shutdown.wait(0.5):
+                for index, process in enumerate(self.processes):
+                    if process.exitcode is not None:
+                        sys.stderr.write(f"El proceso {process.name} terminó con código {process.exitcode}; se reinicia\n")
+                        self.processes[index] = self._spawn(index)
+        finally:
+            self._stop_workers()
+            self._stopped.set()
+
+    def _stop_workers(self) -> None:
+        # SIGTERM lets each worker finish its requests and imports while the
+        # store is still being served.
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + ASYNC_SHUTDOWN_GRACE
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self.processes = []
+
+    def shutdown(self) -> None:
+        """Stop :meth:`serve_forever` once every worker has exited."""
+        self._shutdown.set()
+        self._stopped.wait()
+
+    def server_close(self) -> None:
+        self.socket.close()
+        self._manager.stop_event.set()
+        self._closing = True
+        with suppress(OSError), socket.socket(socket.AF_UNIX) as wake:
+            wake.connect(self._manager.address)
+        self._accepter.join()
+        self._manager.listener.close()
+        self._tmpdir.cleanup()
 
 
 def run_server(host: str = "0.0.0.0", port: int = 8000) -> None:
+    if SERVER_MODE not in SERVER_MODES:
+        raise ValueError(f"Modo de servidor desconocido: {SERVER_MODE}")
     ensure_database()
     CLIENT_DIR.mkdir(parents=True, exist_ok=True)
+    store = get_store()
+    store.start()
+    get_static_assets().preload()
+    if threading.current_thread() is threading.main_thread():
+        # Render/Railway stop services with SIGTERM; treat it like Ctrl+C so
+        # pending changes are flushed before exiting.
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
     handler = DeckHandler
-    with ThreadingHTTPServer((host, port), handler) as httpd:
-        print(f"Servidor iniciado en http://{host}:{port}")
+    server_class: Any = AsyncDeckServer if SERVER_MODE == "async" else DeckHTTPServer
+    if WORKER_PROCESSES > 1:
+        server_class = PreforkDeckServer
+    try:
+        with server_class((host, port), handler) as httpd:
+            print(f"Servidor iniciado en http://{host}:{port}")
+            try:
+                httpd.serve_forever()
+            except KeyboardInterrupt:
+                print("\nServidor detenido")
+    finally:
+        # Let running imports reach the store before its final flush.
+        shutdown_import_jobs()
+        shutdown_import_pool()
+        store.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor de mazos de estudio.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("serve", help="inicia el servidor (opción por defecto)")
+    commands.add_parser("snapshots", help="lista las copias de seguridad")
+    commands.add_parser("stats", help="muestra las estadísticas de cada mazo leyendo solo las puntuaciones")
+    restore = commands.add_parser("restore", help="restaura una copia de seguridad con el servidor detenido")
+    restore.add_argument("snapshot", nargs="?", help="identificador de la copia (por defecto, la más reciente)")
+    convert = commands.add_parser("convert", help="reescribe db.json en otro formato")
+    convert.add_argument("format", choices=DB_FORMATS)
+    convert.add_argument("--input", type=Path, help="archivo de origen (por defecto, db.json)")
+    convert.add_argument("--output", type=Path, help="archivo de destino (por defecto, el de origen)")
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshots":
+        for snapshot in SnapshotArchive(BACKUP_DIR).list():
+            print(f"{snapshot['id']}  {snapshot['deckCount']} mazos  {snapshot['cardCount']} tarjetas")
+        return 0
+    if args.command == "stats":
+        for deck in read_deck_stats():
+            print(
+                f"{deck['id']}  {deck['name']}  {deck['cardCount']} tarjetas  "
+                f"{deck['successCount']} acertadas  {deck['toReviewCount']} por repasar"
+            )
+        return 0
+    if args.command == "restore":
         try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\nServidor detenido")
+            restored = restore_snapshot(args.snapshot)
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        print(f"Base de datos restaurada desde la copia {restored}")
+        return 0
+    if args.command == "convert":
+        convert_database(args.format, args.input, args.output)
+        print(f"{args.output or args.input or DB_PATH} convertido a {args.format}")
+        return 0
+
+    run_server(port=int(os.environ.get("PORT", "8000")))
+    return 0
 
 
 if __name__ == "__main__":
-    port = int(os.environ.get("PORT", "8000"))
-    run_server(port=port)
+    sys.exit(main())
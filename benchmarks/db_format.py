@@ -0,0 +1,60 @@
+"""Compare the on-disk database formats: size, write time, load time.
+
+Usage::
+
+    python benchmarks/db_format.py --decks 20 --cards 5000
+
+"scores" is the time to read card ids and scores only (``read_deck_scores``),
+which the columnar layouts answer from their first line.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import app
+from synthetic import make_database
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--decks", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=5000, help="cards per deck")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_database(args.decks, args.cards)
+    formats = [("indent=2 (original)", None), *[(name, name) for name in app.DB_FORMATS]]
+    print(f"{'format':<20} {'size KiB':>10} {'write ms':>10} {'load ms':>10} {'scores ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "db.json"
+        for label, db_format in formats:
+            if db_format is None:
+                encode = lambda: json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")  # noqa: E731
+            else:
+                encode = lambda: app.encode_database(data, db_format)  # noqa: E731
+            write = best_of(args.repeat, lambda: path.write_bytes(encode()))
+            load = best_of(args.repeat, lambda: app._read_json_database(path))
+            scores = best_of(args.repeat, lambda: app.read_deck_scores(path))
+            assert app._read_json_database(path) == data
+            print(
+                f"{label:<20} {path.stat().st_size / 1024:>10.0f} {write * 1000:>10.1f}"
+                f" {load * 1000:>10.1f} {scores * 1000:>10.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
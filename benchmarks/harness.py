@@ -0,0 +1,238 @@
+"""Helpers to run the backend against a throwaway data directory.
+
+Run as a script (``python benchmarks/harness.py serve --data-dir DIR``) it
+starts the real ``run_server`` on that directory, which is how
+:func:`server_process` measures the server apart from the load generator.
+"""
+
+import argparse
+import json
+import os
+import resource
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.client import HTTPConnection
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "src"))
+
+import app  # noqa: E402
+
+PATCHED_GLOBALS = ("DATA_DIR", "DB_PATH", "BACKUP_DIR", "JOURNAL_PATH", "SQLITE_PATH", "_store", "_storage")
+
+
+class QuietDeckHandler(app.DeckHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def use_data_dir(data_dir: Path, storage: str = "json") -> None:
+    """Point the app's paths and storage at ``data_dir``."""
+    app.DATA_DIR = data_dir
+    app.DB_PATH = data_dir / "db.json"
+    app.BACKUP_DIR = data_dir / "backups"
+    app.JOURNAL_PATH = data_dir / "db.journal"
+    app.SQLITE_PATH = data_dir / "db.sqlite3"
+    app._store = None
+    app._storage = app.create_storage(storage)
+
+
+def seed_database(data_dir: Path, database: Dict[str, Any], storage: str = "json") -> None:
+    """Save ``database`` into ``data_dir`` through a DeckStore, as the server itself would."""
+    originals = {name: getattr(app, name) for name in PATCHED_GLOBALS}
+    data_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        use_data_dir(data_dir, storage)
+        store = app.DeckStore(storage=app._storage)
+        store.load()
+        store.replace_decks(database["decks"])
+        store.close()
+    finally:
+        for name, value in originals.items():
+            setattr(app, name, value)
+
+
+@contextmanager
+def temporary_data_dir(database: Optional[Dict[str, Any]] = None, storage: str = "json") -> Iterator[Path]:
+    """Point the app at a temporary data directory seeded with ``database``."""
+    originals = {name: getattr(app, name) for name in PATCHED_GLOBALS}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        use_data_dir(data_dir, storage)
+        if database is not None:
+            seed_database(data_dir, database, storage)
+        try:
+            yield data_dir
+        finally:
+            if app._store is not None:
+                app._store.close()
+            for name, value in originals.items():
+                setattr(app, name, value)
+
+
+@contextmanager
+def running_server(database: Optional[Dict[str, Any]] = None, storage: str = "json") -> Iterator[str]:
+    """Start a threaded DeckHandler server and yield its base URL."""
+    with temporary_data_dir(database, storage):
+        store = app.get_store()
+        store.start()
+        server = app.DeckHTTPServer(("127.0.0.1", 0), QuietDeckHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_address[1]}"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float, process: Optional[subprocess.Popen] = None) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fetch_json(f"{base_url}/api/decks")
+            return
+        except (OSError, RuntimeError):
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"the server exited with status {process.returncode}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"the server did not answer within {timeout:.0f} s")
+            time.sleep(0.05)
+
+
+@dataclass
+class ServerProcess:
+    base_url: str
+    process: subprocess.Popen
+    peak_rss_mb: Optional[float] = None
+
+
+@contextmanager
+def server_process(
+    database: Optional[Dict[str, Any]] = None,
+    storage: str = "json",
+    env: Optional[Dict[str, str]] = None,
+    ready_timeout: float = 120.0,
+) -> Iterator[ServerProcess]:
+    """Run ``app.run_server`` in a child process against a temporary data directory.
+
+    The server is stopped with SIGTERM, like the hosting platforms do, and
+    reports its peak RSS on the way out (``peak_rss_mb``).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        if database is not None:
+            seed_database(data_dir, database, storage)
+        port = free_port()
+        command = [sys.executable, __file__, "serve", "--data-dir", tmp, "--storage", storage, "--port", str(port)]
+        process = subprocess.Popen(
+            command,
+            env={**os.environ, "DECK_STORAGE": storage, **(env or {})},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        server = ServerProcess(f"http://127.0.0.1:{port}", process)
+        try:
+            wait_until_ready(server.base_url, ready_timeout, process)
+            yield server
+        finally:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+            output, _ = process.communicate(timeout=120)
+            for line in output.splitlines():
+                if line.startswith("{"):
+                    server.peak_rss_mb = json.loads(line).get("peak_rss_mb")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def encode_multipart(fields: List[Tuple[str, Optional[str], bytes]]) -> Tuple[bytes, Dict[str, str]]:
+    """Encode ``(name, filename, content)`` fields as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, filename, content in fields:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        parts.append(f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode("utf-8") + content + b"\r\n")
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode("utf-8")
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarise(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 0.5) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+    }
+
+
+def timed_request(connection: HTTPConnection, method: str, path: str, body: Optional[bytes] = None,
+                  headers: Optional[Dict[str, str]] = None) -> float:
+    started = time.perf_counter()
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    response.read()
+    elapsed = time.perf_counter() - started
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path} -> {response.status}")
+    if response.will_close:
+        connection.close()
+    return elapsed
+
+
+def fetch_json(url: str) -> Any:
+    try:
+        with urllib.request.urlopen(url) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as exc:  # pragma: no cover - surfaced to the caller
+        raise RuntimeError(f"GET {url} -> {exc.code}") from exc
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the deck server on a given data directory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve")
+    serve.add_argument("--data-dir", type=Path, required=True)
+    serve.add_argument("--storage", choices=("json", "sqlite"), default="json")
+    serve.add_argument("--port", type=int, required=True)
+    args = parser.parse_args()
+
+    use_data_dir(args.data_dir, args.storage)
+    app.run_server("127.0.0.1", args.port)
+    print(json.dumps({"peak_rss_mb": round(peak_rss_mb(), 1)}), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Drive the backend with concurrent clients and report latency, throughput and memory.
+
+Usage::
+
+    python benchmarks/load_test.py --decks 20 --cards 2000 --clients 8 --duration 10
+    python benchmarks/load_test.py --output results.json
+    python benchmarks/load_test.py --baseline benchmarks/baseline.json
+    python benchmarks/load_test.py --server async --baseline benchmarks/baseline.json
+    python benchmarks/load_test.py --workers 4 --server async
+
+A synthetic database is written to a temporary directory and served by the
+real ``run_server`` in a child process (see ``harness.server_process``).
+Client threads then pick operations at random according to ``--mix``:
+
+* ``list``: ``GET /api/decks``
+* ``fetch``: ``GET /api/decks/{id}``
+* ``patch``: ``PATCH /api/decks/{id}/cards/{cardId}``
+* ``upload``: ``POST /api/decks`` with a generated JSON or XLSX file of
+  ``--upload-rows`` cards (``--upload-format``)
+
+Clients keep their connection open whenever the server allows it, which
+only the ``async`` server mode (``DECK_SERVER``) does. ``--workers`` serves
+from that many processes (``DECK_WORKERS``); the reported peak RSS is then
+the one of the process that owns the store.
+
+Requests issued during ``--warmup`` are not counted. The report gives
+p50/p99 latency and requests per second per operation and overall, plus the
+server's peak RSS. ``--output`` writes it as JSON. ``--baseline`` compares
+against such a file and exits with status 1 if throughput dropped or p99
+latency grew by more than ``--tolerance``, so two branches can be compared
+by running the same command on each.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlparse
+
+from harness import encode_multipart, fetch_json, server_process, summarise
+from synthetic import make_cards_json, make_database, make_xlsx
+
+OPERATIONS = ("list", "fetch", "patch", "upload")
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class LoadClient(threading.Thread):
+    """One client: a connection of its own and a random walk over the operation mix."""
+
+    def __init__(self, index: int, base_url: str, workload: "Workload", start_at: float, stop_at: float) -> None:
+        super().__init__(name=f"load-client-{index}", daemon=True)
+        self.rng = random.Random(index)
+        self.url = urlparse(base_url)
+        self.workload = workload
+        self.start_at = start_at
+        self.stop_at = stop_at
+        self.samples: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+        self.errors: Dict[str, int] = {name: 0 for name in OPERATIONS}
+
+    def run(self) -> None:
+        connection = HTTPConnection(self.url.hostname, self.url.port, timeout=60)
+        names = list(self.workload.mix)
+        weights = list(self.workload.mix.values())
+        while True:
+            started = time.perf_counter()
+            if started >= self.stop_at:
+                break
+            name = self.rng.choices(names, weights)[0]
+            method, path, body, headers = self.workload.request(name, self.rng)
+            ok = True
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status < 400
+                if response.will_close:
+                    connection.close()
+            except OSError:
+                ok = False
+                connection.close()
+            elapsed = time.perf_counter() - started
+            if started < self.start_at:
+                continue
+            if ok:
+                self.samples[name].append(elapsed)
+            else:
+                self.errors[name] += 1
+        connection.close()
+
+
+class Workload:
+    """The requests each operation sends, built from the seeded database."""
+
+    def __init__(self, database: Dict[str, Any], mix: Dict[str, float], uploads: List[Tuple[str, bytes]]) -> None:
+        self.mix = mix
+        self.decks = [(deck["id"], [card["id"] for card in deck["cards"]]) for deck in database["decks"]]
+        self.uploads = uploads
+
+    def request(self, name: str, rng: random.Random) -> Tuple[str, str, Any, Dict[str, str]]:
+        if name == "list":
+            return "GET", "/api/decks", None, {}
+        deck_id, card_ids = rng.choice(self.decks)
+        if name == "fetch":
+            return "GET", f"/api/decks/{deck_id}", None, {}
+        if name == "patch":
+            body = json.dumps({"delta": rng.choice((-1, 1))}).encode("utf-8")
+            return "PATCH", f"/api/decks/{deck_id}/cards/{rng.choice(card_ids)}", body, {"Content-Type": "application/json"}
+        filename, content = rng.choice(self.uploads)
+        body, headers = encode_multipart([("name", None, b"Carga"), ("file", filename, content)])
+        return "POST", "/api/decks", body, headers
+
+
+def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    database = make_database(args.decks, args.cards, seed=args.seed)
+    uploads = []
+    if args.upload_format in ("json", "both"):
+        uploads.append(("carga.json", make_cards_json(args.upload_rows, seed=args.seed)))
+    if args.upload_format in ("xlsx", "both"):
+        uploads.append(("carga.xlsx", make_xlsx(args.upload_rows, seed=args.seed)))
+    workload = Workload(database, args.mix, uploads)
+
+    env = {
+        "DECK_FLUSH_INTERVAL": str(args.flush_interval),
+        "DECK_SERVER": args.server,
+        "DECK_WORKERS": str(args.workers),
+    }
+    with server_process(database, storage=args.storage, env=env) as server:
+        start_at = time.perf_counter() + args.warmup
+        stop_at = start_at + args.duration
+        clients = [LoadClient(i, server.base_url, workload, start_at, stop_at) for i in range(args.clients)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        deck_count = len(fetch_json(f"{server.base_url}/api/decks")["decks"])
+    operations = {}
+    for name in args.mix:
+        samples = [sample for client in clients for sample in client.samples[name]]
+        stats = summarise(samples)
+        stats["errors"] = sum(client.errors[name] for client in clients)
+        stats["rps"] = len(samples) / args.duration
+        operations[name] = {key: round(value, 3) for key, value in stats.items()}
+    total = sum(op["count"] for op in operations.values())
+    return {
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "decks", "cards", "clients", "duration", "warmup", "upload_rows", "upload_format", "storage", "server",
+                "workers", "seed",
+            )
+        }
+        | {"mix": args.mix},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "operations": operations,
+        "total": {
+            "count": total,
+            "errors": sum(op["errors"] for op in operations.values()),
+            "rps": round(total / args.duration, 1),
+        },
+        "peak_rss_mb": server.peak_rss_mb,
+        "final_deck_count": deck_count,
+    }
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(f"{'operation':<10} {'count':>8} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, stats in results["operations"].items():
+        print(
+            f"{name:<10} {stats['count']:>8.0f} {stats['errors']:>7.0f} {stats['rps']:>9.1f}"
+            f" {stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+    total = results["total"]
+    print(f"{'total':<10} {total['count']:>8} {total['errors']:>7} {total['rps']:>9.1f}")
+    print(f"server peak RSS: {results['peak_rss_mb']} MiB")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print the change against ``baseline`` and return the regressions found."""
+    if baseline.get("config") != results["config"]:
+        print("warning: the baseline was recorded with a different configuration")
+    regressions = []
+    print(f"\n{'vs baseline':<12} {'req/s':>9} {'p50':>8} {'p99':>8}")
+    for name, stats in results["operations"].items():
+        base = baseline.get("operations", {}).get(name)
+        if not base:
+            continue
+        changes = [
+            stats[key] / base[key] - 1 if base[key] else 0.0 for key in ("rps", "p50_ms", "p99_ms")
+        ]
+        print(f"{name:<12} {changes[0]:>+9.0%} {changes[1]:>+8.0%} {changes[2]:>+8.0%}")
+        if changes[0] < -tolerance:
+            regressions.append(f"{name}: req/s {base['rps']} -> {stats['rps']}")
+        if changes[2] > tolerance:
+            regressions.append(f"{name}: p99 {base['p99_ms']} ms -> {stats['p99_ms']} ms")
+    base_total = baseline.get("total", {}).get("rps")
+    if base_total and results["total"]["rps"] / base_total - 1 < -tolerance:
+        regressions.append(f"total: req/s {base_total} -> {results['total']['rps']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--decks", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=2000, help="cards per deck")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds of unmeasured load first")
+    parser.add_argument("--mix", type=parse_mix, default="list=1,fetch=2,patch=6,upload=1",
+                        help="operation weights, e.g. list=1,fetch=2,patch=6,upload=1")
+    parser.add_argument("--upload-rows", type=int, default=500)
+    parser.add_argument("--upload-format", choices=("json", "xlsx", "both"), default="both")
+    parser.add_argument("--storage", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--server", choices=("threaded", "async"), default="threaded", help="DECK_SERVER mode")
+    parser.add_argument("--workers", type=int, default=1, help="DECK_WORKERS server processes")
+    parser.add_argument("--flush-interval", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = run_load(args)
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+            fh.write("\n")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        if regressions:
+            print("\nregressions beyond {:.0%}:".format(args.tolerance))
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Measure PATCH /api/decks/{id}/cards/{card} latency as the deck grows.
+
+Usage::
+
+    python benchmarks/review_latency.py --cards 100 --cards 10000 --cards 100000
+
+With card lookups indexed, p50 should stay flat across deck sizes.
+"""
+
+import argparse
+import json
+import random
+import sys
+from http.client import HTTPConnection
+from urllib.parse import urlparse
+
+from harness import running_server, summarise, timed_request
+from synthetic import make_database
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, action="append", help="cards in the deck (repeatable)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--storage", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args()
+
+    print(f"{'cards':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for size in args.cards or [100, 1_000, 10_000, 100_000]:
+        database = make_database(1, size)
+        deck = database["decks"][0]
+        card_ids = [card["id"] for card in deck["cards"]]
+        rng = random.Random(size)
+        with running_server(database, storage=args.storage) as base_url:
+            url = urlparse(base_url)
+            samples = []
+            connection = HTTPConnection(url.hostname, url.port)
+            for _ in range(args.requests):
+                body = json.dumps({"delta": rng.choice((-1, 1))}).encode("utf-8")
+                samples.append(
+                    timed_request(
+                        connection,
+                        "PATCH",
+                        f"/api/decks/{deck['id']}/cards/{rng.choice(card_ids)}",
+                        body,
+                        {"Content-Type": "application/json"},
+                    )
+                )
+            connection.close()
+        stats = summarise(samples)
+        print(f"{size:>8} {stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
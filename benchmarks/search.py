@@ -0,0 +1,57 @@
+"""Measure building the card search index and querying it.
+
+Usage::
+
+    python benchmarks/search.py --decks 100 --cards 10000
+
+Builds a :class:`SearchIndex` over ``decks * cards`` synthetic cards, then
+times a mix of exact, multi-term and type-ahead prefix queries (the last
+term of a query is matched as a prefix, as in ``GET /api/search``) and
+reports p50/p99 per query.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from harness import app, summarise
+from synthetic import WORDS, make_database
+
+QUERIES = ["danke", "Tschüss", "strasse", "d", "ma", "gracias 12", "hallo 9", "zeit 4999", "nichts"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--decks", type=int, default=100)
+    parser.add_argument("--cards", type=int, default=10_000, help="cards per deck")
+    parser.add_argument("--repeat", type=int, default=200, help="runs of each query")
+    parser.add_argument("--limit", type=int, default=app.SEARCH_LIMIT)
+    args = parser.parse_args()
+
+    decks = make_database(args.decks, args.cards)["decks"]
+    started = time.perf_counter()
+    index = app.SearchIndex()
+    index.reset(decks)
+    build = time.perf_counter() - started
+    print(f"indexed {len(index)} cards in {build:.1f} s")
+
+    # Type-ahead: every prefix of a random word, as a user would type it.
+    word = app.fold_text(random.Random(1).choice(WORDS))
+    queries = QUERIES + [word[:length] for length in range(1, len(word) + 1)]
+
+    print(f"{'query':<14} {'matches':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for query in queries:
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            matches, has_more = index.search(query, args.limit)
+            samples.append(time.perf_counter() - started)
+        stats = summarise(samples)
+        shown = f"{len(matches)}{'+' if has_more else ''}"
+        print(f"{query:<14} {shown:>8} {stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
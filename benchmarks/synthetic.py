@@ -0,0 +1,171 @@
+"""Synthetic data generators shared by the benchmark scripts."""
+
+import json
+import random
+import uuid
+import zipfile
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+WORDS = [
+    "Hallo", "Danke", "Bitte", "Tschüss", "Straße", "Mädchen", "Brötchen", "Apfel",
+    "Haus", "Buch", "Schule", "Freund", "Wasser", "Zeit", "Arbeit", "Größe",
+]
+TRANSLATIONS = [
+    "Hola", "Gracias", "Por favor", "Adiós", "Calle", "Niña", "Panecillo", "Manzana",
+    "Casa", "Libro", "Escuela", "Amigo", "Agua", "Tiempo", "Trabajo", "Tamaño",
+]
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    "{sheets}"
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    "</Types>"
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+
+def column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def _sheet_xml(rows: int, columns: int, rng: random.Random, shared: Dict[str, int]) -> bytes:
+    def shared_index(text: str) -> int:
+        if text not in shared:
+            shared[text] = len(shared)
+        return shared[text]
+
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    ]
+    # Header row with a duplicate and a blank name to exercise header allocation.
+    headers = ["Wort", "Übersetzung", "Wort", ""] + [f"Extra {i}" for i in range(max(0, columns - 4))]
+    header_cells = "".join(
+        f'<c r="{column_letter(i)}1" t="s"><v>{shared_index(name)}</v></c>'
+        for i, name in enumerate(headers[:columns])
+        if name
+    )
+    parts.append(f'<row r="1">{header_cells}</row>')
+    for row in range(2, rows + 2):
+        cells = []
+        for col in range(columns):
+            ref = f"{column_letter(col)}{row}"
+            kind = (row + col) % 6
+            if kind == 0:
+                cells.append(f'<c r="{ref}" t="s"><v>{shared_index(rng.choice(WORDS))}</v></c>')
+            elif kind == 1:
+                cells.append(f'<c r="{ref}" t="s"><v>{shared_index(rng.choice(TRANSLATIONS))}</v></c>')
+            elif kind == 2:
+                cells.append(f'<c r="{ref}"><v>{rng.randint(-500, 5000)}</v></c>')
+            elif kind == 3:
+                cells.append(f'<c r="{ref}"><v>{rng.random() * 100:.4f}</v></c>')
+            elif kind == 4:
+                cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(rng.choice(WORDS))} {row}</t></is></c>')
+            else:
+                cells.append(f'<c r="{ref}" t="b"><v>{row % 2}</v></c>')
+        parts.append(f'<row r="{row}">{"".join(cells)}</row>')
+    parts.append("</sheetData></worksheet>")
+    return "".join(parts).encode("utf-8")
+
+
+def make_xlsx(rows: int, columns: int = 6, sheets: int = 1, seed: int = 1234,
+              sheet_names: Optional[List[str]] = None) -> bytes:
+    """Build a workbook with ``rows`` data rows (plus a header row) per sheet."""
+    rng = random.Random(seed)
+    shared: Dict[str, int] = {}
+    names = sheet_names or [f"Tema {i + 1}" for i in range(sheets)]
+    sheet_payloads = [_sheet_xml(rows, columns, rng, shared) for _ in names]
+
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+        + "".join(
+            f'<sheet name="{escape(name)}" sheetId="{i + 1}" r:id="rId{i + 1}"/>' for i, name in enumerate(names)
+        )
+        + "</sheets></workbook>"
+    )
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + "".join(
+            f'<Relationship Id="rId{i + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i + 1}.xml"/>'
+            for i in range(len(names))
+        )
+        + "</Relationships>"
+    )
+    strings = sorted(shared.items(), key=lambda item: item[1])
+    shared_xml = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{len(strings)}" '
+        f'uniqueCount="{len(strings)}">'
+        + "".join(f"<si><t>{escape(text)}</t></si>" for text, _ in strings)
+        + "</sst>"
+    )
+    sheet_overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i + 1}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(len(names))
+    )
+
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES.format(sheets=sheet_overrides))
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", workbook)
+        zf.writestr("xl/_rels/workbook.xml.rels", rels)
+        zf.writestr("xl/sharedStrings.xml", shared_xml)
+        for i, payload in enumerate(sheet_payloads):
+            zf.writestr(f"xl/worksheets/sheet{i + 1}.xml", payload)
+    return buffer.getvalue()
+
+
+def make_cards_json(cards: int, seed: int = 1234) -> bytes:
+    rng = random.Random(seed)
+    entries = [
+        {"frente": f"{rng.choice(WORDS)} {i}", "traduccion": rng.choice(TRANSLATIONS)} for i in range(cards)
+    ]
+    return json.dumps(entries, ensure_ascii=False).encode("utf-8")
+
+
+def make_database(decks: int, cards_per_deck: int, seed: int = 1234) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    return {
+        "decks": [
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "name": f"Mazo {d + 1}",
+                "cards": [
+                    {
+                        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                        "aciertos": rng.randint(-3, 3),
+                        "contenido": {"frente": f"{rng.choice(WORDS)} {c}", "traduccion": rng.choice(TRANSLATIONS)},
+                    }
+                    for c in range(cards_per_deck)
+                ],
+            }
+            for d in range(decks)
+        ]
+    }
@@ -0,0 +1,87 @@
+"""Microbenchmark of the XLSX cell hot path against the original implementation.
+
+Usage::
+
+    python benchmarks/xlsx_cells.py --rows 20000 --columns 8 --max-ratio 0.8
+
+Every cell of a synthetic worksheet is decoded with ``_parse_cell_value`` and
+``_column_index`` from both the original parser (``legacy_xlsx``, whose results
+tests/test_backend_xlsx.py compares with the current ones) and the current one.
+The script exits with status 1 when the current code is slower than
+``--max-ratio`` times the original, so it can guard against regressions in CI.
+"""
+
+import argparse
+import sys
+import time
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, List
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests" / "helpers"))
+
+import app  # noqa: E402
+import legacy_xlsx  # noqa: E402
+from synthetic import make_xlsx  # noqa: E402
+
+
+def load_cells(rows: int, columns: int) -> tuple:
+    with zipfile.ZipFile(BytesIO(make_xlsx(rows, columns=columns))) as zf:
+        shared_strings = app._load_shared_strings(zf)
+        sheet = ET.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+    cells = list(sheet.iter(app._CELL_TAG))
+    return cells, shared_strings
+
+
+def decode_all(
+    cells: List[ET.Element],
+    shared_strings: List[str],
+    parse_value: Callable[[ET.Element, List[str]], Any],
+    column_index: Callable[[str], int],
+) -> List[Any]:
+    return [(column_index(cell.attrib.get("r", "")), parse_value(cell, shared_strings)) for cell in cells]
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ratio", type=float, default=1.0, help="fail if current/original exceeds this")
+    args = parser.parse_args()
+
+    cells, shared_strings = load_cells(args.rows, args.columns)
+    implementations = {
+        "original": (legacy_xlsx._parse_cell_value, legacy_xlsx._column_index),
+        "current": (app._parse_cell_value, app._column_index),
+    }
+    timings = {
+        name: best_of(args.repeat, lambda funcs=funcs: decode_all(cells, shared_strings, *funcs))
+        for name, funcs in implementations.items()
+    }
+    print(f"{len(cells)} celdas")
+    for name, elapsed in timings.items():
+        print(f"{name:>9} {elapsed:>8.3f} s {elapsed / len(cells) * 1e9:>8.0f} ns/celda")
+    ratio = timings["current"] / timings["original"]
+    print(f"{'ratio':>9} {ratio:>8.2f}")
+    if ratio > args.max_ratio:
+        print(f"Regresión: la implementación actual supera {args.max_ratio:.2f}x la original")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
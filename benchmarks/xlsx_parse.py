@@ -0,0 +1,59 @@
+"""Compare time and peak memory of the XLSX parser against the original one.
+
+Usage::
+
+    python benchmarks/xlsx_parse.py --rows 20000 --rows 100000
+
+Each workbook is generated in memory and parsed by both implementations;
+tests/test_backend_xlsx.py checks that they produce the same cards.
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend" / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests" / "helpers"))
+
+import app  # noqa: E402
+import legacy_xlsx  # noqa: E402
+from synthetic import make_xlsx  # noqa: E402
+
+
+def measure(parse: Callable[[bytes], List[Dict[str, Any]]], raw: bytes) -> Tuple[float, int]:
+    # Time and memory are measured in separate runs: tracemalloc slows the
+    # parser down by an order of magnitude.
+    gc.collect()
+    started = time.perf_counter()
+    parse(raw)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    parse(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, action="append", help="data rows per workbook (repeatable)")
+    parser.add_argument("--columns", type=int, default=6)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'parser':>9} {'seconds':>9} {'peak MiB':>9}")
+    for rows in args.rows or [10_000, 50_000]:
+        raw = make_xlsx(rows, columns=args.columns)
+        for name, parse in (("original", legacy_xlsx.parse_xlsx_cards), ("current", app.parse_xlsx_cards)):
+            elapsed, peak = measure(parse, raw)
+            print(f"{rows:>8} {name:>9} {elapsed:>9.3f} {peak / 2**20:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -97,6 +97,7 @@ const translations = {
             cancel: 'Cancelar',
             submit: 'Guardar mazo',
             uploading: 'Subiendo mazo...',
+            processing: ({ rows }) => `Procesando mazo... ${rows} filas leídas`,
             success: 'Mazo creado con éxito',
         },
         theme: {
@@ -170,6 +171,7 @@ const translations = {
             cancel: 'Cancel',
             submit: 'Save deck',
             uploading: 'Uploading deck...',
+            processing: ({ rows }) => `Processing deck... ${rows} rows read`,
             success: 'Deck created successfully',
         },
         theme: {
@@ -231,11 +233,6 @@ function storeLanguage(language) {
     }
 }
 
-function normaliseScore(value) {
-    const number = Number(value);
-    return Number.isFinite(number) ? number : 0;
-}
-
 function getTranslationValue(language, pathParts) {
     const source = translations[language];
     if (!source) return undefined;
@@ -439,6 +436,18 @@ async function fetchJSON(url, options = {}) {
     return response.json();
 }
 
+const JOB_POLL_INTERVAL_MS = 500;
+
+async function waitForImportJob(location, onProgress) {
+    for (;;) {
+        const job = await fetchJSON(location, { cache: 'no-store' });
+        if (job.status === 'done') return job;
+        if (job.status === 'failed') throw new Error(job.error);
+        onProgress(job);
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+}
+
 async function loadDecks() {
     const data = await fetchJSON('/api/decks');
     state.decks = data.decks;
@@ -485,51 +494,54 @@ function renderDeckList() {
     });
 }
 
-function shuffle(array) {
-    const copy = array.slice();
-    for (let i = copy.length - 1; i > 0; i -= 1) {
-        const j = Math.floor(Math.random() * (i + 1));
-        [copy[i], copy[j]] = [copy[j], copy[i]];
+function createSessionId() {
+    if (typeof crypto !== 'undefined' && typeof crypto.randomUUID === 'function') {
+        return crypto.randomUUID();
     }
-    return copy;
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
 }
 
-function buildRoundCards(cards, { prioritizeNegative = false } = {}) {
-    const shuffled = shuffle(cards);
-    if (!prioritizeNegative) return shuffled;
-    const negativeIndex = shuffled.findIndex((card) => normaliseScore(card.aciertos) < 0);
-    if (negativeIndex > 0) {
-        const [negativeCard] = shuffled.splice(negativeIndex, 1);
-        shuffled.unshift(negativeCard);
-    }
-    return shuffled;
+async function fetchNextCard(session, { restart = false } = {}) {
+    const params = new URLSearchParams({ session: session.id });
+    if (restart) params.set('restart', '1');
+    const next = await fetchJSON(`/api/decks/${session.deckId}/next?${params}`);
+    session.card = next.card;
+    session.finished = next.done;
+    session.round = next.round;
+    session.step = next.step;
+    session.roundSize = next.roundSize;
+    session.toReviewCount = next.toReviewCount;
 }
 
-function startSession(deck) {
-    const cards = deck.cards.map((card) => ({ ...card, contenido: { ...card.contenido } }));
-    const roundCards = buildRoundCards(cards, { prioritizeNegative: true });
-    lastRenderedCardId = null;
-    state.session = {
+async function startSession(deck) {
+    // The server picks each card, so the deck itself is never downloaded.
+    const session = {
+        id: createSessionId(),
         deckId: deck.id,
         deckName: deck.name,
-        cards,
-        roundCards,
-        index: 0,
-        finished: roundCards.length === 0,
+        card: null,
+        finished: false,
+        answered: 0,
         round: 1,
+        step: 0,
+        roundSize: 0,
+        toReviewCount: 0,
     };
+    await fetchNextCard(session, { restart: true });
+    lastRenderedCardId = null;
+    state.session = session;
     switchView('session');
     renderSession();
 }
 
 function currentCard() {
     if (!state.session || state.session.finished) return null;
-    return state.session.roundCards[state.session.index] || null;
+    return state.session.card || null;
 }
 
 function updateSessionSubtitle() {
     if (!state.session) return;
-    const negatives = state.session.cards.filter((card) => normaliseScore(card.aciertos) < 0).length;
+    const negatives = state.session.toReviewCount;
     const roundLabel =
         negatives > 0
             ? translate('session.negativeReview', { count: negatives })
@@ -575,7 +587,7 @@ function renderSession() {
         elements.cardView.classList.add('hidden');
         elements.sessionActions.classList.add('hidden');
         elements.sessionMessage.classList.remove('hidden');
-        elements.sessionMessage.textContent = translate('session.completed');
+        elements.sessionMessage.textContent = translate(session.answered > 0 ? 'session.allPositive' : 'session.completed');
         return;
     }
 
@@ -585,8 +597,8 @@ function renderSession() {
     elements.markCorrect.disabled = false;
     elements.markIncorrect.disabled = false;
     elements.cardStep.textContent = translate('session.step', {
-        index: session.index + 1,
-        total: session.roundCards.length,
+        index: session.step,
+        total: session.roundSize,
     });
     renderCard(card);
 }
@@ -596,8 +608,8 @@ async function handleDeckAction(event) {
     if (!target) return;
     const { action, id } = target.dataset;
     if (action === 'view') {
-        const deck = await fetchJSON(`/api/decks/${id}`);
-        startSession(deck);
+        const deck = state.decks.find((d) => d.id === id);
+        if (deck) await startSession(deck);
     } else if (action === 'delete') {
         if (!confirm(translate('deck.actions.confirmDelete'))) return;
         await fetchJSON(`/api/decks/${id}`, { method: 'DELETE' });
@@ -605,27 +617,6 @@ async function handleDeckAction(event) {
     }
 }
 
-function advanceSession() {
-    const session = state.session;
-    if (!session) return;
-    session.index += 1;
-    if (session.index >= session.roundCards.length) {
-        const negatives = session.cards.filter((card) => normaliseScore(card.aciertos) < 0);
-        if (negatives.length === 0) {
-            session.finished = true;
-            elements.sessionMessage.classList.remove('hidden');
-            elements.sessionMessage.textContent = translate('session.allPositive');
-            elements.cardView.classList.add('hidden');
-            elements.sessionActions.classList.add('hidden');
-            return;
-        }
-        session.round += 1;
-        session.roundCards = buildRoundCards(negatives, { prioritizeNegative: true });
-        session.index = 0;
-    }
-    renderSession();
-}
-
 async function registerAnswer(delta) {
     const session = state.session;
     const card = currentCard();
@@ -641,13 +632,7 @@ async function registerAnswer(delta) {
             },
             body: JSON.stringify({ delta }),
         });
-        const updated = data.card;
-        const replace = (collection) => {
-            const idx = collection.findIndex((c) => c.id === updated.id);
-            if (idx >= 0) collection[idx] = { ...collection[idx], ...updated };
-        };
-        replace(session.cards);
-        replace(session.roundCards);
+        session.answered += 1;
         if (data.deck) {
             const deckIndex = state.decks.findIndex((d) => d.id === data.deck.id);
             if (deckIndex >= 0) {
@@ -655,7 +640,8 @@ async function registerAnswer(delta) {
             }
             renderDeckList();
         }
-        advanceSession();
+        await fetchNextCard(session);
+        if (state.session === session) renderSession();
         interactionLocked = false;
     } catch (error) {
         alert(error.message);
@@ -842,11 +828,15 @@ function setupEventListeners() {
         const formData = new FormData(elements.deckForm);
         elements.deckFormFeedback.textContent = translate('deckForm.uploading');
         try {
-            const data = await fetchJSON('/api/decks', {
+            // Imports run as background jobs so large workbooks do not hit proxy timeouts.
+            const data = await fetchJSON('/api/decks?async=1', {
                 method: 'POST',
                 body: formData,
             });
-            state.decks.push(data.deck);
+            const job = await waitForImportJob(`/api/jobs/${data.job.id}`, ({ rowsParsed }) => {
+                elements.deckFormFeedback.textContent = translate('deckForm.processing', { rows: rowsParsed });
+            });
+            state.decks.push(job.deck);
             renderDeckList();
             elements.deckFormFeedback.textContent = translate('deckForm.success');
             setTimeout(() => toggleOverlay(false), 800);
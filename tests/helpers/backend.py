@@ -0,0 +1,129 @@
+import json
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+import uuid
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend" / "src"))
+
+import app  # noqa: E402
+
+PATCHED_GLOBALS = ("DATA_DIR", "DB_PATH", "BACKUP_DIR", "JOURNAL_PATH", "SQLITE_PATH", "_store", "_storage")
+
+
+def multipart(fields: List[Tuple[str, Optional[str], bytes]]) -> Tuple[bytes, Dict[str, str]]:
+    """Encode ``(name, filename, content)`` fields as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, filename, content in fields:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        parts.append(f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode("utf-8") + content + b"\r\n")
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode("utf-8")
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def make_workbook(sheets: Dict[str, List[List[str]]]) -> bytes:
+    """Build a minimal .xlsx whose cells are all shared strings."""
+    main = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    rel = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    strings: Dict[str, int] = {}
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        entries, rels = [], []
+        for number, (name, rows) in enumerate(sheets.items(), start=1):
+            row_xml = "".join(
+                f'<row r="{r}">'
+                + "".join(
+                    f'<c r="{chr(65 + c)}{r}" t="s"><v>{strings.setdefault(value, len(strings))}</v></c>'
+                    for c, value in enumerate(row)
+                )
+                + "</row>"
+                for r, row in enumerate(rows, start=1)
+            )
+            zf.writestr(f"xl/worksheets/sheet{number}.xml", f'<worksheet xmlns="{main}"><sheetData>{row_xml}</sheetData></worksheet>')
+            entries.append(f'<sheet name="{name}" sheetId="{number}" r:id="rId{number}"/>')
+            rels.append(f'<Relationship Id="rId{number}" Target="worksheets/sheet{number}.xml"/>')
+        zf.writestr("xl/workbook.xml", f'<workbook xmlns="{main}" xmlns:r="{rel}"><sheets>{"".join(entries)}</sheets></workbook>')
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(rels)
+            + "</Relationships>",
+        )
+        shared = "".join(f"<si><t>{value}</t></si>" for value in strings)
+        zf.writestr("xl/sharedStrings.xml", f'<sst xmlns="{main}">{shared}</sst>')
+    return buffer.getvalue()
+
+
+class QuietDeckHandler(app.DeckHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class BackendTestCase(unittest.TestCase):
+    """Runs a DeckHandler server on a free port against a temporary data directory."""
+
+    storage_kind = "json"
+    store_options: Dict[str, Any] = {}
+    server_class: Any = app.DeckHTTPServer
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmp.name)
+        self.originals = {name: getattr(app, name) for name in PATCHED_GLOBALS}
+        app.DATA_DIR = self.data_dir
+        app.DB_PATH = self.data_dir / "db.json"
+        app.BACKUP_DIR = self.data_dir / "backups"
+        app.JOURNAL_PATH = self.data_dir / "db.journal"
+        app.SQLITE_PATH = self.data_dir / "db.sqlite3"
+
+        self.storage = app.create_storage(self.storage_kind)
+        app._storage = self.storage
+        self.store = app.DeckStore(storage=self.storage, **self.store_options)
+        self.store.load()
+        app._store = self.store
+        self.store.start()
+
+        self.server = self.server_class(("127.0.0.1", 0), QuietDeckHandler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+        for name, value in self.originals.items():
+            setattr(app, name, value)
+        self.tmp.cleanup()
+
+    def add_deck(self, deck_id: str = "deck-1", cards: int = 4) -> Dict[str, Any]:
+        deck = {
+            "id": deck_id,
+            "name": f"Mazo {deck_id}",
+            "cards": [{"id": f"card-{i}", "aciertos": 0, "contenido": {"n": i}} for i in range(cards)],
+        }
+        self.store.add_deck(deck)
+        return deck
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Any] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        data = body if isinstance(body, bytes) or body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(f"{self.base_url}{path}", data=data, method=method, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, dict(response.headers), response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, dict(exc.headers), exc.read()
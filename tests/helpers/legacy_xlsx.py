@@ -0,0 +1,203 @@
+"""Reference copy of the original tree-based XLSX parser.
+
+Kept verbatim (apart from this docstring and the imports) so the tests can check
+that the current parser produces the same cards, and the benchmarks can compare
+their speed.
+"""
+
+import re
+import uuid
+import zipfile
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+import xml.etree.ElementTree as ET
+
+SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def _load_shared_strings(zf: zipfile.ZipFile) -> List[str]:
+    try:
+        data = zf.read("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    tree = ET.fromstring(data)
+    ns = {"main": SPREADSHEET_NS}
+    strings: List[str] = []
+    for entry in tree.findall("main:si", ns):
+        parts = [node.text or "" for node in entry.findall(".//main:t", ns)]
+        strings.append("".join(parts))
+    return strings
+
+
+def _column_index(cell_ref: str) -> int:
+    letters = [ch for ch in cell_ref if ch.isalpha()]
+    if not letters:
+        return 0
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch.upper()) - ord("A") + 1)
+    return index - 1
+
+
+def _parse_cell_value(cell: ET.Element, shared_strings: List[str]) -> Any:
+    ns = {"main": SPREADSHEET_NS}
+    cell_type = cell.attrib.get("t")
+    if cell_type == "inlineStr":
+        parts = [node.text or "" for node in cell.findall("main:is//main:t", ns)]
+        return "".join(parts)
+    value_node = cell.find("main:v", ns)
+    if cell_type == "s":
+        if value_node is None:
+            return ""
+        try:
+            idx = int(value_node.text or "0")
+        except ValueError:
+            return ""
+        if 0 <= idx < len(shared_strings):
+            return shared_strings[idx]
+        return ""
+    if cell_type == "b":
+        return "TRUE" if value_node is not None and value_node.text == "1" else "FALSE"
+    if value_node is None:
+        return ""
+    text = value_node.text or ""
+    stripped = text.strip()
+    if stripped == "":
+        return ""
+    if re.fullmatch(r"-?\d+", stripped):
+        if stripped.startswith("0") and len(stripped) > 1:
+            return stripped
+        try:
+            return int(stripped)
+        except ValueError:
+            return stripped
+    if re.fullmatch(r"-?\d+\.\d+", stripped):
+        try:
+            return float(stripped)
+        except ValueError:
+            return stripped
+    return stripped
+
+
+def _normalise_sheet_target(target: str) -> str:
+    cleaned = target.lstrip("/")
+    while cleaned.startswith("../"):
+        cleaned = cleaned[3:]
+    if not cleaned.startswith("xl/"):
+        cleaned = f"xl/{cleaned}"
+    return cleaned
+
+
+def parse_xlsx_cards(raw: bytes) -> List[Dict[str, Any]]:
+    try:
+        zf = zipfile.ZipFile(BytesIO(raw))
+    except zipfile.BadZipFile as exc:
+        raise ValueError("El archivo Excel (.xlsx) es inválido o está dañado") from exc
+
+    with zf:
+        try:
+            workbook_data = zf.read("xl/workbook.xml")
+        except KeyError as exc:
+            raise ValueError("El archivo Excel no contiene un libro de trabajo válido") from exc
+
+        workbook = ET.fromstring(workbook_data)
+        ns = {"main": SPREADSHEET_NS, "r": DOC_REL_NS}
+        sheet = workbook.find("main:sheets/main:sheet", ns)
+        if sheet is None:
+            raise ValueError("El archivo Excel no contiene hojas de cálculo")
+        rel_id = sheet.attrib.get(f"{{{DOC_REL_NS}}}id")
+        if not rel_id:
+            raise ValueError("No se pudo determinar la hoja principal del Excel")
+
+        try:
+            rels_data = zf.read("xl/_rels/workbook.xml.rels")
+        except KeyError as exc:
+            raise ValueError("El archivo Excel no contiene relaciones de libro válidas") from exc
+
+        rels = ET.fromstring(rels_data)
+        rels_ns = {"rel": REL_NS}
+        sheet_target: Optional[str] = None
+        for rel in rels.findall("rel:Relationship", rels_ns):
+            if rel.attrib.get("Id") == rel_id:
+                sheet_target = rel.attrib.get("Target")
+                break
+        if not sheet_target:
+            raise ValueError("No se pudo encontrar la hoja de cálculo referenciada en el Excel")
+
+        sheet_path = _normalise_sheet_target(sheet_target)
+        try:
+            sheet_data = zf.read(sheet_path)
+        except KeyError as exc:
+            raise ValueError("No se pudo leer la hoja de cálculo principal del Excel") from exc
+
+        sheet_tree = ET.fromstring(sheet_data)
+        sheet_ns = {"main": SPREADSHEET_NS}
+        rows = sheet_tree.findall("main:sheetData/main:row", sheet_ns)
+        if not rows:
+            raise ValueError("El archivo Excel no contiene filas de datos")
+
+        shared_strings = _load_shared_strings(zf)
+        header_map: Dict[int, str] = {}
+        header_counts: Dict[str, int] = {}
+
+        def allocate_header_name(base: str, col_index: int) -> str:
+            name_base = base.strip() if isinstance(base, str) else ""
+            if not name_base:
+                name_base = f"Columna {col_index + 1}"
+            count = header_counts.get(name_base, 0)
+            header_counts[name_base] = count + 1
+            if count == 0:
+                return name_base
+            return f"{name_base} ({count + 1})"
+
+        def register_header(col_index: int, base_name: Any) -> None:
+            header_map[col_index] = allocate_header_name(str(base_name) if base_name is not None else "", col_index)
+
+        def ensure_header(col_index: int) -> str:
+            if col_index not in header_map:
+                header_map[col_index] = allocate_header_name("", col_index)
+            return header_map[col_index]
+
+        cards: List[Dict[str, Any]] = []
+
+        for idx, row in enumerate(rows):
+            cells: Dict[int, Any] = {}
+            for cell in row.findall("main:c", sheet_ns):
+                ref = cell.attrib.get("r", "")
+                column = _column_index(ref)
+                cells[column] = _parse_cell_value(cell, shared_strings)
+
+            if idx == 0:
+                if not cells:
+                    raise ValueError("La primera fila del Excel debe contener encabezados")
+                for col in sorted(cells):
+                    register_header(col, cells[col])
+                continue
+
+            if not cells:
+                continue
+
+            card_content: Dict[str, Any] = {}
+            for col_index in sorted(cells):
+                header = ensure_header(col_index)
+                value = cells[col_index]
+                if value in ("", None):
+                    continue
+                card_content[header] = value
+
+            if not card_content:
+                continue
+
+            cards.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "aciertos": 0,
+                    "contenido": card_content,
+                }
+            )
+
+        if not cards:
+            raise ValueError("El archivo Excel no contiene tarjetas después de la fila de encabezados")
+        return cards
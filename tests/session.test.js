@@ -0,0 +1,82 @@
+import test from 'node:test';
+import assert from 'node:assert/strict';
+import path from 'node:path';
+import { pathToFileURL } from 'node:url';
+import { setupTestEnvironment } from './helpers/fake-dom.js';
+
+const modulePath = path.resolve('client/main.js');
+
+async function importFreshModule() {
+  const url = `${pathToFileURL(modulePath).href}?t=${Math.random()}`;
+  return import(url);
+}
+
+function respond(payload) {
+  return { ok: true, json: async () => payload };
+}
+
+let env;
+let requests;
+
+test.beforeEach(() => {
+  env = setupTestEnvironment();
+  global.window = env.window;
+  global.document = env.document;
+  global.localStorage = env.localStorage;
+  global.requestAnimationFrame = env.window.requestAnimationFrame;
+  global.window.__LERNDEUTSH_TEST__ = true;
+  requests = [];
+});
+
+test.afterEach(() => {
+  delete global.window;
+  delete global.document;
+  delete global.localStorage;
+  delete global.requestAnimationFrame;
+  delete global.fetch;
+  env = null;
+});
+
+test('study session asks the server for each card instead of downloading the deck', async () => {
+  const next = [
+    { card: { id: 'c1', aciertos: 0, contenido: { de: 'Hallo' } }, done: false, round: 1, step: 1, roundSize: 2, toReviewCount: 0 },
+    { card: { id: 'c2', aciertos: -1, contenido: { de: 'Danke' } }, done: false, round: 1, step: 2, roundSize: 2, toReviewCount: 1 },
+    { card: null, done: true, round: 1, step: 2, roundSize: 2, toReviewCount: 0 }
+  ];
+  global.fetch = async (url, options = {}) => {
+    requests.push({ url, method: options.method || 'GET' });
+    if (url === '/api/decks') return respond({ decks: [{ id: 'deck-1', name: 'Saludos', cardCount: 2 }] });
+    if (url.startsWith('/api/decks/deck-1/next?')) return respond(next.shift());
+    return respond({ card: { id: 'c1', aciertos: 1 }, deck: { id: 'deck-1', name: 'Saludos' } });
+  };
+  const mod = await importFreshModule();
+  await mod.init();
+
+  const button = { dataset: { action: 'view', id: 'deck-1' } };
+  const [viewDeck] = env.elements.deckGrid._listeners.get('click');
+  await viewDeck({ target: { closest: () => button } });
+  assert.equal(env.elements.sessionTitle.textContent, 'Saludos');
+  assert.equal(env.elements.cardStep.textContent, mod.translate('session.step', { index: 1, total: 2 }));
+
+  const [answerCorrect] = env.elements.markCorrect._listeners.get('click');
+  answerCorrect();
+  await new Promise((resolve) => setTimeout(resolve, 200));
+  assert.equal(env.elements.sessionSubtitle.textContent, mod.translate('session.negativeReview', { count: 1 }));
+
+  const [answerIncorrect] = env.elements.markIncorrect._listeners.get('click');
+  answerIncorrect();
+  await new Promise((resolve) => setTimeout(resolve, 200));
+  assert.equal(env.elements.sessionMessage.textContent, mod.translate('session.allPositive'));
+
+  const urls = requests.map(({ method, url }) => `${method} ${url}`);
+  assert.ok(!urls.includes('GET /api/decks/deck-1'));
+  const sessions = new Set(
+    urls.filter((url) => url.includes('/next?')).map((url) => new URL(url.split(' ')[1], 'http://x').searchParams.get('session'))
+  );
+  assert.equal(sessions.size, 1);
+  assert.ok(urls.some((url) => url.includes('/next?') && url.includes('restart=1')));
+  assert.deepEqual(
+    urls.filter((url) => url.startsWith('PATCH')),
+    ['PATCH /api/decks/deck-1/cards/c1', 'PATCH /api/decks/deck-1/cards/c2']
+  );
+});
@@ -0,0 +1,333 @@
+import gzip
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app  # noqa: E402
+
+
+class DeckCachingTest(BackendTestCase):
+    def test_deck_etag_revalidates_until_the_deck_changes(self) -> None:
+        self.add_deck("deck-1")
+        status, headers, body = self.request("GET", "/api/decks/deck-1")
+        self.assertEqual(status, 200)
+        etag = headers["ETag"]
+        self.assertEqual(json.loads(body)["id"], "deck-1")
+
+        status, headers, body = self.request("GET", "/api/decks/deck-1", headers={"If-None-Match": etag})
+        self.assertEqual((status, body), (304, b""))
+        self.assertEqual(headers["ETag"], etag)
+
+        self.request("PATCH", "/api/decks/deck-1/cards/card-0", {"delta": 1})
+        status, headers, body = self.request("GET", "/api/decks/deck-1", headers={"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["ETag"], etag)
+        self.assertEqual(json.loads(body)["cards"][0]["aciertos"], 1)
+
+    def test_listing_etag_changes_when_any_deck_changes(self) -> None:
+        self.add_deck("deck-1")
+        _, headers, _ = self.request("GET", "/api/decks")
+        etag = headers["ETag"]
+        status, _, _ = self.request("GET", "/api/decks", headers={"If-None-Match": f'W/{etag}, "other"'})
+        self.assertEqual(status, 304)
+
+        self.add_deck("deck-2")
+        status, headers, body = self.request("GET", "/api/decks", headers={"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertEqual([deck["id"] for deck in json.loads(body)["decks"]], ["deck-1", "deck-2"])
+
+
+class CompressionTest(BackendTestCase):
+    def test_large_json_and_static_files_are_gzipped_when_accepted(self) -> None:
+        self.add_deck("deck-1", cards=200)
+        status, headers, body = self.request("GET", "/api/decks/deck-1", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(body))["cards"]), 200)
+
+        status, headers, body = self.request("GET", "/api/decks/deck-1")
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertEqual(len(json.loads(body)["cards"]), 200)
+
+        status, headers, body = self.request("GET", "/main.js", headers={"Accept-Encoding": "br, gzip;q=0.5"})
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertIn(b"translations", gzip.decompress(body))
+
+    def test_refused_codings_are_not_used(self) -> None:
+        for header, expected in (
+            ("gzip", True),
+            ("*", True),
+            ("br, GZIP ; q=0.2", True),
+            ("*;q=0.5, gzip;q=0", False),
+            ("gzip;q=0, *", False),
+            ("*;q=0", False),
+            ("identity, br", False),
+            ("gzip;q=nope", False),
+        ):
+            with self.subTest(header=header):
+                self.assertEqual(app._accepts_gzip(header), expected)
+
+        status, headers, _ = self.request("GET", "/main.js", headers={"Accept-Encoding": "*;q=0.5, gzip;q=0"})
+        self.assertEqual(status, 200)
+        self.assertNotIn("Content-Encoding", headers)
+
+    def test_gzipped_static_files_answer_conditional_requests(self) -> None:
+        accept = {"Accept-Encoding": "gzip"}
+        status, headers, _ = self.request("GET", "/main.js", headers=accept)
+        self.assertEqual(status, 200)
+        etag, last_modified = headers["ETag"], headers["Last-Modified"]
+        self.assertFalse(etag.startswith("W/"))
+
+        status, headers, body = self.request("GET", "/main.js", headers={**accept, "If-None-Match": etag})
+        self.assertEqual((status, body, headers["ETag"]), (304, b"", etag))
+        status, _, body = self.request("GET", "/main.js", headers={**accept, "If-Modified-Since": last_modified})
+        self.assertEqual((status, body), (304, b""))
+
+        # A validator that does not match wins over a date that would.
+        status, _, _ = self.request(
+            "GET", "/main.js", headers={**accept, "If-None-Match": '"other"', "If-Modified-Since": last_modified}
+        )
+        self.assertEqual(status, 200)
+        status, _, _ = self.request(
+            "GET", "/main.js", headers={**accept, "If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}
+        )
+        self.assertEqual(status, 200)
+
+
+class CardPageTest(BackendTestCase):
+    def fetch_all(self, query: str) -> list:
+        cards, cursor = [], "0"
+        while cursor is not None:
+            status, _, body = self.request("GET", f"/api/decks/deck-1/cards?{query}&cursor={cursor}")
+            self.assertEqual(status, 200)
+            page = json.loads(body)
+            cards.extend(page["cards"])
+            cursor = page["nextCursor"]
+        return cards
+
+    def test_cursor_pagination_with_status_filter_and_projection(self) -> None:
+        deck = self.add_deck("deck-1", cards=25)
+        for card in deck["cards"]:
+            card["contenido"]["extra"] = "x"
+        for i in (3, 7, 20):
+            self.request("PATCH", f"/api/decks/deck-1/cards/card-{i}", {"delta": -1})
+        self.request("PATCH", "/api/decks/deck-1/cards/card-7", {"delta": 1})
+        self.request("PATCH", "/api/decks/deck-1/cards/card-7", {"delta": 1})
+
+        everything = self.fetch_all("limit=4")
+        self.assertEqual([card["id"] for card in everything], [f"card-{i}" for i in range(25)])
+
+        to_review = self.fetch_all("limit=1&status=toReview&fields=n")
+        self.assertEqual([card["id"] for card in to_review], ["card-3", "card-20"])
+        self.assertEqual(to_review[0]["contenido"], {"n": 3})
+
+        status, _, body = self.request("GET", "/api/decks/deck-1/cards?status=reviewed")
+        page = json.loads(body)
+        self.assertEqual((page["total"], [card["id"] for card in page["cards"]]), (3, ["card-3", "card-7", "card-20"]))
+
+        status, _, _ = self.request("GET", "/api/decks/deck-1/cards?status=bogus")
+        self.assertEqual(status, 400)
+
+
+class NextCardTest(BackendTestCase):
+    def next_card(self, query: str = "") -> dict:
+        status, _, body = self.request("GET", f"/api/decks/deck-1/next{query}")
+        self.assertEqual(status, 200)
+        return json.loads(body)
+
+    def review(self, card_id: str, delta: int) -> None:
+        self.request("PATCH", f"/api/decks/deck-1/cards/{card_id}", {"delta": delta})
+
+    def test_first_pass_covers_every_card_then_repeats_only_negative_ones(self) -> None:
+        self.add_deck("deck-1", cards=6)
+        first_pass = []
+        for step in range(1, 7):
+            result = self.next_card()
+            self.assertEqual((result["round"], result["step"], result["roundSize"]), (1, step, 6))
+            card_id = result["card"]["id"]
+            first_pass.append(card_id)
+            self.review(card_id, -1 if card_id in ("card-1", "card-4") else 1)
+        self.assertEqual(sorted(first_pass), [f"card-{i}" for i in range(6)])
+
+        # card-4 drops to -2, so it comes before card-1 (-1).
+        self.review("card-4", -1)
+        result = self.next_card()
+        self.assertEqual((result["card"]["id"], result["toReviewCount"]), ("card-4", 2))
+        self.assertEqual((result["round"], result["step"], result["roundSize"]), (2, 1, 2))
+        self.review("card-4", 1)
+        self.review("card-4", 1)
+
+        self.assertEqual(self.next_card()["card"]["id"], "card-1")
+        self.review("card-1", 1)
+        self.assertTrue(self.next_card()["done"])
+        self.assertEqual(self.next_card("?restart=1")["unseenCount"], 5)
+
+    def test_a_card_answered_wrong_waits_for_the_rest_of_the_round(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        for card_id, score in (("card-0", -5), ("card-1", -1), ("card-2", -2)):
+            for _ in range(-score):
+                self.review(card_id, -1)
+        for _ in range(3):
+            self.next_card()
+
+        shown = []
+        for _ in range(6):
+            result = self.next_card()
+            shown.append((result["round"], result["card"]["id"]))
+            # Every answer is wrong, so card-0 stays the weakest by far.
+            self.review(result["card"]["id"], -1)
+        self.assertEqual(
+            shown,
+            [(2, "card-0"), (2, "card-2"), (2, "card-1"), (3, "card-0"), (3, "card-2"), (3, "card-1")],
+        )
+
+    def test_each_session_gets_its_own_pass_over_the_deck(self) -> None:
+        self.add_deck("deck-1", cards=4)
+        seen = {"a": [], "b": []}
+        for _ in range(4):
+            for session, cards in seen.items():
+                cards.append(self.next_card(f"?session={session}")["card"]["id"])
+        self.assertEqual(sorted(seen["a"]), sorted(seen["b"]))
+        self.assertEqual(len(set(seen["a"])), 4)
+
+        # A review from one session moves the card in the other's queue too.
+        self.review("card-2", -1)
+        self.assertEqual(self.next_card("?session=a")["card"]["id"], "card-2")
+        self.assertEqual(self.next_card("?session=b")["card"]["id"], "card-2")
+        self.assertEqual(self.next_card("?session=nueva")["step"], 1)
+        self.assertEqual(self.request("GET", "/api/decks/deck-1/next?session=a/b")[0], 400)
+
+    def test_sessions_are_bounded_globally_and_expire_when_idle(self) -> None:
+        self.add_deck("deck-1", cards=4)
+        with mock.patch.object(app, "STUDY_SESSIONS_MAX", 2):
+            for session in ("a", "b", "c"):
+                self.next_card(f"?session={session}")
+            self.assertEqual(sorted(self.store._sessions), [("deck-1", "b"), ("deck-1", "c")])
+            # The forgotten session starts a new pass.
+            self.assertEqual(self.next_card("?session=a")["step"], 1)
+
+        with mock.patch.object(app, "STUDY_SESSION_TTL", 0):
+            self.next_card("?session=d")
+        self.assertEqual(list(self.store._sessions), [("deck-1", "d")])
+
+        self.request("DELETE", "/api/decks/deck-1")
+        self.assertEqual((dict(self.store._sessions), self.store._schedulers), ({}, {}))
+
+    def test_the_first_pass_is_a_permutation_without_a_list_of_the_deck(self) -> None:
+        rng = app.random.Random(7)
+        for size in (0, 1, 2, 3, 17, 64, 1000):
+            order = app._Shuffle(size, rng)
+            positions = [order[index] for index in range(size)]
+            self.assertEqual(sorted(positions), list(range(size)))
+            self.assertEqual([order.index(position) for position in positions], list(range(size)))
+        self.assertNotEqual(positions, sorted(positions))
+
+
+
+class ReviewBatchTest(BackendTestCase):
+    def test_batch_is_applied_once_and_atomically(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        batch = {
+            "idempotencyKey": "batch-1",
+            "reviews": [
+                {"cardId": "card-0", "delta": 1, "ts": 2},
+                {"cardId": "card-1", "delta": -1, "ts": 1},
+                {"cardId": "card-0", "delta": 1, "ts": 3},
+            ],
+        }
+        status, _, body = self.request("POST", "/api/decks/deck-1/reviews", batch)
+        self.assertEqual(status, 200)
+        result = json.loads(body)
+        self.assertEqual(result["applied"], 3)
+        self.assertEqual({card["id"]: card["aciertos"] for card in result["cards"]}, {"card-0": 2, "card-1": -1})
+        self.assertEqual((result["deck"]["successCount"], result["deck"]["pendingPoints"]), (1, 1))
+        self.assertFalse(result["replayed"])
+
+        status, _, body = self.request("POST", "/api/decks/deck-1/reviews", batch)
+        self.assertTrue(json.loads(body)["replayed"])
+        self.assertEqual(self.store.get_deck("deck-1")["cards"][0]["aciertos"], 2)
+
+        bad = {"reviews": [{"cardId": "card-2", "delta": 1}, {"cardId": "missing", "delta": 1}]}
+        status, _, _ = self.request("POST", "/api/decks/deck-1/reviews", bad)
+        self.assertEqual(status, 404)
+        self.assertEqual(self.store.get_deck("deck-1")["cards"][2]["aciertos"], 0)
+
+        status, _, _ = self.request("POST", "/api/decks/deck-1/reviews?origen=cola", batch)
+        self.assertEqual(status, 200)
+
+    def test_retries_on_two_decks_at_once_share_the_cache_safely(self) -> None:
+        for deck_id in ("deck-1", "deck-2"):
+            self.add_deck(deck_id, cards=1)
+
+        def retry(deck_id: str) -> int:
+            replayed = 0
+            for n in range(500):
+                # Retry an older batch too, whose entry is about to be evicted.
+                for key in (n, n - 2):
+                    result, was_replayed = self.store.apply_reviews(deck_id, [("card-0", 1)], f"batch-{key}")
+                    self.assertEqual(result["deck"]["id"], deck_id)
+                    replayed += was_replayed
+            return replayed
+
+        # A small cache and frequent thread switches keep one deck evicting
+        # entries while the other reads them.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with mock.patch.object(app, "IDEMPOTENCY_CACHE_SIZE", 4), ThreadPoolExecutor(2) as pool:
+                replays = list(pool.map(retry, ["deck-1", "deck-2"]))
+        finally:
+            sys.setswitchinterval(interval)
+        for deck_id, replayed in zip(["deck-1", "deck-2"], replays):
+            score = self.store.get_deck(deck_id)["cards"][0]["aciertos"]
+            self.assertEqual(score + replayed, 1000)
+        self.assertEqual(len(self.store._idempotency), 4)
+
+
+class CardLookupTest(BackendTestCase):
+    def card(self, deck_id: str, card_id: str) -> Optional[dict]:
+        status, _, body = self.request("GET", f"/api/decks/{deck_id}/cards/{card_id}")
+        self.assertIn(status, (200, 404))
+        return json.loads(body) if status == 200 else None
+
+    def test_card_index_follows_deck_replacement(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        self.add_deck("deck-2", cards=1)
+        self.assertEqual(self.card("deck-1", "card-2")["contenido"], {"n": 2})
+        self.assertIsNone(self.card("deck-1", "missing"))
+        self.assertIsNone(self.card("missing", "card-0"))
+
+        # Adding a deck under an existing id replaces it where it was listed.
+        self.add_deck("deck-1", cards=5)
+        self.assertEqual([deck["id"] for deck in self.store.summaries()], ["deck-1", "deck-2"])
+        status, _, _ = self.request("PATCH", "/api/decks/deck-1/cards/card-4", {"delta": 1})
+        self.assertEqual(status, 200)
+        self.assertEqual(self.card("deck-1", "card-4")["aciertos"], 1)
+        status, _, _ = self.request("PATCH", "/api/decks/deck-1/cards/missing", {"delta": 1})
+        self.assertEqual(status, 404)
+
+        self.store.close()
+        persisted = app.create_storage(self.storage_kind).read()["decks"]
+        self.assertEqual([(deck["id"], len(deck["cards"])) for deck in persisted], [("deck-1", 5), ("deck-2", 1)])
+
+    def test_a_batch_keeps_the_last_deck_for_each_id(self) -> None:
+        decks = [{"id": "deck-1", "name": name, "cards": []} for name in ("Primero", "Segundo")]
+        self.store.add_decks(decks)
+        self.assertEqual([deck["name"] for deck in self.store.summaries()], ["Segundo"])
+
+
+class CardLookupSqliteTest(CardLookupTest):
+    storage_kind = "sqlite"
+
+
+class DeckCachingAsyncTest(DeckCachingTest):
+    server_class = app.AsyncDeckServer
+
+
+class CardPageAsyncTest(CardPageTest):
+    server_class = app.AsyncDeckServer
@@ -0,0 +1,102 @@
+import json
+import socket
+import sys
+from http.client import HTTPConnection
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app, multipart  # noqa: E402
+
+
+def read_responses(sock: socket.socket, count: int) -> list:
+    """Read ``count`` Content-Length delimited responses from a raw socket."""
+    reader = sock.makefile("rb")
+    responses = []
+    for _ in range(count):
+        status = reader.readline().split(b" ")[1]
+        headers = {}
+        while True:
+            line = reader.readline().strip()
+            if not line:
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.lower()] = value.strip()
+        responses.append((int(status), headers, reader.read(int(headers.get("content-length", 0)))))
+    return responses
+
+
+class AsyncServerTest(BackendTestCase):
+    server_class = app.AsyncDeckServer
+
+    def connect(self) -> HTTPConnection:
+        return HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def test_keep_alive_reuses_one_connection(self) -> None:
+        self.add_deck("deck-1")
+        connection = self.connect()
+        for delta in (1, 1, -1):
+            connection.request("PATCH", "/api/decks/deck-1/cards/card-0", body=json.dumps({"delta": delta}))
+            response = connection.getresponse()
+            self.assertEqual((response.version, response.status), (11, 200))
+            response.read()
+            self.assertFalse(response.will_close)
+        first_socket = connection.sock
+        connection.request("GET", "/api/decks/deck-1")
+        self.assertEqual(json.loads(connection.getresponse().read())["cards"][0]["aciertos"], 1)
+        self.assertIs(connection.sock, first_socket)
+        connection.close()
+
+    def test_pipelined_requests_are_answered_in_order(self) -> None:
+        self.add_deck("deck-1")
+        body = json.dumps({"delta": 1}).encode("utf-8")
+        patch = (
+            b"PATCH /api/decks/deck-1/cards/card-2 HTTP/1.1\r\nHost: x\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode("ascii")
+            + body
+        )
+        with socket.create_connection(self.server.server_address) as sock:
+            sock.sendall(patch + b"GET /api/decks/missing HTTP/1.1\r\nHost: x\r\n\r\nGET /api/decks HTTP/1.1\r\nHost: x\r\n\r\n")
+            responses = read_responses(sock, 3)
+        self.assertEqual([status for status, _, _ in responses], [200, 404, 200])
+        self.assertEqual(json.loads(responses[0][2])["card"]["aciertos"], 1)
+        self.assertEqual(json.loads(responses[2][2])["decks"][0]["id"], "deck-1")
+
+    def test_http_10_and_streamed_responses_close_the_connection(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        with socket.create_connection(self.server.server_address) as sock:
+            sock.sendall(b"GET /api/decks HTTP/1.0\r\n\r\n")
+            status, _, _ = read_responses(sock, 1)[0]
+            self.assertEqual(status, 200)
+            self.assertEqual(sock.recv(1), b"")
+
+        status, headers, body = self.request("GET", "/api/decks/deck-1/export")
+        self.assertEqual((status, headers["Transfer-Encoding"]), (200, "chunked"))
+        self.assertEqual(len(json.loads(body)), 3)
+
+        body, headers = multipart([("file", "uno.json", b'[{"a": 1}]'), ("file", "dos.json", b"nope")])
+        status, _, stream = self.request("POST", "/api/decks/import", body, headers)
+        lines = [json.loads(line) for line in stream.splitlines()]
+        self.assertEqual((status, lines[-1]["done"], lines[-1]["errors"]), (200, True, 1))
+
+    def test_oversized_upload_is_rejected_without_reading_the_body(self) -> None:
+        limit = app.MAX_UPLOAD_BYTES
+        app.MAX_UPLOAD_BYTES = 10
+        try:
+            body, headers = multipart([("name", None, b"x"), ("file", "m.json", b'[{"a": 1}]')])
+            connection = self.connect()
+            connection.request("POST", "/api/decks", body=body, headers=headers)
+            response = connection.getresponse()
+            self.assertEqual(response.status, 413)
+            response.read()
+            self.assertTrue(response.will_close)
+        finally:
+            app.MAX_UPLOAD_BYTES = limit
+
+    def test_shutdown_does_not_wait_for_idle_connections(self) -> None:
+        idle = self.connect()
+        idle.request("GET", "/api/decks")
+        idle.getresponse().read()
+        self.server.shutdown()
+        self.assertEqual(idle.sock.recv(1), b"")
+        idle.close()
@@ -0,0 +1,57 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app  # noqa: E402
+
+THREADS = 16
+REQUESTS_PER_THREAD = 40
+CARD_COUNT = 4
+
+
+class ConcurrentReviewTest(BackendTestCase):
+    # Tiny thresholds so flushes and journal compactions race with the reviews.
+    store_options = {"flush_interval": 0.01, "batch_size": 1, "compact_threshold": 25}
+
+    def test_concurrent_patches_do_not_lose_increments(self) -> None:
+        self.add_deck("deck-1", cards=CARD_COUNT)
+        errors = []
+
+        def worker(index: int) -> None:
+            try:
+                for i in range(REQUESTS_PER_THREAD):
+                    card_id = f"card-{(index + i) % CARD_COUNT}"
+                    status, _, _ = self.request("PATCH", f"/api/decks/deck-1/cards/{card_id}", {"delta": 1})
+                    if status != 200:
+                        errors.append(status)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        expected = THREADS * REQUESTS_PER_THREAD // CARD_COUNT
+        in_memory = {card["id"]: card["aciertos"] for card in self.store.get_deck("deck-1")["cards"]}
+        self.assertEqual(in_memory, {f"card-{i}": expected for i in range(CARD_COUNT)})
+        self.assertEqual(self.store.verify_stats(), [])
+        self.assertEqual(self.store.summary("deck-1")["successCount"], CARD_COUNT)
+
+        self.store.close()
+        persisted = app.create_storage(self.storage_kind).read()
+        on_disk = {card["id"]: card["aciertos"] for card in persisted["decks"][0]["cards"]}
+        self.assertEqual(on_disk, in_memory)
+        self.assertEqual(list(self.data_dir.glob("*.tmp")), [])
+
+
+class ConcurrentReviewSqliteTest(ConcurrentReviewTest):
+    storage_kind = "sqlite"
+
+
+class ConcurrentReviewAsyncTest(ConcurrentReviewTest):
+    server_class = app.AsyncDeckServer
@@ -0,0 +1,92 @@
+import json
+import sys
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app  # noqa: E402
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class DeckExportTest(BackendTestCase):
+    def add_mixed_deck(self, cards: int = 1200) -> dict:
+        deck = {
+            "id": "deck-1",
+            "name": "Vokabeln ä",
+            "cards": [
+                {
+                    "id": f"card-{i}",
+                    "aciertos": i % 7 - 3,
+                    "contenido": {"frente": f"Wort <{i}> & ü", "n": i, "peso": i / 4, **({"nota": " x "} if i % 2 else {})},
+                }
+                for i in range(cards)
+            ],
+        }
+        self.store.add_deck(deck)
+        return deck
+
+    def test_exports_round_trip_through_the_importer(self) -> None:
+        deck = self.add_mixed_deck()
+        expected = [(card["contenido"], card["aciertos"]) for card in deck["cards"]]
+        for export_format in ("json", "xlsx"):
+            with self.subTest(export_format):
+                status, headers, body = self.request("GET", f"/api/decks/deck-1/export?format={export_format}")
+                self.assertEqual(status, 200)
+                self.assertEqual(headers["Transfer-Encoding"], "chunked")
+                self.assertTrue(headers["Content-Type"].startswith(CONTENT_TYPES[export_format]))
+                self.assertIn(f"filename*=UTF-8''Vokabeln%20%C3%A4.{export_format}", headers["Content-Disposition"])
+
+                upload = app.FileField("file", f"mazo.{export_format}", BytesIO(body), CONTENT_TYPES[export_format])
+                cards = app.parse_cards_from_file(upload)
+                # Cells an XLSX row leaves empty are not keys of the imported card.
+                self.assertEqual([(card["contenido"], card["aciertos"]) for card in cards], expected)
+
+        self.assertEqual(json.loads(self.request("GET", "/api/decks/deck-1/export")[2])[1]["@aciertos"], -2)
+
+    def test_a_user_aciertos_field_stays_card_content(self) -> None:
+        contents = [{"frente": "a", "aciertos": 7}, {"frente": "b", "aciertos": "muchos"}, {"frente": "c"}]
+        cards = [{"id": f"card-{i}", "aciertos": -i, "contenido": content} for i, content in enumerate(contents)]
+        self.store.add_deck({"id": "deck-1", "name": "Mazo", "cards": cards})
+        for export_format in ("json", "xlsx"):
+            with self.subTest(export_format):
+                body = self.request("GET", f"/api/decks/deck-1/export?format={export_format}")[2]
+                upload = app.FileField("file", f"mazo.{export_format}", BytesIO(body), CONTENT_TYPES[export_format])
+                imported = app.parse_cards_from_file(upload)
+                scores = [card["aciertos"] for card in imported]
+                self.assertEqual(([card["contenido"] for card in imported], scores), (contents, [0, -1, -2]))
+
+        imported = app.parse_json_cards(b'[{"frente": "a", "aciertos": 5}, {"frente": "b", "@aciertos": 2}]')
+        self.assertEqual(
+            [(card["contenido"], card["aciertos"]) for card in imported],
+            [({"frente": "a", "aciertos": 5}, 0), ({"frente": "b"}, 2)],
+        )
+        with self.assertRaisesRegex(ValueError, "reservado"):
+            app.parse_json_cards(b'[{"frente": "a", "@aciertos": "dos"}]')
+
+    def test_xlsx_numbers_and_bools_keep_their_types(self) -> None:
+        contents = [
+            {"x": 1e-05, "y": True},
+            {"x": 1e20, "y": False},
+            {"x": -0.1, "y": 12345678901234567890},
+            {"x": 5e-324, "y": 2.0},
+        ]
+        cards = [{"id": f"card-{i}", "aciertos": 0, "contenido": content} for i, content in enumerate(contents)]
+        self.store.add_deck({"id": "deck-1", "name": "Mazo", "cards": cards})
+        body = self.request("GET", "/api/decks/deck-1/export?format=xlsx")[2]
+        upload = app.FileField("file", "mazo.xlsx", BytesIO(body), CONTENT_TYPES["xlsx"])
+        imported = [card["contenido"] for card in app.parse_cards_from_file(upload)]
+
+        def typed(rows: list) -> list:
+            return [{key: (type(value), value) for key, value in row.items()} for row in rows]
+
+        self.assertEqual(typed(imported), typed(contents))
+
+    def test_unknown_deck_and_format_are_rejected(self) -> None:
+        self.add_deck("deck-1")
+        self.assertEqual(self.request("GET", "/api/decks/missing/export")[0], 404)
+        self.assertEqual(self.request("GET", "/api/decks/deck-1/export?format=csv")[0], 400)
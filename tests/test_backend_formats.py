@@ -0,0 +1,74 @@
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app  # noqa: E402
+
+
+class DatabaseFormatTest(BackendTestCase):
+    def setUp(self) -> None:
+        self.original_format = app.DB_FORMAT
+        super().setUp()
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        app.DB_FORMAT = self.original_format
+
+    def save_through_store(self, data: dict) -> None:
+        store = app.DeckStore(storage=app.create_storage("json"))
+        store.load()
+        store.replace_decks(data["decks"])
+        store.close()
+
+    def test_every_format_round_trips_and_can_be_converted(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        self.add_deck("deck-2", cards=0)
+        self.request("PATCH", "/api/decks/deck-1/cards/card-1", {"delta": -1})
+        self.store.close()
+        expected = app.create_storage("json").read()
+
+        for db_format in app.DB_FORMATS:
+            with self.subTest(db_format=db_format):
+                app.DB_FORMAT = db_format
+                self.save_through_store(expected)
+                self.assertEqual(app.DB_PATH.read_bytes()[:2] == b"\x1f\x8b", db_format.endswith("+gzip"))
+                self.assertEqual(app.create_storage("json").read(), expected)
+                scores = app.read_deck_scores()
+                self.assertEqual([deck["aciertos"] for deck in scores], [[0, -1, 0], []])
+                self.assertNotIn("cards", scores[0])
+
+        app.convert_database("json", target=self.data_dir / "plain.json")
+        self.assertEqual((self.data_dir / "plain.json").read_bytes(), app.encode_database(expected, "json"))
+
+    def test_journal_is_replayed_into_a_columnar_database(self) -> None:
+        app.DB_FORMAT = "columnar+gzip"
+        self.add_deck("deck-1", cards=2)
+        self.store.flush(force=True)
+        self.request("PATCH", "/api/decks/deck-1/cards/card-0", {"delta": 1})
+        self.storage.close()
+
+        restarted = app.create_storage("json").read()
+        self.assertEqual([card["aciertos"] for card in restarted["decks"][0]["cards"]], [1, 0])
+        self.assertFalse(app.JOURNAL_PATH.exists())
+
+    def test_stats_come_from_the_scores_and_the_pending_journal(self) -> None:
+        app.DB_FORMAT = "columnar"
+        self.add_deck("deck-1", cards=3)
+        self.store.flush(force=True)
+        self.request("PATCH", "/api/decks/deck-1/cards/card-0", {"delta": 1})
+        self.request("PATCH", "/api/decks/deck-1/cards/card-2", {"delta": -1})
+        expected = self.store.summary("deck-1")
+        self.storage.close()
+        database = app.DB_PATH.read_bytes()
+
+        self.assertEqual(app.read_deck_stats(), [expected])
+        output = StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(app.main(["stats"]), 0)
+        self.assertEqual(output.getvalue(), "deck-1  Mazo deck-1  3 tarjetas  1 acertadas  1 por repasar\n")
+        # Nothing is rewritten: the journal is only applied in memory.
+        self.assertEqual(app.DB_PATH.read_bytes(), database)
+        self.assertTrue(app.JOURNAL_PATH.exists())
@@ -0,0 +1,210 @@
+import io
+import json
+import sys
+import time
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app, make_workbook, multipart  # noqa: E402
+
+
+def cards_json(*values: str) -> bytes:
+    return json.dumps([{"frente": value} for value in values]).encode("utf-8")
+
+
+class BulkImportTest(BackendTestCase):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        app.shutdown_import_pool()
+
+    def test_files_and_zip_members_become_decks_in_one_write(self) -> None:
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("tema/verbos.json", cards_json("gehen", "sehen", "essen"))
+            zf.writestr("roto.json", b"{no es json")
+            zf.writestr("notas.txt", b"ignorado")
+            zf.writestr("__MACOSX/._verbos.json", b"")
+        body, headers = multipart(
+            [
+                ("file", "saludos.json", cards_json("Hallo", "Danke")),
+                ("file", "lote.zip", archive.getvalue()),
+            ]
+        )
+
+        status, response_headers, raw = self.request("POST", "/api/decks/import", body, headers)
+        self.assertEqual(status, 200)
+        self.assertTrue(response_headers["Content-Type"].startswith("application/x-ndjson"))
+        lines = [json.loads(line) for line in raw.splitlines()]
+        progress, final = lines[:-1], lines[-1]
+        self.assertEqual(
+            sorted((line["file"], line.get("cardCount")) for line in progress),
+            [("roto.json", None), ("saludos.json", 2), ("verbos.json", 3)],
+        )
+        self.assertEqual(final["errors"], 1)
+        self.assertEqual([deck["name"] for deck in final["decks"]], ["saludos", "verbos"])
+        self.assertEqual([deck["name"] for deck in self.store.summaries()], ["saludos", "verbos"])
+        self.assertEqual(self.store.storage.backlog, 0)
+        self.assertEqual(self.store._pending, 1)
+
+    def test_request_without_files_is_rejected(self) -> None:
+        body, headers = multipart([("name", None, b"nada")])
+        status, _, _ = self.request("POST", "/api/decks/import", body, headers)
+        self.assertEqual(status, 400)
+        # A query string does not change the route.
+        status, _, _ = self.request("POST", "/api/decks/import?origen=web", body, headers)
+        self.assertEqual(status, 400)
+
+
+class ImportJobTest(BackendTestCase):
+    def tearDown(self) -> None:
+        app.shutdown_import_jobs()
+        super().tearDown()
+
+    def wait_for(self, location: str) -> dict:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            status, headers, body = self.request("GET", location)
+            self.assertEqual(status, 200)
+            self.assertEqual(headers["Cache-Control"], "no-store")
+            job = json.loads(body)
+            if job["status"] in ("done", "failed"):
+                return job
+            time.sleep(0.02)
+        self.fail(f"{location} did not finish")
+
+    def test_async_upload_returns_a_job_to_poll(self) -> None:
+        body, headers = multipart([("name", None, b"Saludos"), ("file", "saludos.json", cards_json("Hallo", "Danke"))])
+        status, response_headers, raw = self.request("POST", "/api/decks?async=1", body, headers)
+        self.assertEqual(status, 202)
+        job = json.loads(raw)["job"]
+        self.assertEqual(response_headers["Location"], f"/api/jobs/{job['id']}")
+
+        job = self.wait_for(response_headers["Location"])
+        self.assertEqual((job["status"], job["rowsParsed"], job["cardsCreated"]), ("done", 2, 2))
+        self.assertEqual(job["deck"]["name"], "Saludos")
+        self.assertIsNotNone(self.store.get_deck(job["deck"]["id"]))
+
+    def test_failed_job_reports_the_error(self) -> None:
+        body, headers = multipart([("name", None, b"Roto"), ("file", "roto.json", b"[1, 2]")])
+        headers["Prefer"] = "respond-async"
+        status, response_headers, _ = self.request("POST", "/api/decks", body, headers)
+        self.assertEqual(status, 202)
+        job = self.wait_for(response_headers["Location"])
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("objeto", job["error"])
+        self.assertEqual(self.store.summaries(), [])
+        self.assertEqual(self.request("GET", "/api/jobs/desconocido")[0], 404)
+
+
+class SheetImportTest(BackendTestCase):
+    WORKBOOK = make_workbook(
+        {
+            "Saludos": [["Wort", "Übersetzung", "Notiz"], ["Hallo", "Hola", "x"], ["Danke", "Gracias", "y"]],
+            "Notas": [],
+            "Verbos": [["Wort", "Übersetzung"], ["gehen", "ir"]],
+        }
+    )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        app.shutdown_import_pool()
+
+    def upload(self, **fields: str) -> tuple:
+        body, headers = multipart(
+            [(key, None, value.encode("utf-8")) for key, value in fields.items()]
+            + [("file", "temas.xlsx", self.WORKBOOK)]
+        )
+        status, _, raw = self.request("POST", "/api/decks", body, headers)
+        return status, json.loads(raw)
+
+    def test_every_sheet_with_cards_becomes_a_deck(self) -> None:
+        status, result = self.upload(sheets="*", columns="Wort, Übersetzung")
+        self.assertEqual(status, 201)
+        self.assertEqual([(d["name"], d["cardCount"]) for d in result["decks"]], [("Saludos", 2), ("Verbos", 1)])
+        cards = self.store.get_deck(result["decks"][0]["id"])["cards"]
+        self.assertEqual(cards[0]["contenido"], {"Wort": "Hallo", "Übersetzung": "Hola"})
+
+    def test_selected_sheets_and_errors(self) -> None:
+        status, result = self.upload(name="Alemán", sheets="Verbos")
+        self.assertEqual(status, 201)
+        self.assertEqual([d["name"] for d in result["decks"]], ["Alemán - Verbos"])
+
+        status, result = self.upload(sheets="Verbos,Fehlt")
+        self.assertEqual((status, result["error"]), (400, "Hojas no encontradas en el Excel: Fehlt"))
+        status, result = self.upload(sheets="Notas")
+        self.assertEqual(status, 400)
+        self.assertTrue(result["error"].startswith("Hoja «Notas»"))
+        status, result = self.upload(name="Solo notas", columns="Notiz")
+        self.assertEqual(status, 201)
+        self.assertEqual(self.store.get_deck(result["deck"]["id"])["cards"][1]["contenido"], {"Notiz": "y"})
+
+    def test_broken_sheet_xml_is_a_bad_request(self) -> None:
+        broken = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(self.WORKBOOK)) as source, zipfile.ZipFile(broken, "w") as target:
+            for item in source.infolist():
+                data = source.read(item)
+                target.writestr(item, data[: len(data) // 2] if item.filename.endswith("sheet3.xml") else data)
+        body, headers = multipart([("sheets", None, b"Verbos"), ("file", "temas.xlsx", broken.getvalue())])
+        status, _, raw = self.request("POST", "/api/decks", body, headers)
+        self.assertEqual(status, 400)
+        self.assertEqual(json.loads(raw)["error"], "Hoja «Verbos»: El archivo Excel (.xlsx) es inválido o está dañado")
+
+    def test_a_task_loads_the_shared_strings_once_for_its_sheets(self) -> None:
+        path = self.data_dir / "temas.xlsx"
+        path.write_bytes(self.WORKBOOK)
+        sheets = ["xl/worksheets/sheet1.xml", "xl/worksheets/missing.xml", "xl/worksheets/sheet3.xml"]
+        with mock.patch.object(app, "_load_shared_strings", wraps=app._load_shared_strings) as load:
+            (saludos, _), (_, error), (verbos, _) = app._parse_sheet_files(str(path), sheets, None)
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual((len(saludos), verbos[0]["contenido"]), (2, {"Wort": "gehen", "Übersetzung": "ir"}))
+        self.assertIsNotNone(error)
+
+
+class MultipartReaderTest(BackendTestCase):
+    FIELDS = [("name", None, "Saludos ñ".encode("utf-8")), ("file", "saludos.json", cards_json("Hallo", "Danke") * 3)]
+
+    def parse(self, body: bytes, headers: dict) -> app.MultipartForm:
+        form = app._parse_multipart_form_data(io.BytesIO(body), headers["Content-Type"], len(body))
+        self.addCleanup(form.close)
+        return form
+
+    def test_a_boundary_split_across_reads_is_found(self) -> None:
+        body, headers = multipart(self.FIELDS)
+        # Every chunk size up to the delimiter length splits some boundary at a different offset.
+        for size in range(1, len(headers["Content-Type"]) + 1):
+            with self.subTest(size=size), mock.patch.object(app, "UPLOAD_CHUNK_SIZE", size):
+                form = self.parse(body, headers)
+                self.assertEqual(form.getfirst("name"), "Saludos ñ")
+                self.assertEqual(form["file"].filename, "saludos.json")
+                self.assertEqual(form["file"].value, self.FIELDS[1][2])
+
+    def test_large_files_are_spooled_to_disk(self) -> None:
+        small, large = b"x" * 64, bytes(range(256)) * 64
+        body, headers = multipart([("file", "small.json", small), ("file", "large.json", large)])
+        with mock.patch.object(app, "UPLOAD_SPOOL_THRESHOLD", 1024), mock.patch.object(app, "UPLOAD_CHUNK_SIZE", 100):
+            form = self.parse(body, headers)
+        first, second = form.getlist("file")
+        self.assertEqual((first.value, second.value), (small, large))
+        self.assertFalse(first.file._rolled)
+        self.assertTrue(second.file._rolled)
+
+    def test_truncated_bodies_are_rejected(self) -> None:
+        body, headers = multipart(self.FIELDS)
+        cuts = {
+            "before the first boundary ends": body[:10],
+            "inside the part headers": body[: body.index(b"\r\n\r\n")],
+            "inside a file": body[: body.index(b"Danke")],
+            "without the closing boundary": body[: body.rindex(b"--\r\n")].rstrip(b"-"),
+        }
+        for where, truncated in cuts.items():
+            with self.subTest(where=where):
+                with self.assertRaisesRegex(ValueError, "incompleto"):
+                    self.parse(truncated, headers)
+
+        status, _, raw = self.request("POST", "/api/decks", cuts["inside a file"], headers)
+        self.assertEqual((status, json.loads(raw)["error"]), (400, "El formulario enviado está incompleto"))
+        self.assertEqual(self.store.summaries(), [])
+
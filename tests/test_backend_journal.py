@@ -0,0 +1,75 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app  # noqa: E402
+
+
+class ReviewJournalTest(BackendTestCase):
+    store_options = {"flush_interval": 3600, "compact_threshold": 3}
+
+    def scores_on_disk(self) -> list:
+        return [card["aciertos"] for card in app._read_json_database()["decks"][0]["cards"]]
+
+    def reload(self) -> app.DeckStore:
+        store = app.DeckStore(storage=app.create_storage("json"))
+        store.load()
+        self.addCleanup(store.storage.close)
+        return store
+
+    def test_reviews_are_replayed_after_a_crash(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        self.store.flush(force=True)
+        for card, delta in (("card-0", 1), ("card-2", -1)):
+            self.request("PATCH", f"/api/decks/deck-1/cards/{card}", {"delta": delta})
+        self.assertEqual(self.scores_on_disk(), [0, 0, 0])
+        self.storage.sync()
+        self.assertEqual(len(app.JOURNAL_PATH.read_bytes().splitlines()), 2)
+
+        # The process dies: the journal is on disk but db.json was never rewritten.
+        self.storage.close()
+        store = self.reload()
+        self.assertEqual([card["aciertos"] for card in store.get_deck("deck-1")["cards"]], [1, 0, -1])
+        self.assertEqual(self.scores_on_disk(), [1, 0, -1])
+        self.assertFalse(app.JOURNAL_PATH.exists())
+
+    def test_a_torn_last_line_is_skipped(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        self.store.flush(force=True)
+        self.storage.close()
+        app.JOURNAL_PATH.write_bytes(
+            b'["deck-1","card-0",2]\n'
+            b'["deck-1","missing",5]\n'
+            b'["deck-1","card-1",-1]\n'
+            b'["deck-1","card-2",'
+        )
+        records = list(app.read_journal(app.JOURNAL_PATH))
+        self.assertEqual(records, [("deck-1", "card-0", 2), ("deck-1", "missing", 5), ("deck-1", "card-1", -1)])
+
+        store = self.reload()
+        self.assertEqual([card["aciertos"] for card in store.get_deck("deck-1")["cards"]], [2, -1, 0])
+        self.assertFalse(app.JOURNAL_PATH.exists())
+
+    def test_journal_is_compacted_into_the_database_at_the_threshold(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        self.store.flush(force=True)
+        self.request("PATCH", "/api/decks/deck-1/cards/card-0", {"delta": 1})
+        self.request("PATCH", "/api/decks/deck-1/cards/card-1", {"delta": 1})
+        self.assertFalse(self.store.flush())
+        self.assertEqual(self.storage.backlog, 2)
+
+        # Reaching the threshold wakes the flusher; flush() covers it not having run yet.
+        self.request("PATCH", "/api/decks/deck-1/cards/card-0", {"delta": 1})
+        self.store.flush()
+        self.assertEqual(self.storage.backlog, 0)
+        self.assertEqual(self.scores_on_disk(), [2, 1, 0])
+        self.assertFalse(app.JOURNAL_PATH.exists())
+        self.assertFalse(app.JOURNAL_PATH.with_name(app.JOURNAL_PATH.name + ".1").exists())
+
+        # Later reviews start a fresh journal holding only themselves.
+        self.request("PATCH", "/api/decks/deck-1/cards/card-2", {"delta": -1})
+        self.storage.sync()
+        lines = app.JOURNAL_PATH.read_bytes().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [["deck-1", "card-2", -1]])
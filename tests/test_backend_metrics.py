@@ -0,0 +1,103 @@
+import marshal
+import re
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app, multipart  # noqa: E402
+
+SAMPLE_RE = re.compile(r"^([a-z_]+)(\{.*\})? (\S+)$")
+
+
+def parse_metrics(text: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = SAMPLE_RE.match(line)
+        assert match, line
+        samples[match.group(1) + (match.group(2) or "")] = float(match.group(3))
+    return samples
+
+
+def eventually(check, timeout: float = 2.0):
+    """Retry ``check`` until it returns a truthy value.
+
+    Handler threads record a request after its response reached the client,
+    so the metrics of the last request can lag behind by a moment.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = check()
+        if result or time.monotonic() > deadline:
+            return result
+        time.sleep(0.01)
+
+
+class MetricsTest(BackendTestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(app, "_metrics", app.Metrics())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+    def metrics(self) -> dict:
+        status, headers, body = self.request("GET", "/api/metrics")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return parse_metrics(body.decode("utf-8"))
+
+    def test_routes_phases_and_bytes_are_recorded(self) -> None:
+        self.add_deck("deck-1")
+        for card in ("card-0", "card-1", "missing"):
+            self.request("PATCH", f"/api/decks/deck-1/cards/{card}", {"delta": 1})
+        _, _, deck_body = self.request("GET", "/api/decks/deck-1")
+        body, headers = multipart([("name", None, b"Nuevo"), ("file", "m.json", b'[{"a": 1}]')])
+        self.assertEqual(self.request("POST", "/api/decks", body, headers)[0], 201)
+        self.store.flush(force=True)
+
+        eventually(lambda: 'deck_http_request_bytes_total{route="/api/decks"}' in self.metrics())
+        samples = self.metrics()
+        patch = 'method="PATCH",route="/api/decks/{id}/cards/{cardId}"'
+        self.assertEqual(samples[f'deck_http_requests_total{{{patch},status="200"}}'], 2)
+        self.assertEqual(samples[f'deck_http_requests_total{{{patch},status="404"}}'], 1)
+        self.assertEqual(samples[f'deck_http_request_duration_seconds_count{{{patch}}}'], 3)
+        self.assertEqual(samples[f'deck_http_request_duration_seconds_bucket{{{patch},le="+Inf"}}'], 3)
+        self.assertGreater(samples['deck_http_response_bytes_total{route="/api/decks/{id}"}'], len(deck_body))
+        self.assertEqual(samples['deck_http_request_bytes_total{route="/api/decks"}'], len(body))
+        for phase in ("storage_journal", "storage_serialize", "storage_write", "parse"):
+            self.assertGreaterEqual(samples[f'deck_phase_duration_seconds_count{{phase="{phase}"}}'], 1, phase)
+
+    def test_route_labels_do_not_contain_ids(self) -> None:
+        cases = {
+            "/api/decks": "/api/decks",
+            "/api/decks/import": "/api/decks/import",
+            "/api/decks/abc-1?x=1": "/api/decks/{id}",
+            "/api/decks/abc-1/next": "/api/decks/{id}/next",
+            "/api/decks/abc-1/cards/c-9": "/api/decks/{id}/cards/{cardId}",
+            "/api/jobs/j1": "/api/jobs/{id}",
+            "/api/unknown/thing": "other",
+            "/main.js": "static",
+        }
+        for path, label in cases.items():
+            with self.subTest(path):
+                self.assertEqual(app.route_label(path), label)
+
+
+class ProfilerTest(BackendTestCase):
+    def test_profile_endpoint_requires_opt_in(self) -> None:
+        with mock.patch.object(app, "_profiler", app.RequestProfiler(0)):
+            self.assertEqual(self.request("GET", "/api/metrics/profile")[0], 404)
+
+        with mock.patch.object(app, "_profiler", app.RequestProfiler(1.0)):
+            self.add_deck("deck-1")
+            self.request("GET", "/api/decks/deck-1")
+            eventually(lambda: app.get_profiler().sampled >= 1)
+            status, _, body = self.request("GET", "/api/metrics/profile")
+            self.assertEqual(status, 200)
+            self.assertIn(b"handle_api_get", body)
+            status, _, body = self.request("GET", "/api/metrics/profile?format=pstats")
+            self.assertTrue(any(name == "handle_api_get" for (_, _, name) in marshal.loads(body)))
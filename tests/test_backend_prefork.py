@@ -0,0 +1,111 @@
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app, multipart  # noqa: E402
+import test_backend_concurrency as concurrency  # noqa: E402
+import test_backend_export as export  # noqa: E402
+from test_backend_metrics import eventually, parse_metrics  # noqa: E402
+
+
+class TwoWorkerServer(app.PreforkDeckServer):
+    def __init__(self, server_address: Any, handler_class: type) -> None:
+        super().__init__(server_address, handler_class, workers=2, server_mode="threaded")
+
+
+class PreforkTest(BackendTestCase):
+    server_class = TwoWorkerServer
+
+    def setUp(self) -> None:
+        # The owner's registry, merged into /api/metrics, is this process's.
+        patcher = mock.patch.object(app, "_metrics", app.Metrics())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+    def test_writes_jobs_and_metrics_are_shared_by_the_workers(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        for _ in range(6):
+            status, _, body = self.request("PATCH", "/api/decks/deck-1/cards/card-1", {"delta": 1})
+            self.assertEqual(status, 200)
+        # Each request may land on either worker; all of them see the owner's store.
+        _, _, body = self.request("GET", "/api/decks/deck-1/cards/card-1")
+        self.assertEqual(json.loads(body)["aciertos"], 6)
+        _, _, body = self.request("GET", "/api/decks/deck-1")
+        self.assertEqual(json.loads(body)["cards"][1]["aciertos"], 6)
+
+        body, headers = multipart([("name", None, b"Saludos"), ("file", "saludos.json", b'[{"de": "Hallo"}]')])
+        status, response_headers, _ = self.request("POST", "/api/decks?async=1", body, headers)
+        self.assertEqual(status, 202)
+
+        def finished_job() -> Any:
+            status, _, body = self.request("GET", response_headers["Location"])
+            self.assertEqual(status, 200)
+            job = json.loads(body)
+            return job if job["status"] == "done" else None
+
+        job = eventually(finished_job, timeout=10)
+        self.assertIsNotNone(job)
+        self.assertEqual(self.store.summary(job["deck"]["id"])["name"], "Saludos")
+
+        def patches_counted() -> Any:
+            _, _, body = self.request("GET", "/api/metrics")
+            samples = parse_metrics(body.decode("utf-8"))
+            key = 'deck_http_requests_total{method="PATCH",route="/api/decks/{id}/cards/{cardId}",status="200"}'
+            return samples.get(key) == 6 and samples
+
+        samples = eventually(patches_counted, timeout=5)
+        self.assertTrue(samples)
+        # Storage phases run in the owner and are merged in too.
+        self.assertGreaterEqual(samples['deck_phase_duration_seconds_count{phase="storage_journal"}'], 6)
+
+    def test_a_worker_that_dies_is_replaced(self) -> None:
+        self.assertTrue(eventually(lambda: len(self.server.processes) == 2))
+        victim = self.server.processes[0]
+        os.kill(victim.pid, signal.SIGKILL)
+        replaced = eventually(lambda: self.server.processes[0] is not victim and self.server.processes[0].is_alive(), 5)
+        self.assertTrue(replaced)
+        for _ in range(4):
+            self.assertEqual(self.request("GET", "/api/decks")[0], 200)
+
+    def test_store_proxies_share_connections_and_return_small_results(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        manager = app.StoreManager(address=self.server._manager.address, authkey=self.server._authkey)
+        manager.connect()
+        store = manager.store()  # type: ignore[attr-defined]
+        for _ in range(5):
+            thread = threading.Thread(target=store.summary, args=("deck-1",))
+            thread.start()
+            thread.join()
+        self.assertEqual(store._idle.qsize(), 1)
+
+        updated = {"id": "card-1", "aciertos": 1, "contenido": {"n": 1}}
+        self.assertEqual(store.apply_review("deck-1", "card-1", 1), (True, updated))
+        self.assertEqual(store.apply_review("deck-1", "missing", 1), (True, None))
+        self.assertEqual(store.apply_review("missing", "card-1", 1), (False, None))
+        # Whole decks never cross the process boundary.
+        self.assertFalse(hasattr(store, "get_deck"))
+        self.assertEqual(store._idle.qsize(), 1)
+
+    def test_the_workers_split_the_import_processes(self) -> None:
+        self.assertEqual(self.server.import_workers, max(1, app.IMPORT_WORKERS // 2))
+        with mock.patch.object(app, "IMPORT_WORKERS", 8):
+            server = TwoWorkerServer(("127.0.0.1", 0), app.DeckHandler)
+            server.server_close()
+        self.assertEqual(server.import_workers, 4)
+
+
+class ConcurrentReviewPreforkTest(concurrency.ConcurrentReviewTest):
+    server_class = TwoWorkerServer
+
+
+class DeckExportPreforkTest(export.DeckExportTest):
+    server_class = TwoWorkerServer
@@ -0,0 +1,73 @@
+import json
+import sys
+from pathlib import Path
+from unittest import mock
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app  # noqa: E402
+
+
+def make_deck(deck_id: str, *texts: str) -> dict:
+    return {
+        "id": deck_id,
+        "name": f"Mazo {deck_id}",
+        "cards": [
+            {"id": f"{deck_id}-{i}", "aciertos": 0, "contenido": {"frente": text, "n": i}} for i, text in enumerate(texts)
+        ],
+    }
+
+
+class SearchIndexTest(BackendTestCase):
+    def search(self, query: str, limit: int = 20) -> list:
+        status, _, body = self.request("GET", f"/api/search?q={quote(query)}&limit={limit}")
+        self.assertEqual(status, 200)
+        return [(result["deckId"], result["card"]["id"]) for result in json.loads(body)["results"]]
+
+    def test_folded_terms_and_type_ahead_prefixes(self) -> None:
+        self.store.add_deck(make_deck("de", "Danke schön", "Die Straße", "Dank", "Mädchen"))
+        self.store.add_deck(make_deck("es", "Gracias", "Danke (alemán)"))
+
+        self.assertEqual(self.search("SCHON"), [("de", "de-0")])
+        self.assertEqual(self.search("strasse"), [("de", "de-1")])
+        self.assertEqual(self.search("alem"), [("es", "es-1")])
+        # Prefix matches come grouped by completed word: "dank" before "danke".
+        self.assertEqual(self.search("dan"), [("de", "de-2"), ("de", "de-0"), ("es", "es-1")])
+        # A trailing space completes the last word.
+        self.assertEqual(self.search("dank "), [("de", "de-2")])
+        self.assertEqual(self.search("danke sch"), [("de", "de-0")])
+        self.assertEqual(self.search("madchen 3"), [("de", "de-3")])
+        self.assertEqual(self.search("nada"), [])
+
+        status, _, body = self.request("GET", "/api/search?q=dan&limit=2")
+        self.assertTrue(json.loads(body)["hasMore"])
+        self.assertEqual(self.request("GET", "/api/search?q=%20")[0], 400)
+        self.assertEqual(self.request("GET", "/api/search?q=dan&limit=0")[0], 400)
+
+    def test_index_follows_added_replaced_and_deleted_decks(self) -> None:
+        self.store.add_deck(make_deck("a", "Hallo", "Tschüss"))
+        self.store.add_deck(make_deck("b", "Hallo Welt"))
+        self.assertEqual(self.search("hallo"), [("a", "a-0"), ("b", "b-0")])
+
+        self.store.add_deck(make_deck("a", "Guten Tag"))
+        self.assertEqual(self.search("hallo"), [("b", "b-0")])
+        self.assertEqual(self.search("tag"), [("a", "a-0")])
+
+        status, _, _ = self.request("DELETE", "/api/decks/b")
+        self.assertEqual(status, 200)
+        self.assertEqual(self.search("hallo"), [])
+
+        self.store.close()
+        self.store.load()
+        self.assertEqual(self.search("guten"), [("a", "a-0")])
+
+    def test_removed_documents_are_compacted(self) -> None:
+        with mock.patch.object(app, "SEARCH_COMPACT_MIN", 2):
+            index = app.SearchIndex()
+            index.reset([make_deck("a", "uno", "dos", "tres"), make_deck("b", "uno")])
+            index.remove("a")
+            self.assertEqual(len(index), 1)
+            self.assertEqual(index._next, 1)
+            self.assertEqual(index.search("uno"), ([("b", 0)], False))
+            self.assertEqual(index.search("dos"), ([], False))
@@ -0,0 +1,72 @@
+import json
+import sys
+import threading
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app  # noqa: E402
+
+
+class SnapshotArchiveTest(BackendTestCase):
+    def objects(self) -> list:
+        return sorted((self.data_dir / "backups" / "objects").glob("*/*.json.gz"))
+
+    def test_unchanged_decks_are_shared_between_snapshots(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        self.add_deck("deck-2", cards=3)
+        first = self.store.backup(force=True)
+        self.assertEqual(len(self.objects()), 2)
+        self.assertIsNone(self.store.backup(force=True))
+
+        self.request("PATCH", "/api/decks/deck-1/cards/card-0", {"delta": 1})
+        second = self.store.backup(force=True)
+        self.assertEqual(len(self.objects()), 3)
+        self.assertEqual([s["id"] for s in self.store.archive.list()], [first, second])
+        self.assertEqual(self.store.archive.load(second)["decks"][0]["cards"][0]["aciertos"], 1)
+
+        self.store.archive.keep = 1
+        self.request("PATCH", "/api/decks/deck-1/cards/card-0", {"delta": 1})
+        self.store.backup(force=True)
+        self.assertEqual(len(self.store.archive.list()), 1)
+        self.assertEqual(len(self.objects()), 2)
+
+    def test_reviews_go_on_while_a_backup_encodes_the_decks(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        dumps = json.dumps
+        reviewer = threading.Thread(target=self.store.apply_review, args=("deck-1", "card-0", 1))
+
+        def encode(obj, **kwargs):
+            if reviewer.ident is None:
+                reviewer.start()
+                reviewer.join(5)
+                self.assertFalse(reviewer.is_alive(), "the review waited for the backup")
+            return dumps(obj, **kwargs)
+
+        with mock.patch.object(app.json, "dumps", side_effect=encode):
+            snapshot = self.store.backup(force=True)
+        # The deck changed while it was encoded, so the snapshot holds the review.
+        self.assertEqual(self.store.archive.load(snapshot)["decks"][0]["cards"][0]["aciertos"], 1)
+
+    def test_restore_replaces_the_database_and_can_be_undone(self) -> None:
+        self.add_deck("deck-1", cards=2)
+        snapshot = self.store.backup(force=True)
+        self.request("PATCH", "/api/decks/deck-1/cards/card-1", {"delta": -1})
+        self.store.close()
+
+        self.assertEqual(app.restore_snapshot(snapshot), snapshot)
+        restored = app.create_storage(self.storage_kind).read()
+        self.assertEqual([card["aciertos"] for card in restored["decks"][0]["cards"]], [0, 0])
+
+        undo = self.store.archive.latest()
+        self.assertNotEqual(undo, snapshot)
+        app.restore_snapshot(undo)
+        reverted = app.create_storage(self.storage_kind).read()
+        self.assertEqual([card["aciertos"] for card in reverted["decks"][0]["cards"]], [0, -1])
+        with self.assertRaises(ValueError):
+            app.restore_snapshot("../db")
+
+
+class SnapshotArchiveSqliteTest(SnapshotArchiveTest):
+    storage_kind = "sqlite"
@@ -0,0 +1,55 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+from backend import BackendTestCase, app  # noqa: E402
+
+
+class SqliteStorageTest(BackendTestCase):
+    storage_kind = "sqlite"
+
+    def read_back(self, path: Path) -> dict:
+        storage = app.SqliteStorage(path)
+        try:
+            return storage.read()
+        finally:
+            storage.close()
+
+    def test_every_change_is_written_through_and_read_back(self) -> None:
+        self.add_deck("deck-1", cards=3)
+        self.store.add_deck({"id": "deck-2", "name": "Mazo ñ", "origen": {"hojas": 2}, "cards": []})
+        self.add_deck("deck-3", cards=1)
+        self.request("PATCH", "/api/decks/deck-1/cards/card-2", {"delta": -1})
+        self.request("POST", "/api/decks/deck-1/reviews", {"reviews": [{"cardId": "card-0", "delta": 1}]})
+        self.assertEqual(self.request("DELETE", "/api/decks/deck-3")[0], 200)
+
+        # No flush: a second connection already sees every change.
+        data = self.read_back(app.SQLITE_PATH)
+        self.assertEqual(data, {"decks": self.store.list_decks()})
+        self.assertEqual([card["aciertos"] for card in data["decks"][0]["cards"]], [1, 0, -1])
+        self.assertEqual(data["decks"][1]["origen"], {"hojas": 2})
+
+    def test_database_reopens_in_wal_mode_without_migrating_again(self) -> None:
+        json_storage = app.JsonStorage()
+        card = {"id": "c", "aciertos": 0, "contenido": {}}
+        json_storage.write({"decks": [{"id": "deck-1", "name": "Viejo", "cards": [card]}]})
+        app.JOURNAL_PATH.write_bytes(b'["deck-1","c",4]\n')
+        path = self.data_dir / "migrated.sqlite3"
+
+        first = self.read_back(path)
+        self.assertEqual(first["decks"][0]["cards"][0]["aciertos"], 4)
+        self.assertFalse(app.JOURNAL_PATH.exists())
+
+        storage = app.SqliteStorage(path)
+        storage.record_reviews("deck-1", [("c", 5)])
+        self.assertTrue(path.with_name(path.name + "-wal").exists())
+        storage.close()
+
+        # A changed db.json is not imported a second time.
+        json_storage.write({"decks": []})
+        reopened = self.read_back(path)
+        self.assertEqual(reopened["decks"][0]["cards"][0]["aciertos"], 5)
+        with sqlite3.connect(str(path)) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
@@ -0,0 +1,146 @@
+import sys
+import unittest
+import zipfile
+import xml.etree.ElementTree as ET
+from io import BytesIO
+from pathlib import Path
+from typing import Any, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "helpers"))
+
+import legacy_xlsx  # noqa: E402
+from backend import app  # noqa: E402
+
+NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def cell(xml: str) -> ET.Element:
+    return ET.fromstring(xml.replace("<c", f'<c xmlns="{NS}"', 1))
+
+
+def raw_workbook(rows: List[str], shared: List[str]) -> bytes:
+    """A one-sheet workbook whose ``<row>`` elements are given verbatim."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr(
+            "xl/workbook.xml",
+            f'<workbook xmlns="{NS}" xmlns:r="{REL}">'
+            '<sheets><sheet name="Hoja" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="/xl/worksheets/sheet1.xml"/></Relationships>',
+        )
+        sheet = f'<worksheet xmlns="{NS}"><sheetData>{"".join(rows)}</sheetData></worksheet>'
+        zf.writestr("xl/worksheets/sheet1.xml", sheet)
+        if shared:
+            entries = "".join(f"<si><t>{value}</t></si>" for value in shared[:-1])
+            # Rich text: the runs of the last entry are concatenated.
+            entries += f"<si><r><t>{shared[-1][:2]}</t></r><r><t>{shared[-1][2:]}</t></r></si>"
+            zf.writestr("xl/sharedStrings.xml", f'<sst xmlns="{NS}">{entries}</sst>')
+    return buffer.getvalue()
+
+
+class CellValueTest(unittest.TestCase):
+    def test_cell_values(self) -> None:
+        shared = ["Hallo", "Danke"]
+        cases = [
+            ('<c t="s"><v>1</v></c>', "Danke"),
+            ('<c t="s"><v>7</v></c>', ""),
+            ('<c t="s"><v>x</v></c>', ""),
+            ('<c t="s"/>', ""),
+            ('<c t="inlineStr"><is><r><t>Stra</t></r><r><t>ße</t></r></is></c>', "Straße"),
+            ('<c t="b"><v>1</v></c>', True),
+            ('<c t="b"><v>0</v></c>', False),
+            ('<c t="b"/>', False),
+            ("<c><v>42</v></c>", 42),
+            ("<c><v>-7</v></c>", -7),
+            ("<c><v>007</v></c>", "007"),
+            ("<c><v> 3.50 </v></c>", 3.5),
+            ("<c><v>1E-3</v></c>", "1E-3"),
+            ("<c><v>  </v></c>", ""),
+            ("<c/>", ""),
+        ]
+        for xml, expected in cases:
+            with self.subTest(xml=xml):
+                value = app._parse_cell_value(cell(xml), shared)
+                self.assertEqual((type(value), value), (type(expected), expected))
+
+    def test_column_index(self) -> None:
+        cases = {"A1": 0, "Z9": 25, "AA10": 26, "XFD1048576": 16383, "b2": 1, "": 0, "$C$3": 2}
+        for ref, expected in cases.items():
+            with self.subTest(ref=ref):
+                self.assertEqual(app._column_index(ref), expected)
+                self.assertEqual(app._column_index(ref), expected)
+
+
+def legacy_value(value: Any) -> Any:
+    # The one intended difference: boolean cells read as bools instead of "TRUE"/"FALSE".
+    return {"TRUE": True, "FALSE": False}.get(value, value) if isinstance(value, str) else value
+
+
+class LegacyEquivalenceTest(unittest.TestCase):
+    """The streaming parser must read workbooks like the original tree-based one."""
+
+    SHARED = ["Frente", "Reverso", "Nota", "Hallo", "Danke", "Straße"]
+    WORKBOOKS = {
+        "shared strings": [
+            '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c><c r="C1" t="s"><v>2</v></c></row>',
+            '<row r="2"><c r="A2" t="s"><v>3</v></c><c r="B2" t="s"><v>4</v></c><c r="C2" t="s"><v>5</v></c></row>',
+            '<row r="3"><c r="A3" t="s"><v>9</v></c><c r="B3" t="s"><v>4</v></c></row>',
+        ],
+        "inline strings": [
+            '<row r="1"><c r="A1" t="inlineStr"><is><t>Wort</t></is></c>'
+            '<c r="B1" t="inlineStr"><is><r><t>Bedeu</t></r><r><t>tung</t></r></is></c></row>',
+            '<row r="2"><c r="A2" t="inlineStr"><is><t> Haus </t></is></c>'
+            '<c r="B2" t="inlineStr"><is><t/></is></c></row>',
+            '<row r="3"><c r="A3" t="inlineStr"><is><t>Baum</t></is></c><c r="B3" t="b"><v>1</v></c></row>',
+        ],
+        "sparse cells": [
+            '<row r="1"><c r="B1" t="s"><v>0</v></c><c r="B1" t="s"><v>0</v></c><c r="E1" t="s"><v>0</v></c></row>',
+            '<row r="2"><c r="A2"><v>007</v></c><c r="C2"><v>3.50</v></c><c r="E2"><v>-4</v></c></row>',
+            '<row r="3"/>',
+            '<row r="5"><c r="D5"><v>1E-3</v></c><c r="F5"><v>  </v></c><c r="AA5" t="s"><v>4</v></c></row>',
+            '<row r="6"><c r="B6"/><c r="C6"><v></v></c></row>',
+            '<row r="7"><c><v>42</v></c><c r="B7" t="b"><v>0</v></c></row>',
+        ],
+    }
+
+    def test_cards_match_the_original_parser(self) -> None:
+        for name, rows in self.WORKBOOKS.items():
+            with self.subTest(name):
+                raw = raw_workbook(rows, self.SHARED)
+                expected = [
+                    ({key: legacy_value(value) for key, value in card["contenido"].items()}, card["aciertos"])
+                    for card in legacy_xlsx.parse_xlsx_cards(raw)
+                ]
+                cards = [(card["contenido"], card["aciertos"]) for card in app.parse_xlsx_cards(raw)]
+                self.assertEqual(cards, expected)
+                self.assertTrue(expected)
+
+    def test_cell_values_match_the_original_parser(self) -> None:
+        for name, rows in self.WORKBOOKS.items():
+            parsed_rows = [ET.fromstring(row.replace("<row", f'<row xmlns="{NS}"', 1)) for row in rows]
+            elements = [element for row in parsed_rows for element in row]
+            with self.subTest(name):
+                for element in elements:
+                    ref = element.attrib.get("r", "")
+                    self.assertEqual(app._column_index(ref), legacy_xlsx._column_index(ref))
+                    value = app._parse_cell_value(element, self.SHARED)
+                    expected = legacy_value(legacy_xlsx._parse_cell_value(element, self.SHARED))
+                    self.assertEqual((type(value), value), (type(expected), expected))
+
+    def test_unreadable_workbooks_are_rejected_by_both(self) -> None:
+        header_only = raw_workbook(['<row r="1"><c r="A1" t="s"><v>0</v></c></row>'], self.SHARED)
+        for raw in (b"no es un zip", raw_workbook([], []), header_only):
+            with self.subTest(raw=raw[:12]):
+                with self.assertRaises(ValueError):
+                    legacy_xlsx.parse_xlsx_cards(raw)
+                with self.assertRaises(ValueError):
+                    app.parse_xlsx_cards(raw)
+
+
+if __name__ == "__main__":
+    unittest.main()